@@ -5,6 +5,12 @@ import re
 from openai import AzureOpenAI
 
 from dotenv import load_dotenv
+import code_guard
+import llm_cache
+
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)  # the default from pandas 3 on
+
 load_dotenv()  # this reads ..env in the current folder
 
 AZURE_OPENAI_API_KEY = os.getenv("AZURE_OPENAI_API_KEY")
@@ -14,79 +20,97 @@ AZURE_OPENAI_API_VERSION = os.getenv("AZURE_OPENAI_API_VERSION")
 
 DATA_DIR = r"C:\Users\aisiq\OneDrive\Desktop\Recruitment_Data_Analysis"
 
-print("[LOG] Initializing Azure OpenAI client...")
-client = AzureOpenAI(
-    api_key=AZURE_OPENAI_API_KEY,
-    azure_endpoint=AZURE_OPENAI_ENDPOINT,
-    api_version=AZURE_OPENAI_API_VERSION,
-)
+def _make_client():
+    print("[LOG] Initializing Azure OpenAI client...")
+    return AzureOpenAI(
+        api_key=AZURE_OPENAI_API_KEY,
+        azure_endpoint=AZURE_OPENAI_ENDPOINT,
+        api_version=AZURE_OPENAI_API_VERSION,
+    )
+
+
+# Created on the first call that has to reach the endpoint (never in replay mode).
+client = llm_cache.LazyClient(_make_client)
 
 def call_llm(system_prompt, user_content):
     messages = [
         {"role": "system", "content": system_prompt},
         {"role": "user", "content": user_content},
     ]
-    resp = client.chat.completions.create(
-        model=AZURE_OPENAI_MODEL,
-        messages=messages,
+    content, _ = llm_cache.chat(
+        client,
+        AZURE_OPENAI_MODEL,
+        messages,
         temperature=0
     )
-    return resp.choices[0].message.content.strip()
+    return content.strip()
 #%%
-print("[LOG] Loading Excel files into dataframes...")
-
-# Changed file extensions from .csv to .xlsx
-application = pd.read_excel(os.path.join(DATA_DIR, "Application_table_100.xlsx"))
-candidate = pd.read_excel(os.path.join(DATA_DIR, "Candidate_table_100.xlsx"))
-interview = pd.read_excel(os.path.join(DATA_DIR, "interview_table_100.xlsx"))
-offer = pd.read_excel(os.path.join(DATA_DIR, "offer_table_100.xlsx"))
-recruiter = pd.read_excel(os.path.join(DATA_DIR, "recruiter_table_100.xlsx"))
-requirement = pd.read_excel(os.path.join(DATA_DIR, "Requirement_Table_100.xlsx"))
-
-print("[LOG] Joining base tables...")
-
-df = (
-    application
-    .merge(candidate, on="candidate_id", how="left")
-    .merge(requirement, on="requirement_id", how="left")
-    .merge(recruiter, left_on="screened_by_recruiter_id", right_on="recruiter_id", how="left")
-)
-
-print("[LOG] Aggregating interviews...")
-interview_agg = (
-    interview
-    .groupby("application_id")
-    .agg(
-        total_interviews=("interview_id", "count"),
-        last_interview_date=("interview_date", "max"),
+ARROW_MODE = os.getenv("HR_STORAGE_MODE") == "arrow"
+if ARROW_MODE:
+    # Map the joined df from the Arrow snapshot shared with the other workers.
+    # Use hr_data's data directory (HR_DATA_DIR) and main.py's artifacts so
+    # both entry points map the same build instead of replacing each other's.
+    # The snapshot's df carries extra per-application columns; keep the same
+    # columns this script joins itself below.
+    import arrow_snapshot
+    import hr_data
+    arrow_snapshot.enable_shared_artifacts()
+    df = hr_data.base_df(arrow_snapshot.open_or_export(hr_data.DATA_DIR)["data"])
+else:
+    print("[LOG] Loading Excel files into dataframes...")
+
+    # Changed file extensions from .csv to .xlsx
+    application = pd.read_excel(os.path.join(DATA_DIR, "Application_table_100.xlsx"))
+    candidate = pd.read_excel(os.path.join(DATA_DIR, "Candidate_table_100.xlsx"))
+    interview = pd.read_excel(os.path.join(DATA_DIR, "interview_table_100.xlsx"))
+    offer = pd.read_excel(os.path.join(DATA_DIR, "offer_table_100.xlsx"))
+    recruiter = pd.read_excel(os.path.join(DATA_DIR, "recruiter_table_100.xlsx"))
+    requirement = pd.read_excel(os.path.join(DATA_DIR, "Requirement_Table_100.xlsx"))
+
+    print("[LOG] Joining base tables...")
+
+    df = (
+        application
+        .merge(candidate, on="candidate_id", how="left")
+        .merge(requirement, on="requirement_id", how="left")
+        .merge(recruiter, left_on="screened_by_recruiter_id", right_on="recruiter_id", how="left")
+    )
+
+    print("[LOG] Aggregating interviews...")
+    interview_agg = (
+        interview
+        .groupby("application_id")
+        .agg(
+            total_interviews=("interview_id", "count"),
+            last_interview_date=("interview_date", "max"),
+        )
+        .reset_index()
     )
-    .reset_index()
-)
-
-print("[LOG] Aggregating offers...")
-offers_with_app = offer.merge(
-    application[["application_id", "candidate_id"]],
-    left_on="offer_candidate_id",
-    right_on="candidate_id",
-    how="left",
-)
-
-offer_agg = (
-    offers_with_app
-    .groupby("application_id")
-    .agg(
-        total_offers=("offer_id", "count"),
-        last_offer_date=("offer_date", "max"),
+
+    print("[LOG] Aggregating offers...")
+    offers_with_app = offer.merge(
+        application[["application_id", "candidate_id"]],
+        left_on="offer_candidate_id",
+        right_on="candidate_id",
+        how="left",
+    )
+
+    offer_agg = (
+        offers_with_app
+        .groupby("application_id")
+        .agg(
+            total_offers=("offer_id", "count"),
+            last_offer_date=("offer_date", "max"),
+        )
+        .reset_index()
     )
-    .reset_index()
-)
 
-print("[LOG] Final join with interviews and offers...")
-df = (
-    df
-    .merge(interview_agg, on="application_id", how="left")
-    .merge(offer_agg, on="application_id", how="left")
-)
+    print("[LOG] Final join with interviews and offers...")
+    df = (
+        df
+        .merge(interview_agg, on="application_id", how="left")
+        .merge(offer_agg, on="application_id", how="left")
+    )
 
 print("[LOG] Combined dataframe ready. Shape:", df.shape)
 df.head()
@@ -117,6 +141,8 @@ Rules:
 - If the user clearly wants numbers or concrete data from the stored tables, set
   "route" to "specialist".
 - Do NOT include comments or extra keys. Only the JSON object above.
+
+Classify and enrich the user question as described.
 """
 
 SPECIALIST_SYSTEM = """
@@ -145,6 +171,17 @@ Rules:
 - No backticks, no ``````, only pure JSON.
 """
 
+if ARROW_MODE:
+    # The shared snapshot is loaded with hr_data's column list and dtypes
+    # rather than read_excel's guesses; tell the code writer what differs.
+    SPECIALIST_SYSTEM += f"""
+Types in df:
+- every *_date column is already datetime64 (use .dt, not string operations).
+- id and count columns with blanks are nullable Int64; use .fillna(0) or
+  .notna() before using them in a condition.
+- df has exactly these columns: {", ".join(df.columns)}
+"""
+
 GENERIC_SYSTEM = """
 You are GenericHRAgent.
 If you are called, it means the user's question cannot be answered from the dataframe.
@@ -179,7 +216,8 @@ import json
 
 def supervisor_route(user_query: str):
     print("[LOG] Supervisor routing...")
-    prompt = f"User question: {user_query}\nClassify and enrich as described."
+    # Variable text last so the system prompt stays a cacheable prefix.
+    prompt = f"User question: {user_query}"
     raw = call_llm(SUPERVISOR_KNOWLEDGE, prompt)
     try:
         data = json.loads(raw)
@@ -205,11 +243,18 @@ def specialist_answer(enriched_query: str):
     code = spec["code"]
     print("[LOG] Generated pandas code:\n", code)
 
-    # Prepare an execution namespace with df and pd
-    ns = {"df": df.copy(), "pd": pd}
+    # Prepare an execution namespace with df and pd. A shallow copy is enough
+    # under copy-on-write: generated code that modifies df copies only what it
+    # touches instead of the whole (possibly memory-mapped) frame per question.
+    # code_guard checks the code, vectorizes row-wise patterns and reuses the
+    # compiled code for a source it has seen before.
+    def namespace():
+        return {"df": df.copy(deep=False), "pd": pd}
 
     try:
-        exec(code, ns)
+        ns = code_guard.run(code, namespace)
+    except code_guard.CodeRejected as e:
+        raise RuntimeError(f"[ERROR] Generated code rejected: {e}\nCode was:\n{code}")
     except Exception as e:
         raise RuntimeError(f"[ERROR] Executing generated code failed: {e}\nCode was:\n{code}")
 
@@ -279,6 +324,7 @@ if __name__ == "__main__":
         user_input = input("Enter your recruitment question (or type 'exit' to quit): ")
         if user_input.lower() in ["exit", "quit"]:
             print("Exiting...")
+            code_guard.print_code_stats()
             break
         ask_recruitment(user_input)
 
@@ -0,0 +1,306 @@
+import importlib
+import json
+import multiprocessing
+import os
+import pickle
+import shutil
+import sys
+import threading
+import time
+
+import duckdb
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+import hr_data
+
+# ========= SHARED ARROW SNAPSHOT ========= #
+# One process writes the snapshot's dataframes as uncompressed Arrow IPC files;
+# every assistant process memory-maps them read-only. pandas (>= 3, whose
+# strings are Arrow-backed) and DuckDB both read the mapped buffers in place,
+# so N workers share one copy of the data through the page cache instead of
+# each holding private dataframes. Artifacts that are not dataframes (indexes,
+# column stats) are small and are pickled next to the tables.
+#
+# Layout: <ARROW_SNAPSHOT_DIR>/CURRENT names the active build-<ns> directory,
+# which holds manifest.json, <name>.arrow per dataframe and artifacts.pkl.
+
+ARROW_SNAPSHOT_DIR = os.getenv(
+    "HR_ARROW_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "hr_arrow"),
+)
+KEEP_BUILDS = 2
+# A superseded build is kept at least this long after its successor was
+# written, and for as long as a live process has it mapped (reader-<pid>
+# markers), so a reader that resolved CURRENT just before an export can still
+# open it.
+BUILD_GRACE_S = 60
+
+# Artifacts every entry point registers before exporting, so the first
+# process to export writes the set the others need instead of each one
+# rebuilding the missing artifacts privately. Order matters (see each enable()).
+SHARED_ARTIFACT_MODULES = ("skills_index", "query_templates", "timeline", "column_profile")
+
+
+def enable_shared_artifacts():
+    for name in SHARED_ARTIFACT_MODULES:
+        importlib.import_module(name).enable()
+
+
+def _frame_to_table(frame: pd.DataFrame):
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    # from_pandas turns NaN into nulls, which to_pandas must then copy back
+    # into a private buffer. Float columns keep NaN as a value instead, so
+    # they map zero-copy like columns without blanks.
+    for i in range(table.num_columns):
+        column = frame.iloc[:, i]
+        if column.dtype == np.float64 and table.column(i).null_count:
+            table = table.set_column(i, table.schema.field(i), pa.array(column.to_numpy(), from_pandas=False))
+    return table
+
+
+def export_snapshot(snapshot, root: str = ARROW_SNAPSHOT_DIR):
+    # Write a new build directory and point CURRENT at it. Returns the build name.
+    os.makedirs(root, exist_ok=True)
+    build = f"build-{time.time_ns()}"
+    out_dir = os.path.join(root, build)
+    os.makedirs(out_dir)
+    frames = []
+    others = {}
+    for name, value in snapshot["data"].items():
+        if isinstance(value, pd.DataFrame):
+            try:
+                table = _frame_to_table(value)
+            except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+                # Mixed-type object columns cannot be stored as Arrow; keep this
+                # frame private to each process rather than failing the export.
+                print(f"[LOG] {name} is not Arrow-compatible ({e}); pickling it instead.")
+                others[name] = value
+                continue
+            with ipc.new_file(os.path.join(out_dir, f"{name}.arrow"), table.schema) as writer:
+                writer.write_table(table)
+            frames.append(name)
+        else:
+            others[name] = value
+    with open(os.path.join(out_dir, "artifacts.pkl"), "wb") as fh:
+        pickle.dump(others, fh, protocol=pickle.HIGHEST_PROTOCOL)
+    manifest = {
+        "version": snapshot["version"],
+        "loaded_at": snapshot["loaded_at"],
+        "data_dir": snapshot["data_dir"],
+        "sources": snapshot["sources"],
+        "frames": frames,
+    }
+    with open(os.path.join(out_dir, "manifest.json"), "w") as fh:
+        json.dump(manifest, fh)
+
+    tmp = os.path.join(root, f"CURRENT.{os.getpid()}")
+    with open(tmp, "w") as fh:
+        fh.write(build)
+    os.replace(tmp, os.path.join(root, "CURRENT"))
+    _cleanup_old_builds(root, KEEP_BUILDS)
+    print(f"[LOG] Exported Arrow snapshot v{snapshot['version']} to {out_dir}")
+    return build
+
+
+def _has_live_reader(build_dir):
+    for entry in os.listdir(build_dir):
+        if entry.startswith("reader-") and hr_data.pid_alive(int(entry[len("reader-"):])):
+            return True
+    return False
+
+
+def _mark_reader(root, build):
+    # Mark this process as a reader of build and drop its marks elsewhere.
+    marker = f"reader-{os.getpid()}"
+    for other in os.listdir(root):
+        if other.startswith("build-") and other != build:
+            try:
+                os.remove(os.path.join(root, other, marker))
+            except FileNotFoundError:
+                pass
+    open(os.path.join(root, build, marker), "w").close()
+
+
+def _cleanup_old_builds(root, keep):
+    # Mapped files of a removed build stay readable on POSIX; on Windows the
+    # delete fails while a process still maps them and is retried next export.
+    builds = sorted(d for d in os.listdir(root) if d.startswith("build-"))
+    now = time.time_ns()
+    for old, successor in zip(builds[:-keep], builds[1:]):
+        if now - int(successor[len("build-"):]) < BUILD_GRACE_S * 1e9:
+            continue
+        path = os.path.join(root, old)
+        if _has_live_reader(path):
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def current_build(root: str = ARROW_SNAPSHOT_DIR):
+    try:
+        with open(os.path.join(root, "CURRENT")) as fh:
+            return fh.read().strip()
+    except FileNotFoundError:
+        return None
+
+
+def map_frame(path: str):
+    # Zero-copy for numeric, datetime and (on pandas >= 3) string columns;
+    # older pandas copies strings into object arrays.
+    source = pa.memory_map(path, "r")
+    table = ipc.open_file(source).read_all()
+    return table.to_pandas(split_blocks=True)
+
+
+def load_shared_snapshot(root: str = ARROW_SNAPSHOT_DIR, build: str = None):
+    build = build or current_build(root)
+    if build is None:
+        return None
+    build_dir = os.path.join(root, build)
+    _mark_reader(root, build)
+    with open(os.path.join(build_dir, "manifest.json")) as fh:
+        manifest = json.load(fh)
+    with open(os.path.join(build_dir, "artifacts.pkl"), "rb") as fh:
+        data = pickle.load(fh)
+    for name in manifest["frames"]:
+        data[name] = map_frame(os.path.join(build_dir, f"{name}.arrow"))
+    return {
+        "version": manifest["version"],
+        "loaded_at": manifest["loaded_at"],
+        "data_dir": manifest["data_dir"],
+        # JSON turns the (mtime_ns, size) tuples into lists.
+        "sources": {k: tuple(v) if v is not None else None for k, v in manifest["sources"].items()},
+        "data": data,
+        "build": build,
+    }
+
+
+def open_or_export(data_dir: str = hr_data.DATA_DIR, root: str = ARROW_SNAPSHOT_DIR):
+    # Map the shared snapshot, (re)building it from the workbooks first when
+    # there is none yet, the workbooks changed since it was written, or it
+    # lacks an artifact this process registered.
+    snapshot = load_shared_snapshot(root)
+    if snapshot is None or snapshot["data_dir"] != data_dir:
+        built = hr_data.build_snapshot(data_dir)
+    else:
+        changed = hr_data.changed_tables(snapshot)
+        missing = [name for name, _, _ in hr_data.ARTIFACTS if name not in snapshot["data"]]
+        if not changed and not missing:
+            print(f"[LOG] Mapped shared Arrow snapshot v{snapshot['version']} ({snapshot['build']}).")
+            return snapshot
+        if missing:
+            print(f"[LOG] Shared snapshot lacks {', '.join(missing)}; adding them.")
+        built = hr_data.refresh_snapshot(snapshot, changed)
+    # Drop the private copies and use the mapping like every other worker.
+    return load_shared_snapshot(root, export_snapshot(built, root))
+
+
+# ========= FOLLOWER ========= #
+# Replaces hr_data's watcher in arrow mode: adopts builds exported by other
+# processes, and exports a new one itself when the workbooks change (seen on
+# two consecutive polls, as in hr_data._watch_loop).
+
+def _follow_loop(root: str, interval: float, stop: threading.Event):
+    pending = {}
+    while not stop.wait(interval):
+        snapshot = hr_data.current_snapshot()
+        try:
+            build = current_build(root)
+            if build is not None and build != snapshot.get("build"):
+                hr_data.adopt_snapshot(load_shared_snapshot(root, build))
+                print(f"[LOG] Adopted shared Arrow snapshot {build}.")
+                pending.clear()
+                continue
+            stable = hr_data.stable_changes(snapshot, pending)
+            if not stable:
+                continue
+            build = export_snapshot(hr_data.refresh_snapshot(snapshot, stable), root)
+            hr_data.adopt_snapshot(load_shared_snapshot(root, build))
+        except Exception as e:
+            print(f"[LOG] Shared snapshot refresh failed, keeping v{snapshot['version']}: {e}")
+
+
+def start_follower(root: str = ARROW_SNAPSHOT_DIR, interval: float = 2.0):
+    stop = threading.Event()
+    thread = threading.Thread(target=_follow_loop, args=(root, interval, stop), name="arrow-follower", daemon=True)
+    thread.start()
+    print(f"[LOG] Following shared Arrow snapshots in {root} every {interval}s.")
+    return stop
+
+
+# ========= MEMORY BENCHMARK ========= #
+# Starts N worker processes that either load the workbooks privately (what
+# every process does today) or map the shared Arrow snapshot, touch every
+# column through DuckDB, and report their memory while all of them are alive.
+# PSS splits shared pages between the processes mapping them, so the PSS sum
+# is the real footprint of the N workers together.
+
+def memory_usage():
+    # {"rss", "pss", "anonymous"} in kB from /proc (Linux only), else None.
+    try:
+        with open("/proc/self/smaps_rollup") as fh:
+            lines = fh.read().splitlines()
+    except OSError:
+        return None
+    fields = {}
+    for line in lines[1:]:
+        key, _, value = line.partition(":")
+        fields[key.strip()] = int(value.split()[0])
+    return {"rss": fields.get("Rss", 0), "pss": fields.get("Pss", 0), "anonymous": fields.get("Anonymous", 0)}
+
+
+def _touch(snapshot):
+    con = duckdb.connect()
+    hr_data.register_tables(con, snapshot)
+    for sql_name in hr_data.SQL_TABLE_NAMES.values():
+        con.execute(f'SELECT COUNT(DISTINCT COLUMNS(*)) FROM "{sql_name}"').fetchall()
+    con.close()
+
+
+def _bench_worker(mode, data_dir, root, barrier, results):
+    if mode == "excel":
+        snapshot = hr_data.build_snapshot(data_dir)
+    elif mode == "arrow":
+        snapshot = load_shared_snapshot(root)
+    else:
+        snapshot = None
+    if snapshot is not None:
+        _touch(snapshot)
+    barrier.wait()
+    results.put((mode, memory_usage()))
+    barrier.wait()
+
+
+def benchmark(workers: int = 4, data_dir: str = hr_data.DATA_DIR, root: str = ARROW_SNAPSHOT_DIR):
+    export_snapshot(hr_data.build_snapshot(data_dir), root)
+    ctx = multiprocessing.get_context("spawn")
+    print(f"{'mode':10} {'workers':>7} {'sum RSS MB':>11} {'sum PSS MB':>11} {'anon/worker MB':>15} {'startup s':>10}")
+    for mode in ("baseline", "excel", "arrow"):
+        barrier = ctx.Barrier(workers)
+        results = ctx.Queue()
+        start = time.perf_counter()
+        procs = [ctx.Process(target=_bench_worker, args=(mode, data_dir, root, barrier, results))
+                 for _ in range(workers)]
+        for p in procs:
+            p.start()
+        usage = [results.get()[1] for _ in procs]
+        elapsed = time.perf_counter() - start
+        for p in procs:
+            p.join()
+        if any(u is None for u in usage):
+            print(f"{mode:10} {workers:7d} {'n/a (no /proc/self/smaps_rollup)':>38} {elapsed:10.2f}")
+            continue
+        rss = sum(u["rss"] for u in usage) / 1024
+        pss = sum(u["pss"] for u in usage) / 1024
+        anon = sum(u["anonymous"] for u in usage) / 1024 / workers
+        print(f"{mode:10} {workers:7d} {rss:11.1f} {pss:11.1f} {anon:15.1f} {elapsed:10.2f}")
+    print("baseline = interpreter and libraries only; subtract it to get the data's share.")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "export":
+        export_snapshot(hr_data.build_snapshot())
+    else:
+        benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 4)
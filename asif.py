@@ -2,6 +2,7 @@ import os
 import pandas as pd
 from openai import AzureOpenAI
 from dotenv import load_dotenv
+import llm_cache
 load_dotenv()
 
 ## ========= CONFIG & LOGGING ========= ##
@@ -13,24 +14,30 @@ AZURE_OPENAI_API_VERSION = os.getenv("AZURE_OPENAI_API_VERSION", "2024-02-15-pre
 
 DATA_DIR = DATA_DIR = r"C:\Users\aisiq\OneDrive\Desktop\Recruitment_Data_Analysis"
 
-print("[LOG] Initializing Azure OpenAI client...")
-client = AzureOpenAI(
-    api_key=AZURE_OPENAI_API_KEY,
-    azure_endpoint=AZURE_OPENAI_ENDPOINT,
-    api_version=AZURE_OPENAI_API_VERSION,
-)
+def _make_client():
+    print("[LOG] Initializing Azure OpenAI client...")
+    return AzureOpenAI(
+        api_key=AZURE_OPENAI_API_KEY,
+        azure_endpoint=AZURE_OPENAI_ENDPOINT,
+        api_version=AZURE_OPENAI_API_VERSION,
+    )
+
+
+# Created on the first call that has to reach the endpoint (never in replay mode).
+client = llm_cache.LazyClient(_make_client)
 
 def call_llm(system_prompt, user_content):
     messages = [
         {"role": "system", "content": system_prompt},
         {"role": "user", "content": user_content},
     ]
-    resp = client.chat.completions.create(
-        model=AZURE_OPENAI_MODEL,
-        messages=messages,
+    content, _ = llm_cache.chat(
+        client,
+        AZURE_OPENAI_MODEL,
+        messages,
         temperature=0
     )
-    return resp.choices[0].message.content.strip()
+    return content.strip()
 
 # ========= DATAFRAME BUILD ========= #
 
@@ -0,0 +1,751 @@
+import ast
+import copy
+import hashlib
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+
+import pandas as pd
+
+# ========= GUARDED PANDAS CODE EXECUTION ========= #
+# Python written by SpecialistHRAgent (app.py) goes through one pass before it
+# runs: the source is parsed, checked against a list of disallowed constructs,
+# common row-wise patterns are rewritten into column operations, and the
+# compiled code object is cached by source hash so a repeated question skips
+# parsing and compiling. This is a guard against mistakes, not a sandbox.
+#
+# Rewrites (each only when every part of the expression translates):
+# - frame.apply(lambda r: <expr of r["col"]>, axis=1)  -> <expr of frame["col"]>
+# - series.apply/map(lambda v: <expr of v>)            -> <expr of series>
+# - [<expr> for v in series], zip(...), iterrows(),
+#   itertuples() (with an optional if)                 -> (<expr>)[<cond>].tolist()
+# - out = [] followed by a for loop that only appends  -> the comprehension above
+# A rewritten program that raises, or whose result differs from the
+# original's in a sampled shadow run, falls back to the original code for good.
+
+CODE_REWRITE = os.getenv("CODE_REWRITE", "1") == "1"
+# Fraction of first executions of a rewritten program that also run the
+# original, in a background thread after the answer is returned, to check the
+# result and measure the time saved. A small sample keeps the slow row-wise
+# path off most turns while still catching a rewrite that changes a result.
+CODE_GUARD_SHADOW_RATE = float(os.getenv("CODE_GUARD_SHADOW_RATE", "0.1"))
+CODE_CACHE_SIZE = int(os.getenv("CODE_CACHE_SIZE", "256"))
+
+BANNED_NAMES = {
+    "eval", "exec", "compile", "open", "__import__", "globals", "locals", "vars",
+    "getattr", "setattr", "delattr", "input", "breakpoint", "exit", "quit", "help",
+    "__builtins__",
+}
+# File/clipboard writers, readers and plotting.
+BANNED_ATTRIBUTES = {
+    "to_csv", "to_excel", "to_pickle", "to_parquet", "to_sql", "to_json", "to_hdf",
+    "to_feather", "to_clipboard", "to_html", "to_latex", "to_stata", "to_orc", "to_xml",
+    "plot", "hist", "boxplot",
+}
+BANNED_NODES = {
+    ast.Import: "imports", ast.ImportFrom: "imports", ast.Global: "global statements",
+    ast.Nonlocal: "nonlocal statements", ast.While: "while loops", ast.With: "with blocks",
+    ast.ClassDef: "class definitions", ast.AsyncFunctionDef: "async code", ast.Await: "async code",
+    ast.AsyncFor: "async code", ast.AsyncWith: "async code",
+}
+
+STR_METHODS = {
+    "lower", "upper", "strip", "lstrip", "rstrip", "title", "capitalize", "startswith",
+    "endswith", "replace", "split", "zfill", "isdigit", "isalpha", "isnumeric",
+}
+DT_FIELDS = {"year", "month", "day", "hour", "minute", "quarter", "dayofweek", "weekday",
+             "date", "days", "seconds"}
+DT_METHODS = {"total_seconds", "normalize", "strftime"}
+BOOLEAN_METHODS = {"startswith", "endswith", "isdigit", "isalpha", "isnumeric", "isin",
+                   "isna", "notna", "isnull", "notnull"}
+_COMPARE_OPS = (ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE)
+_ARITH_OPS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow)
+
+CODE_GUARD_STATS = {"compiled": 0, "cache_hits": 0, "rejected": 0, "rewritten": 0,
+                    "fallbacks": 0, "mismatches": 0}
+REWRITE_COUNTS = Counter()
+TIME_SAVED = {"exec_s": 0.0, "compile_s": 0.0, "measured": 0}
+_stats_lock = threading.Lock()
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_shadow_threads = []
+
+
+class CodeRejected(RuntimeError):
+    pass
+
+
+def _count(name, n=1):
+    with _stats_lock:
+        CODE_GUARD_STATS[name] += n
+
+
+# ---------- static checks ----------
+
+def check(tree):
+    # Raises CodeRejected for constructs generated code has no business using.
+    for node in ast.walk(tree):
+        kind = BANNED_NODES.get(type(node))
+        if kind:
+            raise CodeRejected(f"{kind} are not allowed (line {node.lineno})")
+        if isinstance(node, ast.Name) and node.id in BANNED_NAMES:
+            raise CodeRejected(f"'{node.id}' is not allowed (line {node.lineno})")
+        if isinstance(node, ast.Attribute):
+            if node.attr.startswith("__") or node.attr in BANNED_ATTRIBUTES or node.attr.startswith("read_"):
+                raise CodeRejected(f"'.{node.attr}' is not allowed (line {node.lineno})")
+    if not any(isinstance(n, ast.Name) and n.id == "result_df" and isinstance(n.ctx, ast.Store)
+               for n in ast.walk(tree)):
+        raise CodeRejected("the code never assigns result_df")
+
+
+# ---------- vectorization ----------
+
+class _Skip(Exception):
+    pass
+
+
+def _is_name(node, name):
+    return isinstance(node, ast.Name) and node.id == name
+
+
+def _pure(node):
+    # Side-effect-free expressions that can be evaluated more than once.
+    if isinstance(node, (ast.Name, ast.Constant)):
+        return True
+    if isinstance(node, ast.Attribute):
+        return _pure(node.value)
+    if isinstance(node, ast.Subscript):
+        return _pure(node.value) and _pure(node.slice)
+    if isinstance(node, (ast.List, ast.Tuple)):
+        return all(_pure(e) for e in node.elts)
+    if isinstance(node, ast.Compare):
+        return _pure(node.left) and all(_pure(c) for c in node.comparators)
+    if isinstance(node, ast.BinOp):
+        return _pure(node.left) and _pure(node.right)
+    if isinstance(node, ast.UnaryOp):
+        return _pure(node.operand)
+    return False
+
+
+def _is_boolean(node):
+    # Expressions that are True/False per row, so and/or/not map to &/|/~.
+    if isinstance(node, ast.Compare):
+        return True
+    if isinstance(node, ast.BoolOp):
+        return all(_is_boolean(v) for v in node.values)
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        return _is_boolean(node.operand)
+    if isinstance(node, ast.Call):
+        func = node.func
+        if isinstance(func, ast.Attribute):
+            return func.attr in BOOLEAN_METHODS
+    return False
+
+
+def _method(value, name, *args, **kwargs):
+    return ast.Call(
+        func=ast.Attribute(value=value, attr=name, ctx=ast.Load()),
+        args=list(args),
+        keywords=[ast.keyword(arg=k, value=v) for k, v in kwargs.items()],
+    )
+
+
+def _accessor(value, accessor, name):
+    return ast.Attribute(value=ast.Attribute(value=value, attr=accessor, ctx=ast.Load()), attr=name, ctx=ast.Load())
+
+
+class _Vectorizer:
+    # Translates a per-row (row=...) or per-value (values=...) expression into
+    # a whole-column one. visit returns (node, is_series) or raises _Skip.
+
+    def __init__(self, values=None, row=None, frame=None, row_subscripts=True):
+        self.values = values or {}
+        self.row = row
+        self.frame = frame
+        self.row_subscripts = row_subscripts  # False for itertuples (positional)
+        self.names = set(self.values) | ({row} if row else set())
+
+    def column(self, name):
+        return ast.Subscript(value=copy.deepcopy(self.frame), slice=ast.Constant(name), ctx=ast.Load())
+
+    def mentions(self, node):
+        return any(isinstance(n, ast.Name) and n.id in self.names for n in ast.walk(node))
+
+    def series(self, node):
+        out, is_series = self.visit(node)
+        if not is_series:
+            raise _Skip
+        return out
+
+    def scalar(self, node):
+        out, is_series = self.visit(node)
+        if is_series:
+            raise _Skip
+        return out
+
+    def visit(self, node):
+        if not self.mentions(node):
+            # Constant for every row; evaluated once instead of per row.
+            return node, False
+        if isinstance(node, ast.Name):
+            if node.id in self.values:
+                return copy.deepcopy(self.values[node.id]), True
+            raise _Skip
+        if isinstance(node, ast.Subscript) and self.row and _is_name(node.value, self.row):
+            key = node.slice
+            if self.row_subscripts and isinstance(key, ast.Constant) and isinstance(key.value, str):
+                return self.column(key.value), True
+            raise _Skip
+        if isinstance(node, ast.Attribute):
+            if self.row and _is_name(node.value, self.row):
+                if hasattr(pd.Series, node.attr) or node.attr == "Index":
+                    raise _Skip
+                return self.column(node.attr), True
+            if node.attr in DT_FIELDS:
+                return _accessor(self.series(node.value), "dt", node.attr), True
+            raise _Skip
+        if isinstance(node, ast.BinOp) and isinstance(node.op, _ARITH_OPS):
+            if isinstance(node.op, ast.Mod) and isinstance(node.left, ast.Constant) and isinstance(node.left.value, str):
+                raise _Skip  # "%s" % value is formatting, not modulo
+            left, ls = self.visit(node.left)
+            right, rs = self.visit(node.right)
+            return ast.BinOp(left=left, op=node.op, right=right), ls or rs
+        if isinstance(node, ast.UnaryOp):
+            if isinstance(node.op, (ast.USub, ast.UAdd)):
+                return ast.UnaryOp(op=node.op, operand=self.series(node.operand)), True
+            if isinstance(node.op, ast.Not) and _is_boolean(node.operand):
+                return ast.UnaryOp(op=ast.Invert(), operand=self.series(node.operand)), True
+            raise _Skip
+        if isinstance(node, ast.BoolOp) and all(_is_boolean(v) for v in node.values):
+            op = ast.BitAnd() if isinstance(node.op, ast.And) else ast.BitOr()
+            out = self.series(node.values[0])
+            for value in node.values[1:]:
+                out = ast.BinOp(left=out, op=op, right=self.series(value))
+            return out, True
+        if isinstance(node, ast.Compare) and len(node.ops) == 1:
+            return self.compare(node.left, node.ops[0], node.comparators[0])
+        if isinstance(node, ast.Call):
+            return self.call(node)
+        if isinstance(node, ast.IfExp) and _is_boolean(node.test):
+            test = self.series(node.test)
+            body, bs = self.visit(node.body)
+            orelse, os_ = self.visit(node.orelse)
+            if bs:
+                return _method(body, "where", test, orelse), True
+            if os_:
+                return _method(orelse, "mask", test, body), True
+            mapping = ast.Dict(keys=[ast.Constant(True), ast.Constant(False)], values=[body, orelse])
+            return _method(test, "map", mapping), True
+        raise _Skip
+
+    def compare(self, left, op, right):
+        if isinstance(op, _COMPARE_OPS):
+            if any(isinstance(side, ast.Constant) and side.value is None for side in (left, right)):
+                raise _Skip  # v == None is True for None; series == None never is
+            l, ls = self.visit(left)
+            r, rs = self.visit(right)
+            return ast.Compare(left=l, ops=[op], comparators=[r]), ls or rs
+        if isinstance(op, (ast.In, ast.NotIn)):
+            if isinstance(right, (ast.List, ast.Tuple, ast.Set)) and not self.mentions(right):
+                out = _method(self.series(left), "isin", ast.List(elts=right.elts, ctx=ast.Load()))
+            elif isinstance(left, ast.Constant) and isinstance(left.value, str):
+                # "Python" in skills -> substring test; missing text counts as no match.
+                out = _method(ast.Attribute(value=self.series(right), attr="str", ctx=ast.Load()), "contains",
+                              left, regex=ast.Constant(False), na=ast.Constant(False))
+            else:
+                raise _Skip
+            if isinstance(op, ast.NotIn):
+                out = ast.UnaryOp(op=ast.Invert(), operand=out)
+            return out, True
+        raise _Skip
+
+    def call(self, node):
+        func = node.func
+        if node.keywords:
+            raise _Skip
+        if isinstance(func, ast.Attribute):
+            if isinstance(func.value, ast.Name) and func.value.id == "pd" and func.attr in (
+                    "isna", "notna", "isnull", "notnull") and len(node.args) == 1:
+                return _method(self.series(node.args[0]), func.attr), True
+            receiver = self.series(func.value)
+            args = [self.scalar(a) for a in node.args]
+            if func.attr in STR_METHODS:
+                extra = {"regex": ast.Constant(False)} if func.attr == "replace" else {}
+                return _method(ast.Attribute(value=receiver, attr="str", ctx=ast.Load()), func.attr, *args, **extra), True
+            if func.attr in DT_METHODS:
+                return _method(ast.Attribute(value=receiver, attr="dt", ctx=ast.Load()), func.attr, *args), True
+            raise _Skip
+        if isinstance(func, ast.Name) and node.args:
+            value = self.series(node.args[0])
+            rest = [self.scalar(a) for a in node.args[1:]]
+            if func.id == "len" and not rest:
+                return _method(ast.Attribute(value=value, attr="str", ctx=ast.Load()), "len"), True
+            # str() is left alone: str(nan) is "nan", astype(str) keeps NaN missing.
+            if func.id == "float" and not rest:
+                return _method(value, "astype", ast.Name(id=func.id, ctx=ast.Load())), True
+            if func.id == "abs" and not rest:
+                return _method(value, "abs"), True
+            if func.id == "round" and len(rest) <= 1:
+                return _method(value, "round", *rest), True
+        raise _Skip
+
+
+def _rename(node, name):
+    return _method(node, "rename", name)
+
+
+def _rewrite_lambda_call(node):
+    # series.apply/map(lambda v: ...) and frame.apply(lambda r: ..., axis=1).
+    func = node.func
+    if not (isinstance(func, ast.Attribute) and func.attr in ("apply", "map")):
+        return None
+    if len(node.args) != 1 or not isinstance(node.args[0], ast.Lambda) or not _pure(func.value):
+        return None
+    params = node.args[0].args
+    if (len(params.args) != 1 or params.posonlyargs or params.vararg or params.kwonlyargs
+            or params.kwarg or params.defaults):
+        return None
+    var = params.args[0].arg
+    body = node.args[0].body
+    keywords = {k.arg: k.value for k in node.keywords}
+    if func.attr == "apply" and set(keywords) == {"axis"}:
+        axis = keywords["axis"]
+        if not (isinstance(axis, ast.Constant) and axis.value in (1, "columns")):
+            return None
+        out = _Vectorizer(row=var, frame=func.value).series(body)
+        return _rename(out, ast.Constant(None)), "apply(axis=1) lambda"
+    if keywords:
+        return None
+    out = _Vectorizer(values={var: func.value}).series(body)
+    return _rename(out, ast.Attribute(value=copy.deepcopy(func.value), attr="name", ctx=ast.Load())), f"{func.attr} lambda"
+
+
+def _iteration(target, iterable):
+    # _Vectorizer for a loop/comprehension target over a column, several
+    # zipped columns, or the rows of a frame; None when not recognised.
+    if isinstance(target, ast.Name):
+        source = iterable
+        if isinstance(source, ast.Call) and not source.args and not source.keywords \
+                and isinstance(source.func, ast.Attribute) and source.func.attr in ("tolist", "to_list"):
+            source = source.func.value
+        elif isinstance(source, ast.Attribute) and source.attr == "values":
+            source = source.value
+        if _pure(source):
+            return _Vectorizer(values={target.id: source})
+        if isinstance(source, ast.Call) and isinstance(source.func, ast.Attribute) \
+                and source.func.attr == "itertuples" and not source.args and not source.keywords \
+                and _pure(source.func.value):
+            return _Vectorizer(row=target.id, frame=source.func.value, row_subscripts=False)
+        return None
+    if not (isinstance(target, ast.Tuple) and all(isinstance(t, ast.Name) for t in target.elts)):
+        return None
+    if not (isinstance(iterable, ast.Call) and not iterable.keywords):
+        return None
+    func = iterable.func
+    if isinstance(func, ast.Name) and func.id == "zip" and len(iterable.args) == len(target.elts) \
+            and all(_pure(a) for a in iterable.args):
+        return _Vectorizer(values={t.id: a for t, a in zip(target.elts, iterable.args)})
+    if isinstance(func, ast.Attribute) and func.attr == "iterrows" and not iterable.args \
+            and len(target.elts) == 2 and _pure(func.value):
+        vectorizer = _Vectorizer(row=target.elts[1].id, frame=func.value)
+        vectorizer.names.add(target.elts[0].id)  # the index label is not translated
+        return vectorizer
+    return None
+
+
+def _rewrite_comprehension(elt, target, iterable, conditions):
+    vectorizer = _iteration(target, iterable)
+    if vectorizer is None or not all(_is_boolean(c) for c in conditions):
+        return None
+    out = vectorizer.series(elt)
+    if conditions:
+        mask = vectorizer.series(conditions[0])
+        for condition in conditions[1:]:
+            mask = ast.BinOp(left=mask, op=ast.BitAnd(), right=vectorizer.series(condition))
+        out = ast.Subscript(value=out, slice=mask, ctx=ast.Load())
+    return _method(out, "tolist")
+
+
+def _target_names(target):
+    return {n.id for n in ast.walk(target) if isinstance(n, ast.Name)}
+
+
+def _free_loads(node, name):
+    # Loads of name outside loops, comprehensions and lambdas that bind it.
+    if isinstance(node, ast.Name):
+        return int(node.id == name and isinstance(node.ctx, ast.Load))
+    if isinstance(node, ast.For) and name in _target_names(node.target):
+        return _free_loads(node.iter, name) + sum(_free_loads(s, name) for s in node.orelse)
+    if isinstance(node, (ast.ListComp, ast.SetComp, ast.GeneratorExp, ast.DictComp)) \
+            and any(name in _target_names(g.target) for g in node.generators):
+        return _free_loads(node.generators[0].iter, name)
+    if isinstance(node, ast.Lambda) and name in {a.arg for a in node.args.args}:
+        return 0
+    return sum(_free_loads(child, name) for child in ast.iter_child_nodes(node))
+
+
+def _append_loop(assign, loop):
+    # (list name, element, conditions) for "out = []" + a for loop whose body
+    # only appends to out (optionally under one if), else None.
+    if not (isinstance(assign, ast.Assign) and len(assign.targets) == 1
+            and isinstance(assign.targets[0], ast.Name)):
+        return None
+    empty = (isinstance(assign.value, ast.List) and not assign.value.elts) or (
+        isinstance(assign.value, ast.Call) and _is_name(assign.value.func, "list") and not assign.value.args)
+    if not empty or not isinstance(loop, ast.For) or loop.orelse or len(loop.body) != 1:
+        return None
+    out = assign.targets[0].id
+    stmt, conditions = loop.body[0], []
+    if isinstance(stmt, ast.If) and not stmt.orelse and len(stmt.body) == 1:
+        conditions, stmt = [stmt.test], stmt.body[0]
+    if not (isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Call)
+            and isinstance(stmt.value.func, ast.Attribute) and stmt.value.func.attr == "append"
+            and _is_name(stmt.value.func.value, out) and len(stmt.value.args) == 1
+            and not stmt.value.keywords):
+        return None
+    element = stmt.value.args[0]
+    if any(_is_name(n, out) for part in [element, *conditions] for n in ast.walk(part)):
+        return None
+    return out, element, conditions
+
+
+class _Rewriter(ast.NodeTransformer):
+
+    def __init__(self, tree):
+        self.tree = tree
+        self.applied = []
+
+    def visit_Call(self, node):
+        self.generic_visit(node)
+        try:
+            result = _rewrite_lambda_call(node)
+        except _Skip:
+            return node
+        if result is None:
+            return node
+        self.applied.append(result[1])
+        return result[0]
+
+    def visit_ListComp(self, node):
+        self.generic_visit(node)
+        if len(node.generators) != 1 or node.generators[0].is_async:
+            return node
+        gen = node.generators[0]
+        try:
+            out = _rewrite_comprehension(node.elt, gen.target, gen.iter, gen.ifs)
+        except _Skip:
+            return node
+        if out is None:
+            return node
+        self.applied.append("list comprehension")
+        return out
+
+    def generic_visit(self, node):
+        super().generic_visit(node)
+        for field in ("body", "orelse", "finalbody"):
+            block = getattr(node, field, None)
+            if isinstance(block, list) and block and isinstance(block[0], ast.stmt):
+                setattr(node, field, self.rewrite_block(block))
+        return node
+
+    def rewrite_block(self, block):
+        out_block = []
+        i = 0
+        while i < len(block):
+            stmt = block[i]
+            if i + 1 < len(block):
+                replaced = self.rewrite_append_loop(stmt, block[i + 1])
+                if replaced is not None:
+                    out_block.append(replaced)
+                    i += 2
+                    continue
+            out_block.append(stmt)
+            i += 1
+        return out_block
+
+    def rewrite_append_loop(self, assign, loop):
+        found = _append_loop(assign, loop)
+        if found is None:
+            return None
+        # The loop variable must not be read after the loop.
+        if any(_free_loads(self.tree, name) for name in _target_names(loop.target)):
+            return None
+        out, element, conditions = found
+        try:
+            value = _rewrite_comprehension(element, loop.target, loop.iter, conditions)
+        except _Skip:
+            return None
+        if value is None:
+            return None
+        self.applied.append("append loop")
+        return ast.copy_location(ast.Assign(targets=[ast.Name(id=out, ctx=ast.Store())], value=value), assign)
+
+
+def rewrite(tree):
+    # Returns (tree, [rule, ...]); the tree is modified in place.
+    rewriter = _Rewriter(tree)
+    tree = rewriter.visit(tree)
+    return ast.fix_missing_locations(tree), rewriter.applied
+
+
+# ---------- compile cache ----------
+
+class PreparedCode:
+    __slots__ = ("source", "code", "original", "rewrites", "rewritten_source", "prepare_s",
+                 "use_rewrite", "saved_s", "shadowed", "error")
+
+    def __init__(self, source):
+        self.source = source
+        self.code = None
+        self.original = None
+        self.rewrites = []
+        self.rewritten_source = None
+        self.prepare_s = 0.0
+        self.use_rewrite = False
+        self.saved_s = None  # measured per-run execution time saved by the rewrite
+        self.shadowed = False
+        self.error = None
+
+
+def source_key(source: str):
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+
+def _prepare(source):
+    entry = PreparedCode(source)
+    start = time.perf_counter()
+    try:
+        tree = ast.parse(source, "<generated>")
+    except SyntaxError as e:
+        entry.error = f"syntax error: {e.msg} (line {e.lineno})"
+        return entry
+    try:
+        check(tree)
+    except CodeRejected as e:
+        entry.error = str(e)
+        return entry
+    entry.original = compile(tree, "<generated>", "exec")
+    entry.code = entry.original
+    if CODE_REWRITE:
+        tree, entry.rewrites = rewrite(tree)
+        if entry.rewrites:
+            entry.rewritten_source = ast.unparse(tree)
+            entry.code = compile(tree, "<generated:vectorized>", "exec")
+            entry.use_rewrite = True
+    entry.prepare_s = time.perf_counter() - start
+    return entry
+
+
+def prepare(source: str):
+    # Cached PreparedCode for source; raises CodeRejected.
+    key = source_key(source)
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is not None:
+            _cache.move_to_end(key)
+    if entry is not None:
+        _count("cache_hits")
+        with _stats_lock:
+            TIME_SAVED["compile_s"] += entry.prepare_s
+    else:
+        entry = _prepare(source)
+        with _cache_lock:
+            _cache[key] = entry
+            while len(_cache) > CODE_CACHE_SIZE:
+                _cache.popitem(last=False)
+        if entry.error is None:
+            _count("compiled")
+            if entry.rewrites:
+                _count("rewritten")
+                with _stats_lock:
+                    REWRITE_COUNTS.update(entry.rewrites)
+                print(f"[LOG] Vectorized generated code ({', '.join(entry.rewrites)}):\n{entry.rewritten_source}")
+    if entry.error is not None:
+        _count("rejected")
+        raise CodeRejected(entry.error)
+    return entry
+
+
+def same_result(a, b):
+    if isinstance(a, pd.DataFrame) and isinstance(b, pd.DataFrame):
+        check_fn = pd.testing.assert_frame_equal
+    elif isinstance(a, pd.Series) and isinstance(b, pd.Series):
+        check_fn = pd.testing.assert_series_equal
+    elif isinstance(a, (pd.DataFrame, pd.Series)) or isinstance(b, (pd.DataFrame, pd.Series)):
+        return False
+    else:
+        try:
+            return bool(a == b) or (pd.isna(a) and pd.isna(b))
+        except (TypeError, ValueError):
+            return False
+    try:
+        check_fn(a, b, check_dtype=False, check_index_type=False, check_exact=False)
+    except (AssertionError, TypeError, ValueError):
+        return False
+    return True
+
+
+def _timed_exec(code, namespace):
+    start = time.perf_counter()
+    exec(code, namespace)
+    return time.perf_counter() - start
+
+
+def run(source: str, namespace_factory):
+    # Execute generated code in namespace_factory() and return the namespace.
+    # Raises CodeRejected before running anything the checks refuse.
+    entry = prepare(source)
+    if not entry.use_rewrite:
+        ns = namespace_factory()
+        exec(entry.original, ns)
+        return ns
+
+    ns = namespace_factory()
+    try:
+        elapsed = _timed_exec(entry.code, ns)
+    except Exception as e:
+        print(f"[LOG] Vectorized code failed ({type(e).__name__}: {e}); running the original.")
+        entry.use_rewrite = False
+        _count("fallbacks")
+        ns = namespace_factory()
+        exec(entry.original, ns)
+        return ns
+
+    if entry.saved_s:
+        with _stats_lock:
+            TIME_SAVED["exec_s"] += entry.saved_s
+    if entry.saved_s is None and not entry.shadowed and random.random() < CODE_GUARD_SHADOW_RATE:
+        entry.shadowed = True
+        thread = threading.Thread(target=_shadow, args=(entry, ns.get("result_df"), elapsed, namespace_factory),
+                                  daemon=True)
+        thread.start()
+        _shadow_threads.append(thread)
+    return ns
+
+
+def _shadow(entry, result, elapsed, namespace_factory):
+    # Runs the original next to an already-answered rewrite. A mismatch cannot
+    # change that answer any more; it switches later runs back to the original.
+    original_ns = namespace_factory()
+    try:
+        original_s = _timed_exec(entry.original, original_ns)
+    except Exception as e:
+        # The row-wise original fails (e.g. on missing values) where the
+        # column version does not; keep the working rewrite.
+        print(f"[LOG] Original generated code fails ({type(e).__name__}); keeping the vectorized code.")
+        entry.saved_s = 0.0
+        return
+    if not same_result(result, original_ns.get("result_df")):
+        print("[LOG] Vectorized code changed the result; using the original from now on.")
+        entry.use_rewrite = False
+        _count("mismatches")
+        return
+    entry.saved_s = original_s - elapsed
+    with _stats_lock:
+        TIME_SAVED["measured"] += 1
+        TIME_SAVED["exec_s"] += entry.saved_s
+    print(f"[LOG] Vectorized code: {elapsed:.3f}s vs {original_s:.3f}s row-wise.")
+
+
+def wait_for_shadows(timeout: float = None):
+    for thread in list(_shadow_threads):
+        thread.join(timeout)
+    _shadow_threads[:] = [t for t in _shadow_threads if t.is_alive()]
+
+
+def print_code_stats():
+    wait_for_shadows(timeout=5)
+    s = CODE_GUARD_STATS
+    if not any(s.values()):
+        return
+    print(f"[STATS] Code guard: compiled={s['compiled']} cache_hits={s['cache_hits']} "
+          f"rejected={s['rejected']} rewritten={s['rewritten']} fallbacks={s['fallbacks']} "
+          f"mismatches={s['mismatches']}")
+    if REWRITE_COUNTS:
+        print("[STATS]   rewrites: " + ", ".join(f"{rule}={n}" for rule, n in REWRITE_COUNTS.most_common()))
+    measured = f"{TIME_SAVED['exec_s']:.3f}s" if TIME_SAVED["measured"] else "not measured (CODE_GUARD_SHADOW_RATE=0)"
+    print(f"[STATS]   time saved: execution {measured}, parse/compile {TIME_SAVED['compile_s'] * 1000:.1f} ms")
+
+
+# ========= BENCHMARK ========= #
+# Typical row-wise snippets run as written and as rewritten on a synthetic df.
+
+SAMPLES = {
+    "days since stage change": """
+ref = pd.Timestamp("2026-01-01")
+df["days_in_stage"] = df.apply(lambda r: (ref - r["stage_changed_date"]).days, axis=1)
+result_df = df.groupby("current_stage")["days_in_stage"].mean().reset_index()
+""",
+    "high scorers in interview": """
+result_df = df[df.apply(lambda r: r["screening_score"] > 70 and r["current_stage"] == "Interview", axis=1)]
+""",
+    "python skill flag": """
+df["knows_python"] = df["candidate_skills"].apply(lambda s: "Python" in s)
+result_df = df.groupby("requirement_department")["knows_python"].mean().reset_index()
+""",
+    "top screening scores (loop)": """
+names = []
+for _, row in df.iterrows():
+    if row["screening_score"] >= 90:
+        names.append(row["candidate_full_name"])
+result_df = pd.DataFrame({"candidate_full_name": names})
+""",
+    "offer ratio (zip)": """
+counts = df[["total_offers", "total_interviews"]].fillna(0)
+df["offer_ratio"] = [o / i if i > 0 else 0 for o, i in zip(counts["total_offers"], counts["total_interviews"])]
+result_df = df[["application_id", "offer_ratio"]].head(50)
+""",
+    "department upper-case (map)": """
+result_df = df["requirement_department"].map(lambda d: d.upper()).value_counts().reset_index()
+""",
+    "stage counts (no rewrite)": """
+result_df = df.groupby("current_stage").size().reset_index(name="applications")
+""",
+}
+
+
+def _median_time(code, make_ns, repeats):
+    times = []
+    result = None
+    for _ in range(repeats):
+        ns = make_ns()
+        times.append(_timed_exec(code, ns))
+        result = ns.get("result_df")
+    return sorted(times)[len(times) // 2], result
+
+
+def benchmark(applications: int = 20_000, repeats: int = 3):
+    import hr_data
+    import synthetic_data
+
+    data = synthetic_data.generate(applications)
+    for name, _, builder in hr_data.ARTIFACTS:
+        data[name] = builder(data)
+    df = data["df"]
+    make_ns = lambda: {"df": df.copy(deep=False), "pd": pd}
+
+    print(f"\n{applications:,} applications, median of {repeats}")
+    print(f"{'sample':32} {'rewrites':28} {'row-wise s':>11} {'vectorized s':>13} {'speedup':>8}  same")
+    for label, source in SAMPLES.items():
+        start = time.perf_counter()
+        entry = prepare(source)
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        prepare(source)
+        warm = time.perf_counter() - start
+        original_s, original = _median_time(entry.original, make_ns, repeats)
+        if entry.rewrites:
+            rewritten_s, rewritten = _median_time(entry.code, make_ns, repeats)
+            same = "yes" if same_result(rewritten, original) else "NO"
+            speedup = f"{original_s / max(rewritten_s, 1e-9):7.1f}x"
+        else:
+            rewritten_s, same, speedup = original_s, "-", "-"
+        print(f"{label[:32]:32} {', '.join(entry.rewrites)[:28] or '-':28} {original_s:11.4f} "
+              f"{rewritten_s:13.4f} {speedup:>8}  {same}   (prepare {cold * 1000:.2f} ms, cached {warm * 1e6:.1f} us)")
+
+
+if __name__ == "__main__":
+    benchmark(int(float(sys.argv[1])) if len(sys.argv) > 1 else 20_000)
@@ -0,0 +1,176 @@
+import re
+
+import pandas as pd
+
+import hr_data
+
+# ========= COLUMN STATISTICS ========= #
+# Computed once per snapshot (and again whenever a table reloads): row counts,
+# null rates, distinct counts, ranges and top-k values for every column that
+# DuckDB exposes. Used for compact prompt hints and to check the literals in
+# generated SQL against the values that actually occur.
+
+TOP_K = 10
+ENUM_MAX_DISTINCT = 25   # columns with at most this many values are listed in full
+
+PROFILE_STATS = {"queries_checked": 0, "literals_fixed": 0, "unknown_literals": 0}
+
+
+def profile_table(table: pd.DataFrame):
+    rows = len(table)
+    nulls = table.isna().mean() if rows else pd.Series(0.0, index=table.columns)
+    distinct = table.nunique(dropna=True)
+    columns = {}
+    for col in table.columns:
+        series = table[col]
+        info = {
+            "dtype": str(series.dtype),
+            "null_rate": float(nulls[col]),
+            "distinct": int(distinct[col]),
+        }
+        if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_datetime64_any_dtype(series):
+            non_null = series.dropna()
+            if len(non_null):
+                info["min"] = non_null.min()
+                info["max"] = non_null.max()
+        if series.dtype == object or isinstance(series.dtype, pd.StringDtype) or info["distinct"] <= ENUM_MAX_DISTINCT:
+            counts = series.value_counts(dropna=True)
+            info["top_values"] = [(v, int(c)) for v, c in counts.head(TOP_K).items()]
+            if info["distinct"] <= ENUM_MAX_DISTINCT:
+                info["values"] = set(counts.index)
+        columns[col] = info
+    return {"rows": rows, "columns": columns}
+
+
+def build_column_stats(data):
+    print("[LOG] Profiling columns...")
+    stats = {}
+    for name, sql_name in hr_data.SQL_TABLE_NAMES.items():
+        stats[sql_name] = profile_table(data[name])
+    for name, sql_name in hr_data.EXTRA_SQL_TABLES.items():
+        if name in data:
+            stats[sql_name] = profile_table(data[name])
+    return stats
+
+
+def _fmt(value):
+    if isinstance(value, pd.Timestamp):
+        return value.strftime("%Y-%m-%d")
+    if isinstance(value, float):
+        return f"{value:g}"
+    return str(value)
+
+
+def _column_hint(col, info, rows):
+    if col.endswith("_id") or info["dtype"] == "bool":
+        return None
+    is_date = info["dtype"].startswith("datetime")
+    is_number = "min" in info and not is_date
+    if "values" in info and not is_date and (not is_number or info["distinct"] <= 10):
+        values = sorted(info["values"], key=str)
+        return "values {" + ", ".join(_fmt(v) for v in values) + "}"
+    if "min" in info:
+        return f"range {_fmt(info['min'])}..{_fmt(info['max'])}"
+    # Free text / near-unique columns (names, emails) get no examples.
+    if info.get("top_values") and info["distinct"] <= 50 and info["distinct"] < 0.9 * rows:
+        top = ", ".join(_fmt(v)[:30] for v, _ in info["top_values"][:5])
+        return f"{info['distinct']} distinct, e.g. {top}"
+    return None
+
+
+def build_schema_hints(data):
+    stats = data["column_stats"]
+    lines = ["Column statistics (use these exact literal values; string matches are case-sensitive):"]
+    for table, tstats in stats.items():
+        lines.append(f"- {table}:")
+        for col, info in tstats["columns"].items():
+            parts = []
+            hint = _column_hint(col, info, tstats["rows"])
+            if hint:
+                parts.append(hint)
+            if info["null_rate"] >= 0.2:
+                parts.append(f"{info['null_rate']:.0%} null")
+            if parts:
+                lines.append(f"    {col}: {'; '.join(parts)}")
+    # Row counts change with every load; keeping them last leaves the lines
+    # above byte-identical (and prompt-cacheable) across most refreshes.
+    lines.append("Rows: " + ", ".join(f"{table}={tstats['rows']}" for table, tstats in stats.items()))
+    return "\n".join(lines)
+
+
+def enable():
+    # Must run after the other enable() calls so their tables are profiled too.
+    deps = list(hr_data.TABLE_FILES) + list(hr_data.EXTRA_SQL_TABLES)
+    hr_data.register_artifact("column_stats", deps, build_column_stats)
+    hr_data.register_artifact("schema_hints", ["column_stats"], build_schema_hints)
+
+
+# ========= LITERAL VALIDATION ========= #
+
+_IDENT = r'(?:"[^"]+"|[A-Za-z_][A-Za-z0-9_]*)'
+_LITERAL = r"'(?:[^']|'')*'"
+_CMP_RE = re.compile(
+    rf"(?P<col>(?:{_IDENT}\.)?{_IDENT})\s*(?P<op>=|<>|!=)\s*(?P<lit>{_LITERAL})"
+)
+_IN_RE = re.compile(
+    rf"(?P<col>(?:{_IDENT}\.)?{_IDENT})\s+(?:NOT\s+)?IN\s*\((?P<lits>\s*{_LITERAL}(?:\s*,\s*{_LITERAL})*\s*)\)",
+    re.IGNORECASE,
+)
+
+
+def _column_values(stats, column):
+    # Known values for an (unqualified) column name across all tables.
+    values = set()
+    found = False
+    for tstats in stats.values():
+        info = tstats["columns"].get(column)
+        # Only text columns: numeric and date literals are compared by value.
+        if info is not None and "values" in info and "min" not in info:
+            found = True
+            values.update(str(v) for v in info["values"])
+    return values if found else None
+
+
+def _canonical(literal, values):
+    if literal in values:
+        return literal
+    key = " ".join(literal.lower().split())
+    matches = [v for v in values if " ".join(v.lower().split()) == key]
+    return matches[0] if len(matches) == 1 else None
+
+
+def validate_literals(sql: str, stats):
+    # Returns (sql, fixes, warnings). Literals that differ from a known value
+    # only by case/whitespace are rewritten; unknown ones are reported.
+    PROFILE_STATS["queries_checked"] += 1
+    fixes = []
+    warnings = []
+
+    def check(column, literal):
+        col = column.split(".")[-1].strip('"')
+        values = _column_values(stats, col)
+        if values is None:
+            return literal
+        raw = literal[1:-1].replace("''", "'")
+        canonical = _canonical(raw, values)
+        if canonical is None:
+            warnings.append(f"{col} = '{raw}' matches no value in the data")
+            PROFILE_STATS["unknown_literals"] += 1
+            return literal
+        if canonical != raw:
+            fixes.append(f"{col}: '{raw}' -> '{canonical}'")
+            PROFILE_STATS["literals_fixed"] += 1
+            return "'" + canonical.replace("'", "''") + "'"
+        return literal
+
+    def fix_cmp(m):
+        return f"{m.group('col')} {m.group('op')} {check(m.group('col'), m.group('lit'))}"
+
+    def fix_in(m):
+        lits = re.findall(_LITERAL, m.group("lits"))
+        fixed = ", ".join(check(m.group("col"), lit) for lit in lits)
+        return m.group(0).replace(m.group("lits"), fixed)
+
+    sql = _CMP_RE.sub(fix_cmp, sql)
+    sql = _IN_RE.sub(fix_in, sql)
+    return sql, fixes, warnings
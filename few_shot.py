@@ -0,0 +1,156 @@
+import json
+import math
+import os
+import re
+import sys
+import threading
+from collections import Counter
+
+# ========= FEW-SHOT EXAMPLE STORE ========= #
+# Verified question -> SQL pairs kept in a local JSONL file, searched with an
+# in-process BM25 index so no network or embedding service is needed.
+
+FEW_SHOT_PATH = os.getenv(
+    "FEW_SHOT_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "few_shot_examples.jsonl"),
+)
+# Pairs confirmed at runtime are appended here, never to the tracked seed file.
+FEW_SHOT_RECORD_PATH = os.getenv(
+    "FEW_SHOT_RECORD_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "few_shot_recorded.jsonl"),
+)
+
+_TOKEN_RE = re.compile(r"[a-z0-9_]+")
+
+# Words that carry no signal for matching analytics questions.
+_STOPWORDS = {
+    "a", "an", "the", "of", "in", "on", "for", "to", "by", "and", "or", "with",
+    "is", "are", "was", "were", "be", "what", "which", "who", "how", "many",
+    "much", "show", "me", "list", "give", "get", "find", "all", "each", "per",
+    "from", "at", "as", "do", "does", "did", "have", "has", "that", "this",
+    "please", "can", "you", "i", "we", "our", "table", "tables", "field", "fields",
+}
+
+
+def tokenize(text: str):
+    # Column names are kept whole and also split on "_" so that
+    # "department" matches "requirement_department".
+    tokens = []
+    for t in _TOKEN_RE.findall(text.lower()):
+        parts = [p for p in t.split("_") if p]
+        if len(parts) > 1:
+            tokens.append(t)
+        tokens.extend(parts)
+    return [t for t in tokens if t not in _STOPWORDS]
+
+
+def _normalize(text: str):
+    return " ".join(_TOKEN_RE.findall(text.lower()))
+
+
+class FewShotStore:
+    def __init__(self, path=FEW_SHOT_PATH, record_path=FEW_SHOT_RECORD_PATH, k1=1.5, b=0.75):
+        # path is the read-only seed set; add() appends to record_path.
+        self.path = path
+        self.record_path = record_path
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self.examples = []
+        self._seen = set()
+        for source in (path, record_path):
+            self._load(source)
+        self._rebuild()
+
+    def _load(self, path):
+        if not path or not os.path.exists(path):
+            return
+        with open(path, encoding="utf-8") as fh:
+            for line in fh:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    ex = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if ex.get("question") and ex.get("sql"):
+                    self._append(ex)
+
+    def _append(self, ex):
+        key = _normalize(ex["question"])
+        if key in self._seen:
+            return False
+        self._seen.add(key)
+        self.examples.append(ex)
+        return True
+
+    def _rebuild(self):
+        self._docs = [Counter(tokenize(ex["question"])) for ex in self.examples]
+        self._doc_len = [sum(d.values()) for d in self._docs]
+        self._avg_len = (sum(self._doc_len) / len(self._docs)) if self._docs else 0.0
+        df = Counter()
+        for d in self._docs:
+            df.update(d.keys())
+        n = len(self._docs)
+        self._idf = {t: math.log(1 + (n - c + 0.5) / (c + 0.5)) for t, c in df.items()}
+
+    def add(self, question: str, sql: str):
+        # Only call with pairs a user or curator has confirmed as correct.
+        ex = {"question": question.strip(), "sql": sql.strip()}
+        with self._lock:
+            if not self._append(ex):
+                return False
+            with open(self.record_path, "a", encoding="utf-8") as fh:
+                fh.write(json.dumps(ex) + "\n")
+            self._rebuild()
+        return True
+
+    def search(self, question: str, k: int = 3, min_score: float = 0.5):
+        terms = set(tokenize(question))
+        if not terms or not self._docs:
+            return []
+        scored = []
+        for i, doc in enumerate(self._docs):
+            score = 0.0
+            norm = self.k1 * (1 - self.b + self.b * self._doc_len[i] / (self._avg_len or 1))
+            for t in terms:
+                tf = doc.get(t)
+                if tf:
+                    score += self._idf[t] * tf * (self.k1 + 1) / (tf + norm)
+            if score >= min_score:
+                scored.append((score, i))
+        scored.sort(reverse=True)
+        return [self.examples[i] for _, i in scored[:k]]
+
+
+def record_confirmed(store, spec, result_df, reply: str):
+    # Store a generated pair only when the query returned rows and the user
+    # explicitly confirmed the answer. Templates (with "params") and specs the
+    # guard stopped (no "question" set) never reach the store.
+    if result_df is None or result_df.empty:
+        return False
+    if "params" in spec or not spec.get("question") or not spec.get("sql"):
+        return False
+    if reply.strip().lower() not in {"y", "yes"}:
+        return False
+    return store.add(spec["question"], spec["sql"])
+
+
+def format_examples(examples):
+    if not examples:
+        return ""
+    parts = ["Examples of previously verified questions and their SQL:"]
+    for ex in examples:
+        parts.append(f"Question: {ex['question']}\nSQL: {ex['sql']}")
+    return "\n\n".join(parts)
+
+
+if __name__ == "__main__":
+    # Curator entry point: python few_shot.py add "<question>" "<reviewed SQL>"
+    if len(sys.argv) == 4 and sys.argv[1] == "add":
+        store = FewShotStore()
+        added = store.add(sys.argv[2], sys.argv[3])
+        print(f"Added to {store.record_path}." if added else "A pair for this question already exists.")
+    else:
+        print('usage: python few_shot.py add "<question>" "<sql>"')
@@ -0,0 +1,488 @@
+import importlib.util
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import pandas as pd
+
+try:
+    import resource  # POSIX only; fallback for per-file peak memory
+except ImportError:
+    resource = None
+
+# ========= DATA SNAPSHOTS ========= #
+# All tables and everything derived from them live in one immutable snapshot
+# dict. Refreshes build a new snapshot (reusing untouched objects) and swap
+# the module-level reference in one assignment, so a query that grabbed the
+# old snapshot keeps a consistent view until it finishes.
+
+DATA_DIR = os.getenv("HR_DATA_DIR", r"C:\Users\aisiq\OneDrive\Desktop\Recruitment_Data_Analysis")
+
+TABLE_FILES = {
+    "application": "Application_Table_100.xlsx",
+    "candidate": "Candidate_Table_100.xlsx",
+    "interview": "Interview_Table_100.xlsx",
+    "offer": "Offer_Table_100.xlsx",
+    "recruiter": "Recruiter_Table_100.xlsx",
+    "requirement": "Requirement_Table_100.xlsx",
+}
+
+# Names the tables are exposed under in DuckDB.
+SQL_TABLE_NAMES = {
+    "application": "application_table_100",
+    "candidate": "candidate_table_100",
+    "interview": "interview_table_100",
+    "offer": "offer_table_100",
+    "recruiter": "recruiter_table_100",
+    "requirement": "Recruitement_table_100",
+}
+
+# Derived artifacts that are also exposed to DuckDB: artifact name -> SQL name.
+EXTRA_SQL_TABLES = {}
+
+# Columns read from each workbook (anything else in the sheet is skipped) and
+# the dtype each is converted to; None keeps the reader's type (text), and
+# *_date columns are handled by parse_date_columns. Plain numpy dtypes keep
+# Arrow snapshots zero-copy when mapped (arrow_snapshot.map_frame); an int64
+# column that has blanks becomes nullable Int64 instead, so join keys stay
+# integral, and float64 holds blanks as NaN.
+TABLE_COLUMNS = {
+    "application": {
+        "application_id": "int64", "candidate_id": "int64", "requirement_id": "int64",
+        "screened_by_recruiter_id": "int64", "current_stage": None, "stage_changed_date": None,
+        "screening_score": "float64", "status": None,
+    },
+    "candidate": {
+        "candidate_id": "int64", "candidate_full_name": None, "candidate_email": None,
+        "candidate_phone": None, "candidate_skills": None, "candidate_experience_years": "float64",
+        "candidate_source_of_hire": None, "candidate_application_date": None,
+        "candidate_gender": None, "candidate_location": None,
+    },
+    "interview": {
+        "interview_id": "int64", "application_id": "int64", "interview_date": None,
+        "interview_round": "int64", "interviewer_id": "int64", "interview_status": None,
+        "interview_completed_date": None,
+    },
+    "offer": {
+        "offer_id": "int64", "offer_candidate_id": "int64", "offer_date": None, "offer_status": None,
+        "offer_acceptance_date": None, "Candidate_start_date": None, "Candidate_actual_start_date": None,
+    },
+    "recruiter": {
+        "recruiter_id": "int64", "recruiter_Name": None, "recruiter_Email": None,
+        "recruiter_department": None, "recruiter_status": None,
+    },
+    "requirement": {
+        "requirement_id": "int64", "requirement_job_title": None, "requirement_department": None,
+        "requirement_status": None, "requirement_created_date": None,
+        "requirement_target_fill_date": None, "requirement_filled_date": None,
+    },
+}
+
+# python-calamine (Rust) parses xlsx several times faster than openpyxl;
+# pandas uses it when installed. openpyxl is always opened read-only.
+EXCEL_ENGINE = os.getenv(
+    "HR_EXCEL_ENGINE", "calamine" if importlib.util.find_spec("python_calamine") else "openpyxl"
+)
+# Workbooks parsed in parallel on a cold load. Workers are forked, so platforms
+# without fork (Windows) load sequentially: spawned workers would re-run the
+# setup code of script-style entry points like main.py and app.py.
+LOAD_WORKERS = int(os.getenv(
+    "HR_LOAD_WORKERS",
+    min(len(TABLE_FILES), os.cpu_count() or 1) if "fork" in multiprocessing.get_all_start_methods() else 1,
+))
+
+
+def parse_date_columns(table: pd.DataFrame):
+    # Date columns arrive as Excel dates or strings depending on the extract;
+    # parse them once here so everything downstream sees datetime64 columns.
+    for col in table.columns:
+        if col.lower().endswith("_date") and not pd.api.types.is_datetime64_any_dtype(table[col]):
+            table[col] = pd.to_datetime(table[col], errors="coerce")
+    return table
+
+
+def apply_dtypes(table: pd.DataFrame, dtypes):
+    for col, dtype in dtypes.items():
+        if dtype is None or col not in table.columns:
+            continue
+        if dtype == "int64" and table[col].isna().any():
+            dtype = "Int64"
+        try:
+            table[col] = table[col].astype(dtype)
+        except (TypeError, ValueError) as e:
+            print(f"[LOG] Keeping {col} as {table[col].dtype} (not {dtype}): {e}")
+    return table
+
+
+def load_table(name: str, data_dir: str = DATA_DIR):
+    columns = TABLE_COLUMNS.get(name)
+    table = pd.read_excel(
+        os.path.join(data_dir, TABLE_FILES[name]),
+        engine=EXCEL_ENGINE,
+        usecols=(lambda col: col in columns) if columns else None,
+    )
+    return parse_date_columns(apply_dtypes(table, columns or {}))
+
+
+def _proc_status_mb(field):
+    try:
+        with open("/proc/self/status") as fh:
+            for line in fh:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _memory_mark():
+    # (current RSS, reset peak?) before a load. On Linux the peak (VmHWM) is
+    # reset so it covers this file only; elsewhere ru_maxrss is used, which
+    # is per file only in a fresh worker process.
+    try:
+        with open("/proc/self/clear_refs", "w") as fh:
+            fh.write("5")
+        return _proc_status_mb("VmRSS")
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024  # bytes on macOS, kB elsewhere
+
+
+def _peak_since(mark):
+    if mark is None:
+        return None
+    peak = _proc_status_mb("VmHWM")
+    if peak is None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak = peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    return max(peak - mark, 0.0)
+
+
+def _timed_load(name: str, data_dir: str):
+    # (table, seconds, peak memory growth in MB or None) for one workbook.
+    mark = _memory_mark()
+    start = time.perf_counter()
+    table = load_table(name, data_dir)
+    elapsed = time.perf_counter() - start
+    return table, elapsed, _peak_since(mark)
+
+
+def load_tables(names, data_dir: str = DATA_DIR, workers: int = LOAD_WORKERS):
+    # Returns ({name: table}, {name: (seconds, peak MB)}). With several
+    # workers each workbook is parsed in its own forked process.
+    names = list(names)
+    timings = {}
+    tables = {}
+    if workers > 1 and len(names) > 1:
+        # Import the reader once here so forked workers do not each pay for it.
+        importlib.import_module("python_calamine" if EXCEL_ENGINE == "calamine" else EXCEL_ENGINE)
+        ctx = multiprocessing.get_context("fork")
+        with ctx.Pool(min(workers, len(names)), maxtasksperchild=1) as pool:
+            results = pool.starmap(_timed_load, [(name, data_dir) for name in names])
+        for name, (table, seconds, peak) in zip(names, results):
+            tables[name] = table
+            timings[name] = (seconds, peak)
+    else:
+        for name in names:
+            table, seconds, peak = _timed_load(name, data_dir)
+            tables[name] = table
+            timings[name] = (seconds, peak)
+    for name in names:
+        seconds, peak = timings[name]
+        peak_text = f", peak +{peak:.0f} MB" if peak is not None else ""
+        print(f"[LOG] Parsed {TABLE_FILES[name]} in {seconds:.2f}s ({len(tables[name])} rows{peak_text})")
+    return tables, timings
+
+
+def pid_alive(pid: int):
+    # Whether a process with this pid exists on this machine. Windows has no
+    # cheap equivalent of signal 0, so there every pid counts as alive.
+    if os.name == "nt":
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def file_signature(path: str):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+# ========= DERIVED ARTIFACTS ========= #
+# (name, dependencies, builder) in build order. A builder receives the data
+# dict of the snapshot being built and returns the artifact. Dependencies
+# may be tables or artifacts registered earlier.
+
+ARTIFACTS = []
+
+# Per-application artifacts merged into df on application_id.
+DF_EXTENSIONS = []
+
+
+def register_artifact(name: str, deps, builder):
+    ARTIFACTS.append((name, tuple(deps), builder))
+
+
+def extend_df(name: str, deps, builder):
+    # Register a per-application artifact ahead of df and make df depend on it.
+    position = next(i for i, (n, _, _) in enumerate(ARTIFACTS) if n == "df")
+    ARTIFACTS.insert(position, (name, tuple(deps), builder))
+    _, df_deps, df_builder = ARTIFACTS[position + 1]
+    ARTIFACTS[position + 1] = ("df", df_deps + (name,), df_builder)
+    DF_EXTENSIONS.append(name)
+
+
+def build_interview_agg(data):
+    print("[LOG] Aggregating interviews...")
+    return (
+        data["interview"]
+        .groupby("application_id")
+        .agg(
+            total_interviews=("interview_id", "count"),
+            last_interview_date=("interview_date", "max"),
+        )
+        .reset_index()
+    )
+
+
+def build_offer_agg(data):
+    print("[LOG] Aggregating offers...")
+    offers_with_app = data["offer"].merge(
+        data["application"][["application_id", "candidate_id"]],
+        left_on="offer_candidate_id",
+        right_on="candidate_id",
+        how="left",
+    )
+    return (
+        offers_with_app
+        .groupby("application_id")
+        .agg(
+            total_offers=("offer_id", "count"),
+            last_offer_date=("offer_date", "max"),
+        )
+        .reset_index()
+    )
+
+
+def build_df(data):
+    print("[LOG] Joining base tables with interviews and offers...")
+    df = (
+        data["application"]
+        .merge(data["candidate"], on="candidate_id", how="left")
+        .merge(data["requirement"], on="requirement_id", how="left")
+        .merge(data["recruiter"], left_on="screened_by_recruiter_id", right_on="recruiter_id", how="left")
+        .merge(data["interview_agg"], on="application_id", how="left")
+        .merge(data["offer_agg"], on="application_id", how="left")
+    )
+    for name in DF_EXTENSIONS:
+        extension = data[name]
+        new_cols = ["application_id"] + [c for c in extension.columns if c not in df.columns]
+        df = df.merge(extension[new_cols], on="application_id", how="left")
+    return df
+
+
+def base_df(data):
+    # df without the DF_EXTENSIONS columns: the joined table app.py built for
+    # itself before it mapped the shared snapshot. Column selection is lazy
+    # under copy-on-write, so a mapped df stays shared.
+    df = data["df"]
+    base = set()
+    for name in ("application", "candidate", "requirement", "recruiter", "interview_agg", "offer_agg"):
+        base.update(data[name].columns)
+    return df[[c for c in df.columns if c in base]]
+
+
+register_artifact("interview_agg", ["interview"], build_interview_agg)
+register_artifact("offer_agg", ["offer", "application"], build_offer_agg)
+register_artifact(
+    "df",
+    ["application", "candidate", "requirement", "recruiter", "interview_agg", "offer_agg"],
+    build_df,
+)
+
+
+# ========= SNAPSHOT BUILD / REFRESH ========= #
+
+_snapshot = None
+_refresh_lock = threading.Lock()
+
+
+def _rebuild(data, dirty):
+    # Recompute only artifacts whose inputs changed, in registration order.
+    for name, deps, builder in ARTIFACTS:
+        if name not in data or dirty.intersection(deps):
+            data[name] = builder(data)
+            dirty.add(name)
+    return dirty
+
+
+def build_snapshot(data_dir: str = DATA_DIR, workers: int = LOAD_WORKERS):
+    print(f"[LOG] Loading Excel files into dataframes ({EXCEL_ENGINE}, {workers} worker(s))...")
+    sources = {name: file_signature(os.path.join(data_dir, filename)) for name, filename in TABLE_FILES.items()}
+    data, _ = load_tables(TABLE_FILES, data_dir, workers)
+    _rebuild(data, set(TABLE_FILES))
+    return {"version": 1, "loaded_at": time.time(), "data_dir": data_dir, "sources": sources, "data": data}
+
+
+def refresh_snapshot(snapshot, changed):
+    # New snapshot with `changed` tables reloaded; untouched objects are shared.
+    data = dict(snapshot["data"])
+    sources = dict(snapshot["sources"])
+    for name in changed:
+        print(f"[LOG] Reloading {name} table...")
+        sources[name] = file_signature(os.path.join(snapshot["data_dir"], TABLE_FILES[name]))
+        data[name] = load_table(name, snapshot["data_dir"])
+    rebuilt = _rebuild(data, set(changed)) - set(changed)
+    print(f"[LOG] Rebuilt artifacts: {', '.join(sorted(rebuilt)) or 'none'}")
+    return {
+        "version": snapshot["version"] + 1,
+        "loaded_at": time.time(),
+        "data_dir": snapshot["data_dir"],
+        "sources": sources,
+        "data": data,
+    }
+
+
+def load_snapshot(data_dir: str = DATA_DIR):
+    global _snapshot
+    with _refresh_lock:
+        _snapshot = build_snapshot(data_dir)
+    print("[LOG] Combined dataframe ready. Shape:", _snapshot["data"]["df"].shape)
+    return _snapshot
+
+
+def adopt_snapshot(snapshot):
+    # Install a snapshot built elsewhere (e.g. a mapped shared snapshot),
+    # building any registered artifact it does not carry.
+    global _snapshot
+    _rebuild(snapshot["data"], set())
+    with _refresh_lock:
+        _snapshot = snapshot
+    print("[LOG] Combined dataframe ready. Shape:", _snapshot["data"]["df"].shape)
+    return _snapshot
+
+
+def current_snapshot():
+    return _snapshot
+
+
+def changed_tables(snapshot):
+    changed = []
+    for name, filename in TABLE_FILES.items():
+        sig = file_signature(os.path.join(snapshot["data_dir"], filename))
+        if sig is not None and sig != snapshot["sources"].get(name):
+            changed.append(name)
+    return changed
+
+
+def reload_changed(names=None):
+    # Reloads the changed tables, or only those of `names` that changed.
+    global _snapshot
+    with _refresh_lock:
+        changed = [name for name in changed_tables(_snapshot) if names is None or name in names]
+        if not changed:
+            return []
+        _snapshot = refresh_snapshot(_snapshot, changed)
+    print(f"[LOG] Data snapshot v{_snapshot['version']} active (changed: {', '.join(changed)}).")
+    return changed
+
+
+def register_tables(con, snapshot):
+    # Tables with an entry in the optional "sql_views" artifact are exposed as
+    # views over on-disk storage instead of the in-memory dataframes.
+    views = snapshot["data"].get("sql_views", {})
+    for name, sql_name in SQL_TABLE_NAMES.items():
+        if name in views:
+            con.execute(f'CREATE OR REPLACE VIEW "{sql_name}" AS {views[name]}')
+        else:
+            con.register(sql_name, snapshot["data"][name])
+    for name, sql_name in EXTRA_SQL_TABLES.items():
+        if name in snapshot["data"]:
+            con.register(sql_name, snapshot["data"][name])
+
+
+# ========= DATA_DIR WATCHER ========= #
+# Polls file signatures instead of relying on OS notifications, which keeps it
+# dependency-free and works on network/OneDrive folders. A change must be seen
+# on two consecutive polls before reloading so half-written workbooks are skipped.
+
+def stable_changes(snapshot, pending):
+    # Changed tables whose file signature matches the one seen on the previous
+    # poll (`pending`, updated in place). A table still being written keeps
+    # changing signature and waits for a later poll; the others go ahead.
+    stable = []
+    sigs = {}
+    for name in changed_tables(snapshot):
+        sig = file_signature(os.path.join(snapshot["data_dir"], TABLE_FILES[name]))
+        if pending.get(name) == sig:
+            stable.append(name)
+        else:
+            sigs[name] = sig
+    pending.clear()
+    pending.update(sigs)
+    return stable
+
+
+def _watch_loop(interval: float, stop: threading.Event):
+    pending = {}
+    while not stop.wait(interval):
+        snapshot = _snapshot
+        if snapshot is None:
+            continue
+        stable = stable_changes(snapshot, pending)
+        if not stable:
+            continue
+        try:
+            reload_changed(stable)
+        except Exception as e:
+            print(f"[LOG] Data refresh failed, keeping snapshot v{snapshot['version']}: {e}")
+
+
+def start_watcher(interval: float = 2.0):
+    stop = threading.Event()
+    thread = threading.Thread(target=_watch_loop, args=(interval, stop), name="data-watcher", daemon=True)
+    thread.start()
+    print(f"[LOG] Watching {_snapshot['data_dir']} for changes every {interval}s.")
+    return stop
+
+
+# ========= COLD LOAD BENCHMARK ========= #
+
+def benchmark_load(data_dir: str = DATA_DIR, workers: int = None):
+    # Wall time of the previous loader (full pd.read_excel of every column, one
+    # file after another) against the column-pruned loader run sequentially
+    # and in parallel.
+    workers = workers or max(2, LOAD_WORKERS)
+    importlib.import_module("python_calamine" if EXCEL_ENGINE == "calamine" else EXCEL_ENGINE)
+
+    start = time.perf_counter()
+    for filename in TABLE_FILES.values():
+        parse_date_columns(pd.read_excel(os.path.join(data_dir, filename)))
+    legacy = time.perf_counter() - start
+
+    results = {"previous loader (sequential, all columns)": legacy}
+    for label, n in (("pruned + dtypes, sequential", 1), (f"pruned + dtypes, {workers} workers", workers)):
+        start = time.perf_counter()
+        load_tables(TABLE_FILES, data_dir, n)
+        results[label] = time.perf_counter() - start
+
+    print(f"\nengine={EXCEL_ENGINE} cpus={os.cpu_count()}")
+    for label, seconds in results.items():
+        print(f"{label:42} {seconds:8.2f}s  x{legacy / seconds:.2f}")
+
+
+if __name__ == "__main__":
+    benchmark_load(workers=int(sys.argv[1]) if len(sys.argv) > 1 else None)
+
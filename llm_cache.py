@@ -0,0 +1,193 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from types import SimpleNamespace
+
+# ========= LLM RECORD / REPLAY CACHE ========= #
+# Content-addressed store of chat completions keyed by a hash of
+# (model, messages, parameters). Modes:
+# - passthrough: always call the endpoint, never touch the store (default)
+# - record: serve hits from the store, call and store on a miss
+# - replay: serve hits from the store, raise on a miss (fully offline runs)
+
+LLM_CACHE_MODE = os.getenv("LLM_CACHE_MODE", "passthrough")
+LLM_CACHE_PATH = os.getenv(
+    "LLM_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".llm_cache.sqlite"),
+)
+LLM_CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", "256"))
+
+MODES = {"passthrough", "record", "replay"}
+
+CACHE_STATS = {"hits": 0, "misses": 0, "stored": 0, "evicted": 0}
+
+
+class CacheMiss(LookupError):
+    pass
+
+
+def _to_namespace(value):
+    if isinstance(value, dict):
+        return SimpleNamespace(**{k: _to_namespace(v) for k, v in value.items()})
+    return value
+
+
+class LLMCache:
+    def __init__(self, path=LLM_CACHE_PATH, max_bytes=int(LLM_CACHE_MAX_MB * 1024 * 1024)):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        con = self._con()
+        con.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT,
+                content TEXT NOT NULL,
+                usage TEXT,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        con.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses(last_used)")
+
+    def _con(self):
+        # One connection per thread; WAL lets readers run alongside a writer
+        # and busy_timeout serialises concurrent writers across processes.
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            con.execute("PRAGMA busy_timeout=30000")
+            self._local.con = con
+        return con
+
+    def _count(self, name):
+        with self._stats_lock:
+            CACHE_STATS[name] += 1
+
+    @staticmethod
+    def key(model, messages, **params):
+        payload = json.dumps(
+            {"model": model, "messages": messages, "params": params},
+            sort_keys=True,
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        con = self._con()
+        row = con.execute("SELECT content, usage FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        con.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+        content, usage = row
+        return content, json.loads(usage) if usage else None
+
+    def put(self, key, model, content, usage):
+        usage_json = json.dumps(usage) if usage is not None else None
+        size = len(content.encode("utf-8")) + len(usage_json or "")
+        now = time.time()
+        con = self._con()
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            con.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, model, content, usage_json, size, now, now),
+            )
+            self._evict(con)
+            con.execute("COMMIT")
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+        self._count("stored")
+
+    def _evict(self, con):
+        total = con.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Drop least recently used entries until we are back under 90% of the cap.
+        target = int(self.max_bytes * 0.9)
+        for key, size in con.execute("SELECT key, size FROM responses ORDER BY last_used").fetchall():
+            if total <= target:
+                break
+            con.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            self._count("evicted")
+
+    def lookup_or_call(self, mode, model, messages, call, **params):
+        key = self.key(model, messages, **params)
+        hit = self.get(key)
+        if hit is not None:
+            self._count("hits")
+            return hit
+        self._count("misses")
+        if mode == "replay":
+            raise CacheMiss(f"No recorded LLM response for key {key[:12]} (LLM_CACHE_MODE=replay)")
+        content, usage = call()
+        self.put(key, model, content, usage)
+        return content, usage
+
+
+class LazyClient:
+    # Stands in for an SDK client and builds it on first use, so replay runs
+    # (and record runs that only hit the store) never need credentials.
+    def __init__(self, factory):
+        self._factory = factory
+        self._client = None
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        with self._lock:
+            if self._client is None:
+                self._client = self._factory()
+        return getattr(self._client, name)
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def default_cache():
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = LLMCache()
+    return _default_cache
+
+
+def chat(client, model, messages, mode=None, timeout=None, **params):
+    # Run a chat completion through the cache. Returns (content, usage) where
+    # usage supports attribute access like the SDK object (or is None).
+    # timeout is passed to the request but is not part of the cache key.
+    mode = mode or LLM_CACHE_MODE
+    if mode not in MODES:
+        raise ValueError(f"Unknown LLM_CACHE_MODE '{mode}', expected one of {sorted(MODES)}")
+
+    def call():
+        extra = {"timeout": timeout} if timeout is not None else {}
+        resp = client.chat.completions.create(model=model, messages=messages, **params, **extra)
+        usage = resp.usage.model_dump() if resp.usage is not None else None
+        return resp.choices[0].message.content, usage
+
+    if mode == "passthrough":
+        content, usage = call()
+    else:
+        content, usage = default_cache().lookup_or_call(mode, model, messages, call, **params)
+    return content, _to_namespace(usage) if usage is not None else None
+
+
+def print_cache_stats():
+    if LLM_CACHE_MODE == "passthrough":
+        return
+    s = CACHE_STATS
+    print(f"[STATS] LLM cache ({LLM_CACHE_MODE}): hits={s['hits']} misses={s['misses']} "
+          f"stored={s['stored']} evicted={s['evicted']}")
@@ -1,7 +1,24 @@
+import hashlib
 import os
+import threading
+import time
 import pandas as pd
 from openai import AzureOpenAI
 from dotenv import load_dotenv
+import arrow_snapshot
+import column_profile
+import hr_data
+import llm_cache
+import partitioned_store
+import query_templates
+import skills_index
+import table_history
+import timeline
+from few_shot import FewShotStore, format_examples, record_confirmed
+from renderer import render_simple
+from column_profile import PROFILE_STATS, validate_literals
+from sql_guard import QueryRejected, QueryTimeout, guarded_execute, print_guard_stats
+from speculative import SPECULATION_STATS, local_route, print_speculation_stats, run_speculative
 load_dotenv()
 
 # ========= CONFIG & LOGGING ========= #
@@ -10,92 +27,161 @@ AZURE_OPENAI_API_KEY = os.getenv("AZURE_OPENAI_API_KEY")
 AZURE_OPENAI_ENDPOINT = os.getenv("AZURE_OPENAI_ENDPOINT")  # e.g. https://ai-services-...cognitiveservices.azure.com/
 AZURE_OPENAI_MODEL = os.getenv("AZURE_OPENAI_MODEL")        # deployment name for gpt-4o-mini
 AZURE_OPENAI_API_VERSION = os.getenv("AZURE_OPENAI_API_VERSION", "2024-02-15-preview")
+AZURE_OPENAI_FAST_MODEL = os.getenv("AZURE_OPENAI_FAST_MODEL", AZURE_OPENAI_MODEL)  # cheap deployment for gating/routing
+
+
+def _stage_config(stage, model, max_tokens, timeout):
+    # Per-stage deployment and budgets, overridable with e.g.
+    # AZURE_OPENAI_MODEL_SUPERVISOR, LLM_MAX_TOKENS_SUPERVISOR, LLM_TIMEOUT_SUPERVISOR.
+    key = stage.upper()
+    return {
+        "model": os.getenv(f"AZURE_OPENAI_MODEL_{key}", model),
+        "max_tokens": int(os.getenv(f"LLM_MAX_TOKENS_{key}", max_tokens)),
+        "timeout": float(os.getenv(f"LLM_TIMEOUT_{key}", timeout)),
+    }
+
+
+LLM_STAGES = {
+    "conversational": _stage_config("conversational", AZURE_OPENAI_FAST_MODEL, 200, 15),
+    "supervisor": _stage_config("supervisor", AZURE_OPENAI_FAST_MODEL, 400, 20),
+    "specialist": _stage_config("specialist", AZURE_OPENAI_MODEL, 800, 60),
+    "generic": _stage_config("generic", AZURE_OPENAI_MODEL, 700, 60),
+    "final": _stage_config("final", AZURE_OPENAI_MODEL, 700, 60),
+}
 
-DATA_DIR = DATA_DIR = r"C:\Users\aisiq\OneDrive\Desktop\Recruitment_Data_Analysis"
+FEW_SHOT_K = int(os.getenv("FEW_SHOT_K", "3"))                      # 0 disables example retrieval
+FEW_SHOT_CONFIRM = os.getenv("FEW_SHOT_CONFIRM", "0") == "1"         # ask whether to save a correct answer's SQL
 
-print("[LOG] Initializing Azure OpenAI client...")
-client = AzureOpenAI(
-    api_key=AZURE_OPENAI_API_KEY,
-    azure_endpoint=AZURE_OPENAI_ENDPOINT,
-    api_version=AZURE_OPENAI_API_VERSION,
-)
+SPECULATIVE_MODE = os.getenv("SPECULATIVE_MODE", "0") == "1"             # overlap routing with the branches
+SPECULATE_GENERIC = os.getenv("SPECULATE_GENERIC", "0") == "1"           # also start the generic answer
+SPECULATE_BELOW_CONFIDENCE = float(os.getenv("SPECULATE_BELOW_CONFIDENCE", "0.5"))  # local router threshold
 
-def call_llm(system_prompt, user_content):
-    messages = [
-        {"role": "system", "content": system_prompt},
-        {"role": "user", "content": user_content},
-    ]
-    resp = client.chat.completions.create(
-        model=AZURE_OPENAI_MODEL,
-        messages=messages,
-        temperature=0
+TEMPLATE_ANSWERS = os.getenv("TEMPLATE_ANSWERS", "1") == "1"           # render simple results without the LLM
+TEMPLATE_QUERIES = os.getenv("TEMPLATE_QUERIES", "1") == "1"           # answer known question shapes without SQL generation
+
+DATA_DIR = hr_data.DATA_DIR  # override with HR_DATA_DIR
+DATA_WATCH = os.getenv("DATA_WATCH", "0") == "1"                     # reload changed workbooks in place
+DATA_WATCH_INTERVAL = float(os.getenv("DATA_WATCH_INTERVAL", "2"))   # seconds between polls
+HR_HISTORY = os.getenv("HR_HISTORY", "0") == "1"                     # record versions for as-of queries
+HR_STORAGE_MODE = os.getenv("HR_STORAGE_MODE", "memory")             # memory | partitioned (Hive Parquet) | arrow (shared mmap)
+
+def _make_client():
+    print("[LOG] Initializing Azure OpenAI client...")
+    return AzureOpenAI(
+        api_key=AZURE_OPENAI_API_KEY,
+        azure_endpoint=AZURE_OPENAI_ENDPOINT,
+        api_version=AZURE_OPENAI_API_VERSION,
     )
-    return resp.choices[0].message.content.strip()
 
-# ========= DATAFRAME BUILD ========= #
 
-print("[LOG] Loading CSV files into dataframes...")
+# Created on the first call that has to reach the endpoint (never in replay mode).
+client = llm_cache.LazyClient(_make_client)
 
-application = pd.read_excel(os.path.join(DATA_DIR, "Application_Table_100.xlsx"))
-candidate = pd.read_excel(os.path.join(DATA_DIR, "Candidate_Table_100.xlsx"))
-interview = pd.read_excel(os.path.join(DATA_DIR, "Interview_Table_100.xlsx"))
-offer = pd.read_excel(os.path.join(DATA_DIR, "Offer_Table_100.xlsx"))
-recruiter = pd.read_excel(os.path.join(DATA_DIR, "Recruiter_Table_100.xlsx"))
-requirement = pd.read_excel(os.path.join(DATA_DIR, "Requirement_Table_100.xlsx"))
+# Usage of the most recent call_llm on the current thread.
+_llm_local = threading.local()
 
+# Calls, tokens (prompt tokens served from the provider's prompt cache in
+# cached_tokens) and wall-clock seconds per agent stage. prefix_changes counts
+# calls whose system message differed from the stage's previous one, which
+# restarts prompt caching for that stage.
+STAGE_STATS = {
+    stage: {"calls": 0, "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0,
+            "seconds": 0.0, "prefix_changes": 0}
+    for stage in LLM_STAGES
+}
+_stage_prefix = {}
+_stage_lock = threading.Lock()
 
-print("[LOG] Joining base tables...")
+# Azure OpenAI only caches prompts of at least this many tokens.
+PROMPT_CACHE_MIN_TOKENS = 1024
 
-df = (
-    application
-    .merge(candidate, on="candidate_id", how="left")
-    .merge(requirement, on="requirement_id", how="left")
-    .merge(recruiter, left_on="screened_by_recruiter_id", right_on="recruiter_id", how="left")
-)
 
-print("[LOG] Aggregating interviews...")
-interview_agg = (
-    interview
-    .groupby("application_id")
-    .agg(
-        total_interviews=("interview_id", "count"),
-        last_interview_date=("interview_date", "max"),
-    )
-    .reset_index()
-)
-
-print("[LOG] Aggregating offers...")
-offers_with_app = offer.merge(
-    application[["application_id", "candidate_id"]],
-    left_on="offer_candidate_id",
-    right_on="candidate_id",
-    how="left",
-)
-
-offer_agg = (
-    offers_with_app
-    .groupby("application_id")
-    .agg(
-        total_offers=("offer_id", "count"),
-        last_offer_date=("offer_date", "max"),
+def cached_prompt_tokens(usage):
+    # prompt_tokens_details is reported from API version 2024-10-01-preview on.
+    details = getattr(usage, "prompt_tokens_details", None)
+    return getattr(details, "cached_tokens", None) or 0
+
+
+def call_llm(system_prompt, user_content, stage="final"):
+    config = LLM_STAGES[stage]
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_content},
+    ]
+    start = time.perf_counter()
+    content, usage = llm_cache.chat(
+        client,
+        config["model"],
+        messages,
+        timeout=config["timeout"],
+        temperature=0,
+        max_tokens=config["max_tokens"],
     )
-    .reset_index()
-)
+    elapsed = time.perf_counter() - start
+    _llm_local.usage = usage
+    prefix = hashlib.sha256(system_prompt.encode("utf-8")).digest()
+    with _stage_lock:
+        stats = STAGE_STATS[stage]
+        stats["calls"] += 1
+        stats["seconds"] += elapsed
+        if _stage_prefix.get(stage, prefix) != prefix:
+            stats["prefix_changes"] += 1
+        _stage_prefix[stage] = prefix
+        if usage is not None:
+            stats["prompt_tokens"] += usage.prompt_tokens
+            stats["cached_tokens"] += cached_prompt_tokens(usage)
+            stats["completion_tokens"] += usage.completion_tokens
+    return content.strip()
+
+
+def print_stage_stats():
+    for stage, stats in STAGE_STATS.items():
+        if not stats["calls"]:
+            continue
+        calls = stats["calls"]
+        avg_prompt = stats["prompt_tokens"] / calls
+        cached_share = stats["cached_tokens"] / stats["prompt_tokens"] if stats["prompt_tokens"] else 0.0
+        note = f" (below the {PROMPT_CACHE_MIN_TOKENS}-token caching minimum)" if avg_prompt < PROMPT_CACHE_MIN_TOKENS else ""
+        print(f"[STATS] Stage {stage} ({LLM_STAGES[stage]['model']}): calls={calls} "
+              f"avg_prompt_tokens={avg_prompt:.0f} "
+              f"avg_cached_tokens={stats['cached_tokens'] / calls:.0f} ({cached_share:.0%}){note} "
+              f"avg_completion_tokens={stats['completion_tokens'] / calls:.0f} "
+              f"avg_latency={stats['seconds'] / calls:.2f}s prefix_changes={stats['prefix_changes']}")
+
+
+def last_llm_usage():
+    return getattr(_llm_local, "usage", None)
 
-print("[LOG] Final join with interviews and offers...")
-df = (
-    df
-    .merge(interview_agg, on="application_id", how="left")
-    .merge(offer_agg, on="application_id", how="left")
-)
+# ========= DATAFRAME BUILD ========= #
 
-print("[LOG] Combined dataframe ready. Shape:", df.shape)
+# skills_index, query_templates, timeline and column_profile; app.py registers
+# the same set so either can export the shared Arrow snapshot.
+arrow_snapshot.enable_shared_artifacts()
+if HR_STORAGE_MODE == "partitioned":
+    partitioned_store.enable()
+if HR_HISTORY:
+    table_history.enable()
+if HR_STORAGE_MODE == "arrow":
+    # Map the Arrow snapshot shared by all worker processes on this machine.
+    hr_data.adopt_snapshot(arrow_snapshot.open_or_export(DATA_DIR))
+    if DATA_WATCH:
+        arrow_snapshot.start_follower(interval=DATA_WATCH_INTERVAL)
+else:
+    hr_data.load_snapshot(DATA_DIR)
+    if DATA_WATCH:
+        hr_data.start_watcher(DATA_WATCH_INTERVAL)
 
 
 # ========= AGENT PROMPTS ========= #
 
-SUPERVISOR_KNOWLEDGE = """
-You orchestrate recruitment analytics queries over a combined dataframe built from:
+# Prompts are assembled static-first so each stage sends a byte-stable prefix
+# that Azure OpenAI can serve from its prompt cache (prompts of 1024+ tokens,
+# matched in 128-token steps): fixed instructions and schema, then per-snapshot
+# column statistics, then per-request examples and the question. Nothing that
+# varies per request may be formatted into the constants below.
+
+SCHEMA_PROMPT = """
+Tables:
 - application_table_100(application_id, candidate_id, requirement_id, screened_by_recruiter_id,
   current_stage, stage_changed_date, screening_score, status)
 - candidate_table_100(candidate_id, candidate_full_name, candidate_email, candidate_phone,
@@ -118,14 +204,24 @@ Keys and joins:
 - interview_table_100.application_id -> application_table_100.application_id
 - offer_table_100.offer_candidate_id -> candidate_table_100.candidate_id
 - offers and interviews are aggregated per application_id.
+- candidate_skill_table(candidate_id, skill) holds one normalized, lower-case skill per row
+  parsed from candidate_skills; use it for skill filters.
+- application_timeline(application_id, ...) holds per-application milestone dates and
+  precomputed durations in days (time to interview, offer, acceptance, start, start slippage).
+"""
 
+SUPERVISOR_KNOWLEDGE = """
+You orchestrate recruitment analytics queries over a combined dataframe built from the
+tables below.
+""" + SCHEMA_PROMPT + """
 Classify user questions:
 - If they require reading or aggregating these tables/fields, route to SpecialistHRAgent.
 - Otherwise, route to GenericHRAgent.
 
-Return JSON with fields:
+Return JSON with one field:
 - "route": "specialist" or "generic"
-- "enriched_query": natural language query rewritten with table/field names and filters.
+
+Decide whether the user question depends on the recruitment tables or is generic HR.
 """
 
 SPECIALIST_SYSTEM = """
@@ -141,7 +237,13 @@ Return strict JSON:
   "assumptions": "<clarifications/assumptions>"
 }
 Do NOT return anything except valid JSON.
-"""
+""" + SCHEMA_PROMPT
+SPECIALIST_SYSTEM += skills_index.PROMPT_HINT
+SPECIALIST_SYSTEM += timeline.PROMPT_HINT
+if HR_STORAGE_MODE == "partitioned":
+    SPECIALIST_SYSTEM += partitioned_store.PROMPT_HINT
+if HR_HISTORY:
+    SPECIALIST_SYSTEM += table_history.PROMPT_HINT
 
 GENERIC_SYSTEM = """
 You are GenericHRAgent.
@@ -163,70 +265,186 @@ Your tasks:
 Keep the message within a few paragraphs, plus bullet points if helpful.
 """
 
+# ========= FEW-SHOT RETRIEVAL ========= #
+
+print("[LOG] Loading few-shot example store...")
+few_shot_store = FewShotStore()
+print("[LOG] Few-shot examples available:", len(few_shot_store.examples))
+
+# First-try success and prompt size, split by whether examples were injected.
+FEW_SHOT_STATS = {
+    "with_examples": {"queries": 0, "first_try_ok": 0, "prompt_tokens": 0},
+    "without_examples": {"queries": 0, "first_try_ok": 0, "prompt_tokens": 0},
+}
+
+
+def record_specialist_attempt(used_examples: bool, ok: bool, prompt_tokens: int):
+    bucket = FEW_SHOT_STATS["with_examples" if used_examples else "without_examples"]
+    bucket["queries"] += 1
+    bucket["first_try_ok"] += int(ok)
+    bucket["prompt_tokens"] += prompt_tokens
+
+
+def print_few_shot_stats():
+    for name, bucket in FEW_SHOT_STATS.items():
+        if not bucket["queries"]:
+            continue
+        rate = bucket["first_try_ok"] / bucket["queries"]
+        avg_tokens = bucket["prompt_tokens"] / bucket["queries"]
+        print(f"[STATS] Specialist {name}: queries={bucket['queries']} "
+              f"first_try_success={rate:.0%} avg_prompt_tokens={avg_tokens:.0f}")
+
+
 # ========= SIMPLE EXECUTION HELPERS ========= #
 
 def supervisor_route(user_query: str):
+    # Route only: the specialist and generic agents answer the user's own
+    # question (with the schema in their prompts), so a speculative branch
+    # started before the supervisor returns gets the same input as the serial one.
     print("[LOG] Supervisor routing...")
-    prompt = f"""
-User question: {user_query}
-
-Decide whether this depends on the recruitment tables or is generic HR.
-Remember to use the field and table names described above.
-"""
-    raw = call_llm(SUPERVISOR_KNOWLEDGE, prompt)
+    raw = call_llm(SUPERVISOR_KNOWLEDGE, f"User question: {user_query}", stage="supervisor")
     import json
     try:
-        data = json.loads(raw)
+        route = json.loads(raw)["route"]
     except Exception:
+        route = None
+    if route not in {"specialist", "generic"}:
         print("[LOG] Failed to parse supervisor JSON, defaulting to specialist.")
-        data = {"route": "specialist", "enriched_query": user_query}
-    return data["route"], data["enriched_query"]
+        route = "specialist"
+    return route
 
 
-def specialist_answer(enriched_query: str):
+def specialist_generate(question: str):
     print("[LOG] SpecialistHRAgent generating SQL...")
-    raw = call_llm(SPECIALIST_SYSTEM, enriched_query)
+    examples = few_shot_store.search(question, k=FEW_SHOT_K) if FEW_SHOT_K > 0 else []
+    if examples:
+        print(f"[LOG] Injecting {len(examples)} few-shot examples.")
+        user_content = f"{format_examples(examples)}\n\nQuestion: {question}"
+    else:
+        user_content = question
+    hints = hr_data.current_snapshot()["data"]["schema_hints"]
+    raw = call_llm(f"{SPECIALIST_SYSTEM}\n{hints}", user_content, stage="specialist")
+    usage = last_llm_usage()
+    prompt_tokens = usage.prompt_tokens if usage is not None else 0
 
     import json
-    spec = json.loads(raw)
+    try:
+        spec = json.loads(raw)
+        spec["sql"]
+    except Exception:
+        record_specialist_attempt(bool(examples), False, prompt_tokens)
+        raise
+    return spec, bool(examples), prompt_tokens
+
+
+def specialist_execute(question: str, spec: dict, used_examples: bool, prompt_tokens: int):
     sql = spec["sql"]
     print("[LOG] Generated SQL:\n", sql)
 
-    # Here we run SQL with pandas using duckdb (recommended for quick testing)
+    # Here we run SQL with pandas using duckdb (recommended for quick testing).
+    # The snapshot is captured once so a concurrent refresh cannot mix versions.
     import duckdb
+    snapshot = hr_data.current_snapshot()
+
+    sql, literal_fixes, literal_warnings = validate_literals(sql, snapshot["data"]["column_stats"])
+    for fix in literal_fixes:
+        print("[LOG] Fixed filter literal:", fix)
+    for warning in literal_warnings:
+        print("[LOG] Unknown filter literal:", warning)
     con = duckdb.connect()
-    con.register("application_table_100", application)
-    con.register("candidate_table_100", candidate)
-    con.register("interview_table_100", interview)
-    con.register("offer_table_100", offer)
-    con.register("recruiter_table_100", recruiter)
-    con.register("Recruitement_table_100", requirement)
+    hr_data.register_tables(con, snapshot)
+    if HR_HISTORY:
+        table_history.register_history(con)
 
     print("[LOG] Executing SQL via duckdb...")
-    result_df = con.execute(sql).df()
+    try:
+        result_df, truncated = guarded_execute(con, sql)
+    except (QueryRejected, QueryTimeout) as e:
+        # Stopped by the guard: let FinalAnswerAgent explain instead of crashing the CLI.
+        record_specialist_attempt(used_examples, False, prompt_tokens)
+        context_for_final = f"""
+Intent: {spec.get('intent','')}
+The generated query was stopped before returning results: {e}
+Suggest how the user could narrow the question (filters, date range, department).
+"""
+        return context_for_final, pd.DataFrame(), spec
+    except Exception:
+        record_specialist_attempt(used_examples, False, prompt_tokens)
+        raise
     print("[LOG] SQL executed. Rows:", len(result_df))
+    record_specialist_attempt(used_examples, not result_df.empty, prompt_tokens)
+
+    spec["question"] = question  # for confirm_example()
 
     # Limit preview rows
     preview = result_df.head(20).to_markdown(index=False)
+    if truncated:
+        preview += f"\n\n(Result capped at {len(result_df)} rows.)"
+
+    assumptions = spec.get('assumptions', '')
+    if literal_warnings:
+        assumptions += " Filter values not found in the data: " + "; ".join(literal_warnings)
 
     context_for_final = f"""
 Intent: {spec.get('intent','')}
-Assumptions: {spec.get('assumptions','')}
+Assumptions: {assumptions}
 Preview of results (max 20 rows):
 
 {preview}
 """
-    return context_for_final
+    return context_for_final, result_df, spec
+
+
+def template_answer(question: str):
+    # Run a matching parameterized template instead of generating SQL.
+    # Returns None when no template fits (or it fails) so the caller falls through.
+    snapshot = hr_data.current_snapshot()
+    match = query_templates.match_question(question, snapshot["data"]["template_slots"])
+    if match is None:
+        return None
+    template = match["template"]
+    print(f"[LOG] Query template '{template['name']}' matched: {query_templates.describe(match)}")
+
+    import duckdb
+    con = duckdb.connect()
+    hr_data.register_tables(con, snapshot)
+    try:
+        result_df, _ = guarded_execute(con, template["sql"], params=match["params"])
+    except Exception as e:
+        query_templates.TEMPLATE_STATS["failed"] += 1
+        print(f"[LOG] Query template failed ({e}); falling back to SpecialistHRAgent.")
+        return None
+    print("[LOG] Template executed. Rows:", len(result_df))
+
+    spec = {
+        "intent": template["intent"],
+        "assumptions": f"Filters: {query_templates.describe(match)}",
+        "sql": template["sql"],
+        "params": match["params"],
+    }
+    context_for_final = f"""
+Intent: {spec['intent']}
+Assumptions: {spec['assumptions']}
+Preview of results (max 20 rows):
+
+{result_df.head(20).to_markdown(index=False)}
+"""
+    return context_for_final, result_df, spec
+
+
+def specialist_answer(question: str):
+    spec, used_examples, prompt_tokens = specialist_generate(question)
+    return specialist_execute(question, spec, used_examples, prompt_tokens)
 
 
-def generic_answer(enriched_query: str):
+def generic_answer(question: str):
     print("[LOG] GenericHRAgent answering...")
-    return call_llm(GENERIC_SYSTEM, enriched_query)
+    return call_llm(GENERIC_SYSTEM, question, stage="generic")
 
 
 def final_answer(context: str):
     print("[LOG] FinalAnswerAgent composing response...")
-    return call_llm(FINAL_ANSWER_SYSTEM, context)
+    return call_llm(FINAL_ANSWER_SYSTEM, context, stage="final")
 
 
 # ========= CONVERSATIONAL AGENT LOOP ========= #
@@ -252,7 +470,7 @@ politely refuse in one sentence.
 
 def conversational_turn(user_query: str):
     print("[LOG] ConversationalAgent handling input...")
-    content = call_llm(CONVERSATIONAL_SYSTEM, user_query)
+    content = call_llm(CONVERSATIONAL_SYSTEM, user_query, stage="conversational")
     if content.startswith("ROUTE_TO_SUPERVISOR:"):
         cleaned = content.split("ROUTE_TO_SUPERVISOR:", 1)[1].strip()
         return True, cleaned, content
@@ -261,6 +479,89 @@ def conversational_turn(user_query: str):
         return False, None, content
 
 
+# Wall-clock seconds per routed turn, split by how the final answer was produced.
+TURN_LATENCY = {"template": [], "llm": []}
+
+
+def clean_question(question: str):
+    # ---- HARD CLEANING FOR LLM ----
+    return (
+        question
+        .replace("attached excel", "")
+        .replace("attached Excel", "")
+        .replace("attached file", "")
+        .replace("Excel file", "")
+        .strip()
+    )
+
+
+def speculative_turn(cleaned_question: str):
+    # Start supervisor routing, SQL generation and (optionally) the generic
+    # answer together; keep whichever branch the supervisor picks. Every
+    # branch gets the same question the serial path would use.
+    def route():
+        return supervisor_route(cleaned_question), None
+
+    branches = {"specialist": lambda: specialist_generate(cleaned_question)}
+    if SPECULATE_GENERIC:
+        branches["generic"] = lambda: generic_answer(cleaned_question)
+
+    route_name, _, branch_result = run_speculative(route, branches, usage_fn=last_llm_usage)
+    print(f"[LOG] Supervisor decided route='{route_name}'")
+
+    if route_name == "specialist":
+        if branch_result is None:
+            return route_name, specialist_answer(cleaned_question)
+        spec, used_examples, prompt_tokens = branch_result
+        return route_name, specialist_execute(cleaned_question, spec, used_examples, prompt_tokens)
+    if branch_result is None:
+        return route_name, generic_answer(cleaned_question)
+    return route_name, branch_result
+
+
+def compose_answer(route: str, result):
+    # Simple specialist results are rendered locally; everything else goes
+    # through FinalAnswerAgent. Returns (answer, path).
+    if route == "specialist":
+        context, result_df, spec = result
+        if TEMPLATE_ANSWERS:
+            rendered = render_simple(result_df, spec.get("intent", ""), spec.get("sql", ""))
+            if rendered is not None:
+                print("[LOG] Rendering answer from template (FinalAnswerAgent skipped).")
+                return rendered, "template"
+    else:
+        context = result
+    return final_answer(context), "llm"
+
+
+def confirm_example(route: str, result):
+    # Save generated SQL as a few-shot example only once the user confirms the
+    # answer was correct; rows alone do not make a query right.
+    if not FEW_SHOT_CONFIRM or route != "specialist":
+        return
+    _, result_df, spec = result
+    if result_df.empty or "params" in spec or "question" not in spec:
+        return  # nothing returned, or a parameterized template rather than generated SQL
+    reply = input("Was this answer correct? Save its SQL as a verified example [y/N]: ")
+    if record_confirmed(few_shot_store, spec, result_df, reply):
+        print(f"[LOG] Stored question/SQL pair in {few_shot_store.record_path}.")
+
+
+def record_turn_latency(path: str, seconds: float):
+    TURN_LATENCY[path].append(seconds)
+    print(f"[LOG] Turn latency ({path} path): {seconds:.2f}s")
+
+
+def print_turn_latency_stats():
+    for path, samples in TURN_LATENCY.items():
+        if not samples:
+            continue
+        ordered = sorted(samples)
+        p50 = ordered[len(ordered) // 2]
+        print(f"[STATS] Turn latency {path}: turns={len(samples)} "
+              f"avg={sum(samples) / len(samples):.2f}s p50={p50:.2f}s max={ordered[-1]:.2f}s")
+
+
 def main():
     print("Recruitment Multi-Agent Test CLI")
     print("Type 'exit' to quit.\n")
@@ -268,7 +569,17 @@ def main():
     while True:
         user_query = input("You: ").strip()
         if user_query.lower() in {"exit", "quit"}:
+            print_few_shot_stats()
+            print_stage_stats()
+            print_turn_latency_stats()
+            llm_cache.print_cache_stats()
+            query_templates.print_template_stats()
+            print_guard_stats()
+            print(f"[STATS] Literal checks: {PROFILE_STATS}")
+            if SPECULATIVE_MODE:
+                print_speculation_stats()
             break
+        turn_start = time.perf_counter()
 
         # Step 1: Conversational agent
         route_needed, cleaned_question, conv_reply = conversational_turn(user_query)
@@ -277,31 +588,41 @@ def main():
         if not route_needed:
             continue  # chit-chat / refusal only
 
-        # Step 2: Supervisor
-        route, enriched = supervisor_route(cleaned_question)
-
-# ---- HARD CLEANING FOR LLM ----
-        enriched = (
-            enriched
-            .replace("attached excel", "")
-            .replace("attached Excel", "")
-            .replace("attached file", "")
-            .replace("Excel file", "")
-            .strip()
-)
-
-        print(f"[LOG] Supervisor decided route='{route}'")
-        print("[LOG] Enriched query:", enriched)
-
-        # Step 3: Specialist or Generic
-        if route == "specialist":
-            context = specialist_answer(enriched)
+        cleaned_question = clean_question(cleaned_question)
+
+        # Known question shapes are matched on the user's wording (a local
+        # regex pass) and answered without the supervisor or SQL generation.
+        templated = template_answer(cleaned_question) if TEMPLATE_QUERIES else None
+
+        SPECULATION_STATS["turns"] += 1
+        speculate = False
+        if SPECULATIVE_MODE and templated is None:
+            local_guess, confidence = local_route(cleaned_question)
+            speculate = confidence < SPECULATE_BELOW_CONFIDENCE
+            if speculate:
+                print(f"[LOG] Local router unsure ({local_guess}, {confidence:.2f}), speculating...")
+
+        if templated is not None:
+            route, result = "specialist", templated
+        elif speculate:
+            # Steps 2 and 3 overlapped
+            route, result = speculative_turn(cleaned_question)
         else:
-            context = generic_answer(enriched)
+            # Step 2: Supervisor
+            route = supervisor_route(cleaned_question)
+            print(f"[LOG] Supervisor decided route='{route}'")
+
+            # Step 3: Specialist or Generic
+            if route == "specialist":
+                result = specialist_answer(cleaned_question)
+            else:
+                result = generic_answer(cleaned_question)
 
         # Step 4: Final answer
-        answer = final_answer(context)
+        answer, path = compose_answer(route, result)
         print("\n[Assistant]\n", answer, "\n")
+        record_turn_latency(path, time.perf_counter() - turn_start)
+        confirm_example(route, result)
 
 if __name__ == "__main__":
         main()
@@ -2,8 +2,12 @@ import os
 import json
 import pandas as pd
 import duckdb
+from concurrent.futures import ThreadPoolExecutor
 from openai import AzureOpenAI
 from dotenv import load_dotenv
+import llm_cache
+from speculative import local_route
+from sql_guard import guarded_execute
 
 # ================== ENV ==================
 
@@ -14,25 +18,35 @@ AZURE_OPENAI_ENDPOINT = os.getenv("AZURE_OPENAI_ENDPOINT")
 AZURE_OPENAI_MODEL = os.getenv("AZURE_OPENAI_MODEL")
 AZURE_OPENAI_API_VERSION = os.getenv("AZURE_OPENAI_API_VERSION", "2024-02-15-preview")
 
+# Start the generic HR answer alongside the specialist when the local router is unsure
+SPECULATIVE_MODE = os.getenv("SPECULATIVE_MODE", "0") == "1"
+SPECULATE_BELOW_CONFIDENCE = float(os.getenv("SPECULATE_BELOW_CONFIDENCE", "0.5"))
+
 DATA_DIR = r"C:\Users\aisiq\OneDrive\Desktop\Recruitment_Data_Analysis"
 
-print("[LOG] Initializing Azure OpenAI client...")
-client = AzureOpenAI(
-    api_key=AZURE_OPENAI_API_KEY,
-    azure_endpoint=AZURE_OPENAI_ENDPOINT,
-    api_version=AZURE_OPENAI_API_VERSION,
-)
+def _make_client():
+    print("[LOG] Initializing Azure OpenAI client...")
+    return AzureOpenAI(
+        api_key=AZURE_OPENAI_API_KEY,
+        azure_endpoint=AZURE_OPENAI_ENDPOINT,
+        api_version=AZURE_OPENAI_API_VERSION,
+    )
+
+
+# Created on the first call that has to reach the endpoint (never in replay mode).
+client = llm_cache.LazyClient(_make_client)
 
 def call_llm(system_prompt, user_prompt):
-    response = client.chat.completions.create(
-        model=AZURE_OPENAI_MODEL,
-        temperature=0,
-        messages=[
+    content, _ = llm_cache.chat(
+        client,
+        AZURE_OPENAI_MODEL,
+        [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt},
         ],
+        temperature=0,
     )
-    return response.choices[0].message.content.strip()
+    return content.strip()
 
 # ================== LOAD DATA ==================
 
@@ -133,7 +147,7 @@ def specialist_agent(user_query):
     con.register("Recruitement_table_100", requirement)
 
     try:
-        df = con.execute(sql).df()
+        df, _ = guarded_execute(con, sql)
     except Exception:
         return {"data_found": False, "result": None}
 
@@ -156,6 +170,7 @@ def final_answer_agent(text):
 def main():
     print("\nRecruitment Multi-Agent Chatbot")
     print("Type 'exit' to quit\n")
+    executor = ThreadPoolExecutor(max_workers=1)
 
     while True:
         user_query = input("You: ").strip()
@@ -166,9 +181,16 @@ def main():
         cleaned_question = conversational_agent(user_query)
 
         # Step 2: Specialist (Excel FIRST)
+        generic_future = None
+        if SPECULATIVE_MODE and local_route(cleaned_question)[1] < SPECULATE_BELOW_CONFIDENCE:
+            print("[LOG] Local router unsure, starting Generic HR speculatively")
+            generic_future = executor.submit(generic_hr_agent, user_query)
+
         excel_result = specialist_agent(cleaned_question)
 
         if excel_result["data_found"]:
+            if generic_future is not None and not generic_future.cancel():
+                print("[LOG] Discarding speculative Generic HR answer")
             context = f"""
 Answer based strictly on Excel data:
 
@@ -176,7 +198,7 @@ Answer based strictly on Excel data:
 """
         else:
             print("[LOG] Excel data not available, using Generic HR")
-            hr_answer = generic_hr_agent(user_query)
+            hr_answer = generic_future.result() if generic_future is not None else generic_hr_agent(user_query)
             context = f"""
 Data not available in Excel.
 
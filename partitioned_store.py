@@ -0,0 +1,226 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import duckdb
+
+import hr_data
+
+# ========= PARTITIONED PARQUET LAYOUT ========= #
+# Applications, interviews and offers are written as Hive-partitioned Parquet
+# (part_department=<requirement_department>/part_month=<YYYY-MM>, 'unknown'
+# when the department or date is missing) and exposed
+# to DuckDB as views, so filters on the partition columns skip whole files and
+# date filters skip row groups (rows are sorted by the date before writing).
+
+PARTITION_DIR = os.getenv(
+    "HR_PARTITION_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "hr_partitions"),
+)
+ROW_GROUP_SIZE = int(os.getenv("HR_PARTITION_ROW_GROUP_SIZE", "16384"))
+KEEP_BUILDS = 2
+
+# table -> (main date column, SQL producing the rows plus partition columns)
+_REQ_DEPT = """
+    (SELECT requirement_id, any_value(requirement_department) AS dept
+     FROM requirement GROUP BY requirement_id)
+"""
+_APP_DEPT = f"""
+    (SELECT a.application_id, a.candidate_id, d.dept
+     FROM application a LEFT JOIN {_REQ_DEPT} d ON a.requirement_id = d.requirement_id)
+"""
+PARTITIONED_TABLES = {
+    "application": ("stage_changed_date", f"""
+        SELECT t.*, COALESCE(CAST(d.dept AS VARCHAR), 'unknown') AS part_department
+        FROM application t LEFT JOIN {_REQ_DEPT} d ON t.requirement_id = d.requirement_id
+    """),
+    "interview": ("interview_date", f"""
+        SELECT t.*, COALESCE(CAST(d.dept AS VARCHAR), 'unknown') AS part_department
+        FROM interview t LEFT JOIN {_APP_DEPT} d ON t.application_id = d.application_id
+    """),
+    "offer": ("offer_date", f"""
+        SELECT t.*, COALESCE(CAST(d.dept AS VARCHAR), 'unknown') AS part_department
+        FROM offer t LEFT JOIN
+            (SELECT candidate_id, any_value(dept) AS dept FROM {_APP_DEPT} GROUP BY candidate_id) d
+            ON t.offer_candidate_id = d.candidate_id
+    """),
+}
+
+PROMPT_HINT = """
+Storage note: application_table_100, interview_table_100 and offer_table_100 also
+have partition columns part_department (= requirement_department of the application)
+and part_month ('YYYY-MM' of stage_changed_date / interview_date / offer_date).
+When a question filters by department or date window, ALSO filter on these columns
+(e.g. a.part_department = 'Sales' AND a.part_month BETWEEN '2024-01' AND '2024-03')
+so whole partitions are skipped.
+"""
+
+
+def _partition_sql(name):
+    date_col, body = PARTITIONED_TABLES[name]
+    return f"""
+        SELECT *,
+               COALESCE(strftime(TRY_CAST("{date_col}" AS DATE), '%Y-%m'), 'unknown') AS part_month
+        FROM ({body}) s
+        ORDER BY TRY_CAST("{date_col}" AS DATE)
+    """
+
+
+def _source_connection(data):
+    con = duckdb.connect()
+    for name in ("application", "interview", "offer", "requirement"):
+        con.register(name, data[name])
+    return con
+
+
+def write_partitioned(data, out_dir):
+    con = _source_connection(data)
+    os.makedirs(out_dir, exist_ok=True)
+    for name in PARTITIONED_TABLES:
+        target = os.path.join(out_dir, name).replace("'", "''")
+        con.execute(f"""
+            COPY ({_partition_sql(name)}) TO '{target}'
+            (FORMAT parquet, PARTITION_BY (part_department, part_month),
+             ROW_GROUP_SIZE {ROW_GROUP_SIZE}, OVERWRITE_OR_IGNORE)
+        """)
+    con.close()
+    return out_dir
+
+
+def write_flat(data, out_dir):
+    con = _source_connection(data)
+    os.makedirs(out_dir, exist_ok=True)
+    for name in PARTITIONED_TABLES:
+        target = os.path.join(out_dir, f"{name}.parquet").replace("'", "''")
+        con.execute(f"COPY ({_partition_sql(name)}) TO '{target}' (FORMAT parquet, ROW_GROUP_SIZE {ROW_GROUP_SIZE})")
+    con.close()
+    return out_dir
+
+
+def partitioned_view_sql(root, name):
+    path = os.path.join(root, name, "**", "*.parquet").replace("'", "''")
+    return (
+        f"SELECT * FROM read_parquet('{path}', hive_partitioning = true, "
+        f"hive_types = {{'part_department': VARCHAR, 'part_month': VARCHAR}})"
+    )
+
+
+def flat_view_sql(root, name):
+    path = os.path.join(root, f"{name}.parquet").replace("'", "''")
+    return f"SELECT * FROM read_parquet('{path}')"
+
+
+def _cleanup_old_builds(keep):
+    builds = sorted(d for d in os.listdir(PARTITION_DIR) if d.startswith("build-"))
+    for old in builds[:-keep]:
+        shutil.rmtree(os.path.join(PARTITION_DIR, old), ignore_errors=True)
+
+
+def build_sql_views(data):
+    # Snapshot artifact: a fresh build directory per refresh, so queries still
+    # reading the previous build are unaffected; older builds are pruned.
+    print("[LOG] Writing Hive-partitioned Parquet layout...")
+    os.makedirs(PARTITION_DIR, exist_ok=True)
+    out_dir = os.path.join(PARTITION_DIR, f"build-{time.time_ns()}")
+    write_partitioned(data, out_dir)
+    _cleanup_old_builds(KEEP_BUILDS)
+    return {name: partitioned_view_sql(out_dir, name) for name in PARTITIONED_TABLES}
+
+
+def enable():
+    # Must run before hr_data.load_snapshot().
+    hr_data.register_artifact(
+        "sql_views", ["application", "interview", "offer", "requirement"], build_sql_views
+    )
+
+
+# ========= FLAT VS PARTITIONED BENCHMARK ========= #
+
+def _profiled(con, sql, table_sizes):
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as fh:
+        prof_path = fh.name
+    con.execute("PRAGMA enable_profiling = 'json'")
+    con.execute(f"PRAGMA profiling_output = '{prof_path}'")
+    start = time.perf_counter()
+    con.execute(sql).fetchall()
+    elapsed = time.perf_counter() - start
+    con.execute("PRAGMA disable_profiling")
+    with open(prof_path) as fh:
+        profile = json.load(fh)
+    os.remove(prof_path)
+
+    totals = {"files": 0, "bytes": 0, "rows": 0}
+
+    def walk(node):
+        info = node.get("extra_info", {})
+        if info.get("Function") == "READ_PARQUET":
+            n = int(info.get("Total Files Read", 0) or 0)
+            totals["files"] += n
+            totals["rows"] += int(node.get("operator_cardinality", 0) or 0)
+            # DuckDB does not report bytes for Parquet scans; approximate them
+            # from the average file size of the table being scanned.
+            scanned = str(info.get("Filename(s)", ""))
+            for name, (size, files) in table_sizes.items():
+                if f"{os.sep}{name}" in scanned:
+                    totals["bytes"] += n * size / max(files, 1)
+                    break
+        for child in node.get("children", []):
+            walk(child)
+
+    walk(profile)
+    return elapsed, totals["files"], int(totals["bytes"]), totals["rows"]
+
+
+def _table_sizes(root):
+    sizes = {}
+    for name in PARTITIONED_TABLES:
+        total = 0
+        files = 0
+        for dirpath, _, filenames in os.walk(root):
+            for f in filenames:
+                path = os.path.join(dirpath, f)
+                if f.endswith(".parquet") and f"{os.sep}{name}" in path[len(root):]:
+                    total += os.path.getsize(path)
+                    files += 1
+        sizes[name] = (total, files)
+    return sizes
+
+
+def benchmark(data, queries=None, repeat=5):
+    if queries is None:
+        dept = str(data["requirement"]["requirement_department"].dropna().mode().iloc[0]).replace("'", "''")
+        queries = {
+            "apps by stage, one dept": f"""
+                SELECT current_stage, COUNT(*) FROM application_table_100
+                WHERE part_department = '{dept}' GROUP BY current_stage""",
+            "interviews in a quarter": """
+                SELECT interview_status, COUNT(*) FROM interview_table_100
+                WHERE part_month BETWEEN '2024-01' AND '2024-03' GROUP BY interview_status""",
+            "offers, one dept + month window": f"""
+                SELECT offer_status, COUNT(*) FROM offer_table_100
+                WHERE part_department = '{dept}' AND part_month >= '2024-06' GROUP BY offer_status""",
+        }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        flat_root = write_flat(data, os.path.join(tmp, "flat"))
+        part_root = write_partitioned(data, os.path.join(tmp, "partitioned"))
+        layouts = {"flat": (flat_root, flat_view_sql), "partitioned": (part_root, partitioned_view_sql)}
+        print(f"{'query':34} {'layout':12} {'ms':>8} {'files':>6} {'~bytes':>10} {'rows':>10}")
+        for label, sql in queries.items():
+            for layout, (root, view_sql) in layouts.items():
+                table_sizes = _table_sizes(root)
+                con = duckdb.connect()
+                for name, sql_name in hr_data.SQL_TABLE_NAMES.items():
+                    if name in PARTITIONED_TABLES:
+                        con.execute(f'CREATE VIEW "{sql_name}" AS {view_sql(root, name)}')
+                runs = [_profiled(con, sql, table_sizes) for _ in range(repeat)]
+                best = min(runs, key=lambda r: r[0])
+                print(f"{label[:34]:34} {layout:12} {best[0] * 1000:8.2f} {best[1]:6d} {best[2]:10d} {best[3]:10d}")
+                con.close()
+
+
+if __name__ == "__main__":
+    snapshot = hr_data.build_snapshot()
+    benchmark(snapshot["data"])
@@ -0,0 +1,445 @@
+import re
+
+import duckdb
+import pandas as pd
+
+import hr_data
+from skills_index import SKILL_TABLE_NAME
+
+# ========= PARAMETERIZED QUERY TEMPLATES ========= #
+# Most data questions are a handful of shapes ("how many applications are in
+# <stage> for <department>", "how many offers were accepted between <date> and
+# <date> by <recruiter>"). Each template is a fixed, pre-validated DuckDB
+# statement with $name parameters. The matcher fills the slots from the
+# question using the value dictionaries of the current snapshot and only
+# accepts the question when every remaining word is filler, so anything with
+# an extra filter, grouping or metric falls through to SpecialistHRAgent.
+
+_T = hr_data.SQL_TABLE_NAMES
+
+# slot -> (table, column) whose distinct values form the slot dictionary.
+SLOT_COLUMNS = {
+    "stage": ("application", "current_stage"),
+    "application_status": ("application", "status"),
+    "department": ("requirement", "requirement_department"),
+    "requirement_status": ("requirement", "requirement_status"),
+    "recruiter": ("recruiter", "recruiter_Name"),
+    "offer_status": ("offer", "offer_status"),
+    "interview_status": ("interview", "interview_status"),
+    "source": ("candidate", "candidate_source_of_hire"),
+    "location": ("candidate", "candidate_location"),
+}
+
+# Words that name a slot without being a value ("Engineering department").
+SLOT_CUES = {
+    "stage": {"stage", "stages", "pipeline"},
+    "application_status": {"status"},
+    "department": {"department", "departments", "dept", "team"},
+    "requirement_status": {"status"},
+    "recruiter": {"recruiter", "recruiters", "screened", "handled"},
+    "offer_status": {"status"},
+    "interview_status": {"status"},
+    "source": {"source", "sourced", "via", "through", "channel"},
+    "location": {"location", "located", "based"},
+    "skill": {"skill", "skills", "skilled", "knowing", "know", "knows"},
+    "period": {"date", "dated", "period"},
+}
+
+COUNT_RE = re.compile(r"\b(?:how many|count|number of|total)\b", re.IGNORECASE)
+
+FILLER_WORDS = {
+    "a", "an", "the", "is", "are", "was", "were", "be", "been", "have", "has", "had",
+    "do", "does", "did", "there", "in", "at", "on", "of", "for", "to", "with",
+    "from", "under", "and", "currently", "current", "now", "so", "far", "overall",
+    "all", "total", "count", "number", "how", "many", "we", "our", "me", "tell",
+    "what", "s", "please", "got", "get", "who", "that", "which", "as", "into",
+}
+
+# "by department", "per stage", "each recruiter" ask for a breakdown, which no
+# template returns; these words are only accepted right before a filled value
+# ("screened by Priya").
+GROUPING_RE = re.compile(r"\b(?:by|per|each|every)\s+")
+
+_MONTHS = r"jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?"
+_DATE = (
+    rf"\d{{4}}-\d{{1,2}}-\d{{1,2}}|\d{{1,2}}[/.-]\d{{1,2}}[/.-]\d{{4}}"
+    rf"|\d{{1,2}}(?:st|nd|rd|th)?\s+(?:{_MONTHS})\.?,?\s+\d{{4}}"
+    rf"|(?:{_MONTHS})\.?\s+\d{{1,2}}(?:st|nd|rd|th)?,?\s+\d{{4}}"
+    rf"|(?:{_MONTHS})\.?\s+\d{{4}}|\d{{4}}"
+)
+_RANGE_RE = re.compile(
+    rf"\b(?:between|from)\s+(?P<a>{_DATE})\s+(?:and|to|until|till|-)\s+(?P<b>{_DATE})\b", re.IGNORECASE
+)
+_SINGLE_RE = re.compile(rf"\b(?P<op>in|during|since|after|before|until|on)\s+(?P<a>{_DATE})\b", re.IGNORECASE)
+
+# Bounds used for open-ended periods ("since Feb 2024").
+OPEN_START = pd.Timestamp(1900, 1, 1)
+OPEN_END = pd.Timestamp(2262, 1, 1)
+
+TEMPLATE_STATS = {"matched": 0, "fell_through": 0, "failed": 0}
+
+
+def _where(*conditions):
+    return "WHERE " + "\n  AND ".join(conditions)
+
+
+def _optional(slot, expr):
+    return f"(${slot} IS NULL OR {expr} = ${slot})"
+
+
+def _period(expr):
+    return f"($start IS NULL OR CAST({expr} AS DATE) BETWEEN $start AND $end)"
+
+
+# Each template: keyword regex the question must contain, slots it can fill
+# (in matching order), the slots it requires, and the statement. Every $slot
+# listed is bound (NULL when absent); "period" binds $start/$end.
+QUERY_TEMPLATES = [
+    {
+        "name": "applications_at_stage",
+        "intent": "Count applications at a pipeline stage",
+        "keywords": r"\b(?:applications?|applicants?|candidates?)\b",
+        "slots": ["stage", "department", "recruiter", "period"],
+        "required": ["stage"],
+        "period_column": "stage_changed_date",
+        "sql": f"""
+SELECT COUNT(*) AS applications
+FROM {_T['application']} a
+LEFT JOIN {_T['requirement']} r ON a.requirement_id = r.requirement_id
+LEFT JOIN {_T['recruiter']} rec ON a.screened_by_recruiter_id = rec.recruiter_id
+{_where("a.current_stage = $stage", _optional("department", "r.requirement_department"),
+        _optional("recruiter", "rec.recruiter_Name"), _period("a.stage_changed_date"))}
+""",
+    },
+    {
+        "name": "applications_with_status",
+        "intent": "Count applications with a status",
+        "keywords": r"\b(?:applications?|applicants?|candidates?)\b",
+        "slots": ["application_status", "department", "recruiter", "period"],
+        "required": ["application_status"],
+        "period_column": "stage_changed_date",
+        "sql": f"""
+SELECT COUNT(*) AS applications
+FROM {_T['application']} a
+LEFT JOIN {_T['requirement']} r ON a.requirement_id = r.requirement_id
+LEFT JOIN {_T['recruiter']} rec ON a.screened_by_recruiter_id = rec.recruiter_id
+{_where("a.status = $application_status", _optional("department", "r.requirement_department"),
+        _optional("recruiter", "rec.recruiter_Name"), _period("a.stage_changed_date"))}
+""",
+    },
+    {
+        "name": "offers_with_status",
+        "intent": "Count offers with a status",
+        "keywords": r"\boffers?\b",
+        "slots": ["offer_status", "department", "recruiter", "period"],
+        "required": ["offer_status"],
+        "period_column": "offer_acceptance_date for accepted offers, otherwise offer_date",
+        "extra_words": {"made", "extended", "released", "sent", "given"},
+        # Offers reach recruiters/departments through the candidate's applications;
+        # COUNT(DISTINCT) keeps candidates with several applications from double counting.
+        "sql": f"""
+SELECT COUNT(DISTINCT o.offer_id) AS offers
+FROM {_T['offer']} o
+LEFT JOIN {_T['application']} a ON o.offer_candidate_id = a.candidate_id
+LEFT JOIN {_T['requirement']} r ON a.requirement_id = r.requirement_id
+LEFT JOIN {_T['recruiter']} rec ON a.screened_by_recruiter_id = rec.recruiter_id
+{_where("o.offer_status = $offer_status", _optional("department", "r.requirement_department"),
+        _optional("recruiter", "rec.recruiter_Name"),
+        _period("CASE WHEN $offer_status = 'Accepted' THEN o.offer_acceptance_date ELSE o.offer_date END"))}
+""",
+    },
+    {
+        "name": "interviews_with_status",
+        "intent": "Count interviews with a status",
+        "keywords": r"\binterviews?\b",
+        "slots": ["interview_status", "department", "recruiter", "period"],
+        "required": ["interview_status"],
+        "period_column": "interview_date",
+        "extra_words": {"conducted", "held", "done"},
+        "sql": f"""
+SELECT COUNT(*) AS interviews
+FROM {_T['interview']} i
+LEFT JOIN {_T['application']} a ON i.application_id = a.application_id
+LEFT JOIN {_T['requirement']} r ON a.requirement_id = r.requirement_id
+LEFT JOIN {_T['recruiter']} rec ON a.screened_by_recruiter_id = rec.recruiter_id
+{_where("i.interview_status = $interview_status", _optional("department", "r.requirement_department"),
+        _optional("recruiter", "rec.recruiter_Name"), _period("i.interview_date"))}
+""",
+    },
+    {
+        "name": "candidates_by_source",
+        "intent": "Count candidates from a source of hire",
+        "keywords": r"\b(?:candidates?|applicants?|applications?|people|hires?)\b",
+        "slots": ["source", "location", "period"],
+        "required": ["source"],
+        "period_column": "candidate_application_date",
+        "extra_words": {"came", "come", "applied"},
+        "sql": f"""
+SELECT COUNT(*) AS candidates
+FROM {_T['candidate']} c
+{_where("c.candidate_source_of_hire = $source", _optional("location", "c.candidate_location"),
+        _period("c.candidate_application_date"))}
+""",
+    },
+    {
+        "name": "candidates_with_skill",
+        "intent": "Count candidates with a skill",
+        "keywords": r"\b(?:candidates?|applicants?|people)\b",
+        "slots": ["skill", "location"],
+        "required": ["skill"],
+        "extra_words": {"having", "who", "can"},
+        "sql": f"""
+SELECT COUNT(DISTINCT s.candidate_id) AS candidates
+FROM {SKILL_TABLE_NAME} s
+JOIN {_T['candidate']} c ON s.candidate_id = c.candidate_id
+{_where("s.skill = $skill", _optional("location", "c.candidate_location"))}
+""",
+    },
+    {
+        "name": "requirements_with_status",
+        "intent": "Count requirements with a status",
+        "keywords": r"\b(?:requirements?|positions?|roles?|openings?|jobs?|vacancies|vacancy|reqs?)\b",
+        "slots": ["requirement_status", "department", "period"],
+        "required": ["requirement_status"],
+        "period_column": "requirement_created_date",
+        "sql": f"""
+SELECT COUNT(*) AS requirements
+FROM {_T['requirement']} r
+{_where("r.requirement_status = $requirement_status", _optional("department", "r.requirement_department"),
+        _period("r.requirement_created_date"))}
+""",
+    },
+]
+
+
+# ========= SLOT DICTIONARIES ========= #
+
+def _normalize(text):
+    return " ".join(str(text).lower().split())
+
+
+def _value_regex(phrases):
+    # Longest first so "machine learning" wins over "machine".
+    alternatives = "|".join(re.escape(p) for p in sorted(phrases, key=len, reverse=True))
+    return re.compile(rf"(?<![\w+#.])(?:{alternatives})(?![\w+#])")
+
+
+def _dictionary(values):
+    # normalized phrase -> canonical value. Short codes ("HR") only match as
+    # written, so they are kept in a separate case-sensitive dictionary.
+    folded, exact = {}, {}
+    for value in values:
+        if not isinstance(value, str) or not value.strip():
+            continue
+        if len(value.strip()) <= 3:
+            exact[value.strip()] = value
+        else:
+            folded.setdefault(_normalize(value), value)
+    return {
+        "folded": folded,
+        "exact": exact,
+        "folded_re": _value_regex(folded) if folded else None,
+        "exact_re": _value_regex(exact) if exact else None,
+    }
+
+
+def build_template_slots(data):
+    print("[LOG] Building query template slot dictionaries...")
+    slots = {}
+    for slot, (table, column) in SLOT_COLUMNS.items():
+        if column in data[table].columns:
+            slots[slot] = _dictionary(data[table][column].dropna().unique())
+    if "skill_index" in data:
+        slots["skill"] = _dictionary(data["skill_index"].keys())
+    return {"slots": slots, "templates": validate_templates(data)}
+
+
+def validate_templates(data):
+    # Bind and plan every template once per snapshot against the loaded
+    # tables; templates whose tables or columns are missing are dropped.
+    con = duckdb.connect()
+    for name, sql_name in {**hr_data.SQL_TABLE_NAMES, **hr_data.EXTRA_SQL_TABLES}.items():
+        if name in data:
+            con.register(sql_name, data[name])
+    valid = []
+    for template in QUERY_TEMPLATES:
+        try:
+            con.execute("EXPLAIN " + template["sql"], template_params(template, {}))
+            valid.append(template["name"])
+        except duckdb.Error as e:
+            print(f"[LOG] Query template {template['name']} disabled: {str(e).splitlines()[0]}")
+    con.close()
+    return valid
+
+
+def enable():
+    # Must run after skills_index.enable() and before hr_data.load_snapshot().
+    deps = list(hr_data.TABLE_FILES) + [n for n, _, _ in hr_data.ARTIFACTS if n == "skill_index"]
+    hr_data.register_artifact("template_slots", deps, build_template_slots)
+
+
+# ========= MATCHING ========= #
+
+def _find(dictionary, question, lowered):
+    # [(start, end, canonical value)] for every dictionary value in the question.
+    found = []
+    if dictionary["folded_re"] is not None:
+        for m in dictionary["folded_re"].finditer(lowered):
+            found.append((m.start(), m.end(), dictionary["folded"][m.group(0)]))
+    if dictionary["exact_re"] is not None:
+        for m in dictionary["exact_re"].finditer(question):
+            found.append((m.start(), m.end(), dictionary["exact"][m.group(0)]))
+    return found
+
+
+def _date_range(token):
+    # (first day, last day) covered by a year, "month year" or full date.
+    token = token.strip().rstrip(",")
+    if re.fullmatch(r"\d{4}", token):
+        year = int(token)
+        return pd.Timestamp(year, 1, 1), pd.Timestamp(year, 12, 31)
+    if re.fullmatch(rf"(?:{_MONTHS})\.?\s+\d{{4}}", token, re.IGNORECASE):
+        start = pd.to_datetime(token.replace(".", ""), format="mixed", errors="coerce")
+        if pd.isna(start):
+            return None
+        return start, start + pd.offsets.MonthEnd(0)
+    cleaned = re.sub(r"(\d)(?:st|nd|rd|th)\b", r"\1", token)
+    day = pd.to_datetime(cleaned, dayfirst=not re.match(r"\d{4}-", cleaned), errors="coerce")
+    if pd.isna(day):
+        return None
+    return day, day
+
+
+def parse_period(text):
+    # Returns (start, end, span) or None. Open ends use OPEN_START / OPEN_END.
+    m = _RANGE_RE.search(text)
+    if m:
+        a, b = _date_range(m.group("a")), _date_range(m.group("b"))
+        if a is None or b is None or a[0] > b[1]:
+            return None
+        return a[0], b[1], m.span()
+    m = _SINGLE_RE.search(text)
+    if m:
+        r = _date_range(m.group("a"))
+        if r is None:
+            return None
+        op = m.group("op").lower()
+        if op in {"since", "after"}:
+            start = r[0] if op == "since" else r[1] + pd.Timedelta(days=1)
+            return start, OPEN_END, m.span()
+        if op in {"before", "until"}:
+            end = r[1] if op == "until" else r[0] - pd.Timedelta(days=1)
+            return OPEN_START, end, m.span()
+        return r[0], r[1], m.span()
+    return None
+
+
+def template_params(template, filled):
+    params = {slot: filled.get(slot) for slot in template["slots"] if slot != "period"}
+    if "period" in template["slots"]:
+        start, end = filled.get("period", (None, None))
+        params["start"] = start.date() if start is not None else None
+        params["end"] = end.date() if end is not None else None
+    return params
+
+
+def _try_template(template, question, lowered, found):
+    keyword = re.search(template["keywords"], lowered)
+    count = COUNT_RE.search(lowered)
+    if keyword is None or count is None:
+        return None
+    consumed = [keyword.span(), count.span()]
+    filled = {}
+
+    for slot in template["slots"]:
+        if slot == "period":
+            period = parse_period(lowered)
+            if period is not None:
+                filled["period"] = period[:2]
+                consumed.append(period[2])
+            continue
+        values = {value for _, _, value in found.get(slot, [])}
+        if len(values) > 1:
+            return None  # several values for one slot ("HR or Sales"): not a template shape
+        if values:
+            filled[slot] = values.pop()
+            consumed += [(s, e) for s, e, _ in found[slot]]
+    if any(slot not in filled for slot in template["required"]):
+        return None
+
+    # Grouping words must lead straight into a filled value.
+    value_starts = {start for start, _ in consumed}
+    for m in GROUPING_RE.finditer(lowered):
+        if m.end() not in value_starts and not any(s <= m.start() < e for s, e in consumed):
+            return None
+
+    # Whatever is left must be filler; values of other slots, unparsed dates,
+    # numbers, metrics or extra filters all mean a different question.
+    chars = list(lowered)
+    for start, end in consumed:
+        chars[start:end] = " " * (end - start)
+    rest = "".join(chars)
+    words = {w.strip(".") for w in re.findall(r"[a-z0-9+#.]+", rest)} - {""}
+    # A cue without its value ("department" with no department named) is a
+    # breakdown or an unrecognised value, not a filter this template can bind.
+    cue_words = set()
+    for slot in template["slots"]:
+        cues = SLOT_CUES.get(slot, set())
+        if slot not in filled and words & cues:
+            return None
+        cue_words |= cues
+    allowed = FILLER_WORDS | cue_words | template.get("extra_words", set()) | {"by", "per", "each", "every"}
+    if words - allowed:
+        return None
+    return filled
+
+
+def match_question(question: str, template_slots):
+    # Best matching template for the question, or None. Returns a dict with
+    # the template, bound parameters and a readable description of the slots.
+    lowered = _normalize(question).rstrip("?.! ")
+    # Keep offsets aligned between the original and lower-cased text.
+    question = " ".join(question.split()).rstrip("?.! ")
+    found = {slot: _find(d, question, lowered) for slot, d in template_slots["slots"].items()}
+
+    best = None
+    for template in QUERY_TEMPLATES:
+        if template["name"] not in template_slots["templates"]:
+            continue
+        filled = _try_template(template, question, lowered, found)
+        if filled is not None and (best is None or len(filled) > len(best[1])):
+            best = (template, filled)
+    if best is None:
+        TEMPLATE_STATS["fell_through"] += 1
+        return None
+    template, filled = best
+    TEMPLATE_STATS["matched"] += 1
+    return {
+        "template": template,
+        "params": template_params(template, filled),
+        "filled": filled,
+    }
+
+
+def describe(match):
+    parts = []
+    for slot, value in match["filled"].items():
+        if slot == "period":
+            start, end = value
+            column = match["template"].get("period_column", "date")
+            if end == OPEN_END:
+                parts.append(f"{column} on or after {start:%Y-%m-%d}")
+            elif start == OPEN_START:
+                parts.append(f"{column} on or before {end:%Y-%m-%d}")
+            else:
+                parts.append(f"{column} between {start:%Y-%m-%d} and {end:%Y-%m-%d}")
+        else:
+            parts.append(f"{slot} = {value}")
+    return "; ".join(parts)
+
+
+def print_template_stats():
+    s = TEMPLATE_STATS
+    if not any(s.values()):
+        return
+    print(f"[STATS] Query templates: matched={s['matched']} fell_through={s['fell_through']} failed={s['failed']}")
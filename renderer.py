@@ -0,0 +1,171 @@
+import re
+
+import pandas as pd
+
+# ========= LOCAL RESPONSE RENDERER ========= #
+# Turns scalar, single-series and small tabular results into a final answer
+# without a FinalAnswerAgent round trip. Anything larger or oddly shaped
+# returns None and goes through the LLM as before.
+
+MAX_TEMPLATE_ROWS = 12
+MAX_TEMPLATE_COLS = 4
+
+# Dimensions a result can be broken down by, in the order we suggest them.
+FOLLOW_UP_DIMENSIONS = [
+    ("requirement_department", "department"),
+    ("screened_by_recruiter_id", "recruiter"),
+    ("recruiter_Name", "recruiter"),
+    ("current_stage", "pipeline stage"),
+    ("candidate_source_of_hire", "source of hire"),
+    ("candidate_location", "candidate location"),
+    ("interview_round", "interview round"),
+    ("offer_status", "offer status"),
+]
+
+# KPI follow-ups offered after a result touching the given column.
+KPI_CATALOG = {
+    "current_stage": "What is the stage-to-stage conversion rate across the pipeline?",
+    "screening_score": "How does screening_score differ between hired and rejected applications?",
+    "offer_status": "What is the offer acceptance rate by requirement_department?",
+    "interview_status": "How many interviews are completed vs. cancelled per interview_round?",
+    "requirement_department": "What is the average time to fill per requirement_department?",
+    "candidate_source_of_hire": "Which candidate_source_of_hire produces the most accepted offers?",
+    "recruiter_Name": "Which recruiters have the highest offer acceptance rate?",
+}
+
+DEFAULT_KPIS = [
+    "What is the offer acceptance rate by requirement_department?",
+    "What is the average time to fill per requirement_department?",
+    "How many applications are in each current_stage?",
+]
+
+
+# Metrics whose rows add up to a meaningful total (counts and sums) versus
+# ratios and averages, which must not be summed. Judged from the aggregate
+# the SQL used for the column, else from the column name.
+_AGGREGATE_RE = r"\b(count|sum|avg|average|mean|median|min|max|stddev\w*|quantile\w*)\s*\("
+_ADDITIVE_AGGREGATES = {"count", "sum"}
+_RATE_NAME_RE = re.compile(r"(rate|ratio|share|pct|percent|percentage|proportion|fraction)", re.IGNORECASE)
+_NON_ADDITIVE_NAME_RE = re.compile(r"(avg|average|mean|median|min|max|score|days|duration|age)", re.IGNORECASE)
+_ADDITIVE_NAME_RE = re.compile(r"(^|_)(n|count|counts|num|number|total|sum|cnt)(_|$)", re.IGNORECASE)
+
+
+def _sql_aggregate(column: str, sql: str):
+    # Aggregate function producing "<agg>(...) AS column" in the SQL, if any.
+    if not sql:
+        return None
+    alias = re.escape(column)
+    m = re.search(_AGGREGATE_RE + rf"[^;]*?\)\s+(?:as\s+)?[\"`]?{alias}[\"`]?(?=\s*(?:,|from\b|$))",
+                  sql, re.IGNORECASE | re.DOTALL)
+    if m is None:
+        return None
+    # The lazy match can start at an earlier aggregate; take the last one before the alias.
+    return re.findall(_AGGREGATE_RE, m.group(0), re.IGNORECASE)[-1].lower()
+
+
+def is_additive(column: str, sql: str = ""):
+    aggregate = _sql_aggregate(column, sql)
+    if aggregate is not None:
+        return aggregate in _ADDITIVE_AGGREGATES
+    if _RATE_NAME_RE.search(column) or _NON_ADDITIVE_NAME_RE.search(column):
+        return False
+    return bool(_ADDITIVE_NAME_RE.search(column))
+
+
+def _is_rate(column: str, values: pd.Series):
+    # Rates stored as fractions (0.4) are shown as percentages.
+    if not _RATE_NAME_RE.search(column) or not pd.api.types.is_numeric_dtype(values):
+        return False
+    finite = values.dropna()
+    return not finite.empty and finite.between(0, 1).all()
+
+
+def _plural(n: int, noun: str):
+    return f"{n} {noun}" if n == 1 else f"{n} {noun}s"
+
+
+def _humanize(column: str):
+    return column.replace("_", " ").strip()
+
+
+def _fmt(value, percent: bool = False):
+    if hasattr(value, "item") and not isinstance(value, pd.Timestamp):
+        value = value.item()  # numpy scalar -> python
+    if percent:
+        return f"{value * 100:.1f}".rstrip("0").rstrip(".") + "%"
+    if isinstance(value, float):
+        return f"{value:,.2f}".rstrip("0").rstrip(".")
+    if isinstance(value, int):
+        return f"{value:,}"
+    if isinstance(value, pd.Timestamp):
+        return value.strftime("%Y-%m-%d")
+    return str(value)
+
+
+def follow_up_questions(result_df: pd.DataFrame, n: int = 3):
+    used = {c.lower() for c in result_df.columns}
+    questions = []
+    for col in result_df.columns:
+        kpi = KPI_CATALOG.get(col)
+        if kpi and kpi not in questions:
+            questions.append(kpi)
+    subject = _humanize(result_df.columns[-1])
+    seen_labels = set()
+    for col, label in FOLLOW_UP_DIMENSIONS:
+        if col.lower() in used or label in seen_labels:
+            continue
+        seen_labels.add(label)
+        questions.append(f"How does {subject} break down by {label} ({col})?")
+    for kpi in DEFAULT_KPIS:
+        if kpi not in questions:
+            questions.append(kpi)
+    return questions[:n]
+
+
+def render_simple(result_df: pd.DataFrame, intent: str = "", sql: str = ""):
+    # sql is the statement that produced result_df; it tells counts and sums
+    # (which get a total) apart from averages and rates (which do not).
+    rows, cols = result_df.shape
+    if rows == 0 or cols == 0 or rows > MAX_TEMPLATE_ROWS or cols > MAX_TEMPLATE_COLS:
+        return None
+
+    lead = intent.strip().rstrip(".") if intent else ""
+
+    if rows == 1 and cols == 1:
+        column = result_df.columns[0]
+        raw = result_df.iat[0, 0]
+        if pd.isna(raw):
+            return None  # "no value" needs explaining, not a bold NaN
+        value = _fmt(raw, percent=_is_rate(column, result_df.iloc[:, 0]))
+        sentence = f"{lead}: **{value}** ({_humanize(column)})." if lead else f"The {_humanize(column)} is **{value}**."
+        table = ""
+    elif cols == 2 and pd.api.types.is_numeric_dtype(result_df.iloc[:, 1]):
+        label_col, value_col = result_df.columns
+        if result_df[value_col].isna().any() or result_df[label_col].isna().any():
+            return None
+        percent = _is_rate(value_col, result_df[value_col])
+        ordered = result_df.sort_values(value_col, ascending=False)
+        top = ordered.iloc[0]
+        sentence = (
+            f"{lead + ' — ' if lead else ''}{_plural(len(result_df), _humanize(label_col) + ' value')}; "
+            f"the highest {_humanize(value_col)} is **{_fmt(top[label_col])}** with **{_fmt(top[value_col], percent)}**"
+        )
+        if rows > 1 and is_additive(value_col, sql):
+            sentence += f" (total {_fmt(result_df[value_col].sum())})."
+        else:
+            sentence += "."
+        shown = result_df
+        if percent:
+            shown = result_df.assign(**{value_col: result_df[value_col].map(lambda v: _fmt(v, True))})
+        table = shown.to_markdown(index=False)
+    else:
+        if result_df.isna().all(axis=None):
+            return None
+        sentence = f"{lead + ' — ' if lead else ''}{_plural(rows, 'row')} returned."
+        table = result_df.to_markdown(index=False)
+
+    parts = [sentence]
+    if table:
+        parts.append(table)
+    parts.append("Follow-up questions:\n" + "\n".join(f"- {q}" for q in follow_up_questions(result_df)))
+    return "\n\n".join(parts)
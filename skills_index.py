@@ -0,0 +1,89 @@
+import re
+
+import pandas as pd
+
+import hr_data
+
+# ========= CANDIDATE SKILLS INDEX ========= #
+# candidate_skills is free text ("Python, AWS , sql"). At load time it is split
+# and normalized into a candidate -> skill bridge table (exposed to DuckDB as
+# candidate_skill_table), so skill filters become exact lookups instead of
+# LIKE '%python%' scans, plus a skill -> candidates index whose keys are the
+# skill values query_templates recognises in questions.
+
+SKILL_TABLE_NAME = "candidate_skill_table"
+
+# Only commas and semicolons separate skills: "/" and "&" belong to names
+# such as CI/CD, UI/UX and R&D.
+_SPLIT_RE = re.compile(r"[,;]+")
+_CLEAN_RE = re.compile(r"[^a-z0-9+#./& ]+")
+
+# Spellings that should land on the same skill.
+SKILL_ALIASES = {
+    "amazon web services": "aws",
+    "ms excel": "excel",
+    "microsoft excel": "excel",
+    "node": "node.js",
+    "nodejs": "node.js",
+    "js": "javascript",
+    "py": "python",
+    "python3": "python",
+    "postgres": "postgresql",
+    "k8s": "kubernetes",
+    "gcp": "google cloud",
+    "ml": "machine learning",
+}
+
+PROMPT_HINT = f"""
+Skills: candidate_table_100.candidate_skills is free text. For skill filters use the
+normalized bridge table {SKILL_TABLE_NAME}(candidate_id, skill) instead of LIKE, with
+lower-case skills (e.g. 'python', 'aws', 'sql', 'node.js', 'c++').
+- ANY of the skills: WHERE skill IN ('python', 'aws')
+- ALL of the skills: SELECT candidate_id FROM {SKILL_TABLE_NAME} WHERE skill IN ('python', 'aws')
+  GROUP BY candidate_id HAVING COUNT(DISTINCT skill) = 2
+"""
+
+
+def normalize_skill(raw: str):
+    skill = _CLEAN_RE.sub(" ", str(raw).lower())
+    skill = " ".join(skill.split()).strip(". ")
+    return SKILL_ALIASES.get(skill, skill)
+
+
+def split_skills(text):
+    if not isinstance(text, str):
+        return []
+    seen = []
+    for part in _SPLIT_RE.split(text):
+        skill = normalize_skill(part)
+        if skill and skill not in seen:
+            seen.append(skill)
+    return seen
+
+
+def build_candidate_skill(data):
+    print("[LOG] Building candidate skill bridge table...")
+    candidate = data["candidate"][["candidate_id", "candidate_skills"]]
+    bridge = (
+        candidate
+        .assign(skill=candidate["candidate_skills"].map(split_skills))
+        .explode("skill")
+        .dropna(subset=["skill"])
+        [["candidate_id", "skill"]]
+        .drop_duplicates()
+        .sort_values(["skill", "candidate_id"])
+        .reset_index(drop=True)
+    )
+    return bridge
+
+
+def build_skill_index(data):
+    bridge = data["candidate_skill"]
+    return {skill: frozenset(ids) for skill, ids in bridge.groupby("skill")["candidate_id"]}
+
+
+def enable():
+    # Must run before hr_data.load_snapshot().
+    hr_data.register_artifact("candidate_skill", ["candidate"], build_candidate_skill)
+    hr_data.register_artifact("skill_index", ["candidate_skill"], build_skill_index)
+    hr_data.EXTRA_SQL_TABLES["candidate_skill"] = SKILL_TABLE_NAME
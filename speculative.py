@@ -0,0 +1,125 @@
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# ========= LOCAL ROUTER ========= #
+# Cheap keyword scorer used to decide whether speculation is worth its cost:
+# when it is confident the normal serial path runs, when it is unsure the
+# supervisor and the candidate branches are started together.
+
+_DATA_PATTERNS = [
+    r"\bhow many\b", r"\bcount\b", r"\bnumber of\b", r"\btotal\b", r"\baverage\b",
+    r"\bavg\b", r"\bmedian\b", r"\brate\b", r"\bpercentage\b", r"\bratio\b",
+    r"\bbreakdown\b", r"\bper\b", r"\bby (department|recruiter|stage|month|source|location)\b",
+    r"\btop \d+\b", r"\blist\b", r"\btrend\b", r"\bwhich (candidates|recruiters|requirements)\b",
+    r"\b(applications?|candidates?|interviews?|offers?|recruiters?|requirements?)\b",
+    r"\b[a-z]+_[a-z_]+\b", r"\b(19|20)\d{2}\b",
+    r"\b(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\b",
+]
+
+_GENERIC_PATTERNS = [
+    r"\bhow (to|do|should|can) (i|we)\b", r"\bbest practices?\b", r"\btips?\b",
+    r"\bwhat is\b", r"\bwhat are\b", r"\bshould\b", r"\bimprove\b", r"\bdesign\b",
+    r"\bwrite\b", r"\bpolicy\b", r"\bstrategy\b", r"\btypical\b", r"\bwhy\b",
+    r"\bexplain\b", r"\badvice\b", r"\bjob description\b", r"\bemployer brand",
+]
+
+
+def local_route(question: str):
+    q = question.lower()
+    data = sum(1 for p in _DATA_PATTERNS if re.search(p, q))
+    generic = sum(1 for p in _GENERIC_PATTERNS if re.search(p, q))
+    route = "specialist" if data >= generic else "generic"
+    confidence = abs(data - generic) / (data + generic + 1)
+    return route, confidence
+
+
+# ========= SPECULATIVE EXECUTION ========= #
+
+SPECULATION_STATS = {
+    "turns": 0,
+    "speculated": 0,
+    "cancelled_branches": 0,
+    "wasted_branches": 0,
+    "wasted_tokens": 0,
+    "latency_saved_s": 0.0,
+}
+_stats_lock = threading.Lock()
+
+
+def _measured(fn, usage_fn):
+    start = time.perf_counter()
+    out = {"value": None, "error": None, "tokens": 0}
+    try:
+        out["value"] = fn()
+    except Exception as e:
+        out["error"] = e
+    out["elapsed"] = time.perf_counter() - start
+    usage = usage_fn() if usage_fn else None
+    if usage is not None:
+        out["tokens"] = usage.total_tokens
+    return out
+
+
+def _count_waste(future):
+    out = future.result()
+    with _stats_lock:
+        SPECULATION_STATS["wasted_branches"] += 1
+        SPECULATION_STATS["wasted_tokens"] += out["tokens"]
+
+
+def run_speculative(router_fn, branch_fns, usage_fn=None):
+    # router_fn() -> (route, payload); branch_fns maps a route name to a
+    # zero-argument callable. Returns (route, payload, branch_result) where
+    # branch_result is None when the chosen route had no speculative branch.
+    # Branches that have not started are cancelled; in-flight ones cannot be
+    # interrupted, so their result is discarded and their tokens counted as waste.
+    with _stats_lock:
+        SPECULATION_STATS["speculated"] += 1
+    executor = ThreadPoolExecutor(max_workers=1 + len(branch_fns))
+    start = time.perf_counter()
+    router_future = executor.submit(_measured, router_fn, usage_fn)
+    branch_futures = {
+        name: executor.submit(_measured, fn, usage_fn) for name, fn in branch_fns.items()
+    }
+
+    router_out = router_future.result()
+    if router_out["error"] is not None:
+        for future in branch_futures.values():
+            if not future.cancel():
+                future.add_done_callback(_count_waste)
+        executor.shutdown(wait=False)
+        raise router_out["error"]
+    route, payload = router_out["value"]
+
+    winner = branch_futures.pop(route, None)
+    for name, future in branch_futures.items():
+        if future.cancel():
+            with _stats_lock:
+                SPECULATION_STATS["cancelled_branches"] += 1
+        else:
+            print(f"[LOG] Discarding speculative '{name}' branch.")
+            future.add_done_callback(_count_waste)
+    executor.shutdown(wait=False)
+
+    if winner is None:
+        return route, payload, None
+
+    branch_out = winner.result()
+    if branch_out["error"] is not None:
+        raise branch_out["error"]
+    wall = time.perf_counter() - start
+    serial = router_out["elapsed"] + branch_out["elapsed"]
+    with _stats_lock:
+        SPECULATION_STATS["latency_saved_s"] += max(0.0, serial - wall)
+    return route, payload, branch_out["value"]
+
+
+def print_speculation_stats():
+    s = SPECULATION_STATS
+    if not s["turns"]:
+        return
+    print(f"[STATS] Speculation: turns={s['turns']} speculated={s['speculated']} "
+          f"cancelled={s['cancelled_branches']} wasted_branches={s['wasted_branches']} "
+          f"wasted_tokens={s['wasted_tokens']} latency_saved={s['latency_saved_s']:.2f}s")
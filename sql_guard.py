@@ -0,0 +1,215 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+
+import duckdb
+import pandas as pd
+
+# ========= GUARDED SQL EXECUTION ========= #
+# LLM-written SQL runs under a plan check, a wall-clock timeout enforced with
+# DuckDB's interrupt, per-connection memory/thread limits and a row cap.
+# Only a single read-only SELECT (or WITH ... SELECT) statement is accepted.
+
+SQL_TIMEOUT_S = float(os.getenv("SQL_TIMEOUT_S", "15"))
+SQL_MAX_ROWS = int(os.getenv("SQL_MAX_ROWS", "10000"))
+SQL_MEMORY_LIMIT = os.getenv("SQL_MEMORY_LIMIT", "1GB")
+SQL_THREADS = int(os.getenv("SQL_THREADS", "4"))
+SQL_MAX_ESTIMATED_ROWS = int(os.getenv("SQL_MAX_ESTIMATED_ROWS", "50000000"))   # any operator
+SQL_MAX_CROSS_PRODUCT_ROWS = int(os.getenv("SQL_MAX_CROSS_PRODUCT_ROWS", "1000000"))
+
+# Operators whose output can be the product of their inputs.
+_PRODUCT_OPERATORS = {"CROSS_PRODUCT", "NESTED_LOOP_JOIN", "BLOCKWISE_NL_JOIN", "PIECEWISE_MERGE_JOIN"}
+# A product only counts as a blow-up when it is this many times its largest
+# input: joining every row to a one-row total (percent-of-total queries) or a
+# handful of rows stays linear.
+_PRODUCT_MARGIN = 10
+# Operators that always return one row but carry no estimate in the plan.
+_SINGLE_ROW_OPERATORS = {"UNGROUPED_AGGREGATE", "SIMPLE_AGGREGATE"}
+
+# DuckDB also parses PRAGMA/SHOW/DESCRIBE/SUMMARIZE as SELECT statements, so the
+# leading keyword is checked as well as the statement type.
+_LEADING_KEYWORD_RE = re.compile(r"^(?:\s+|--[^\n]*\n?|/\*.*?\*/|\()*(\w+)", re.S)
+_ALLOWED_KEYWORDS = {"select", "with"}
+
+QUERY_GUARD_STATS = {"executed": 0, "rejected_statement": 0, "rejected_plan": 0, "timed_out": 0, "truncated": 0, "failed": 0}
+KILLED_QUERIES = deque(maxlen=50)  # (timestamp, reason, elapsed_s, sql)
+_stats_lock = threading.Lock()
+
+
+class QueryRejected(RuntimeError):
+    pass
+
+
+class QueryTimeout(RuntimeError):
+    pass
+
+
+def _count(name):
+    with _stats_lock:
+        QUERY_GUARD_STATS[name] += 1
+
+
+def _record_kill(reason, elapsed, sql):
+    with _stats_lock:
+        KILLED_QUERIES.append((time.time(), reason, elapsed, sql))
+
+
+def configure_connection(con):
+    con.execute(f"SET memory_limit = '{SQL_MEMORY_LIMIT}'")
+    con.execute(f"SET threads = {SQL_THREADS}")
+    return con
+
+
+def _walk_plan(node):
+    # Returns (estimated rows of this node, largest estimate in subtree,
+    # largest product-operator estimate in subtree).
+    child_estimates = []
+    peak = 0
+    product_peak = 0
+    for child in node.get("children", []):
+        est, child_peak, child_product = _walk_plan(child)
+        child_estimates.append(est)
+        peak = max(peak, child_peak)
+        product_peak = max(product_peak, child_product)
+
+    raw = node.get("extra_info", {}).get("Estimated Cardinality")
+    try:
+        est = int(str(raw).replace(",", "")) if raw is not None else None
+    except ValueError:
+        est = None
+    name = node.get("name", "").strip()
+    if est is None and name in _SINGLE_ROW_OPERATORS:
+        est = 1
+    if name in _PRODUCT_OPERATORS:
+        product = 1
+        for e in child_estimates:
+            product *= max(e, 1)
+        est = max(est or 0, product)
+        if product > _PRODUCT_MARGIN * max(child_estimates, default=1):
+            product_peak = max(product_peak, product)
+    if est is None:
+        est = max(child_estimates, default=0)
+    return est, max(peak, est), product_peak
+
+
+def estimate_plan(con, sql: str, params=None):
+    # (largest estimated cardinality, largest cross/nested-loop product)
+    rows = con.execute("EXPLAIN (FORMAT json) " + sql, params).fetchall()
+    peak = 0
+    product_peak = 0
+    for _, plan_json in rows:
+        for root in json.loads(plan_json):
+            _, p, pp = _walk_plan(root)
+            peak = max(peak, p)
+            product_peak = max(product_peak, pp)
+    return peak, product_peak
+
+
+def check_statement(sql: str):
+    # Raises QueryRejected unless sql is exactly one SELECT/WITH statement.
+    statements = duckdb.extract_statements(sql)
+    if len(statements) != 1:
+        raise QueryRejected(f"Expected a single SQL statement, got {len(statements)}.")
+    statement_type = statements[0].type
+    keyword = _LEADING_KEYWORD_RE.match(sql)
+    keyword = keyword.group(1).lower() if keyword else ""
+    if statement_type != duckdb.StatementType.SELECT or keyword not in _ALLOWED_KEYWORDS:
+        raise QueryRejected(
+            f"Only SELECT queries are allowed (got {keyword.upper() or statement_type.name})."
+        )
+
+
+def check_plan(con, sql: str, params=None):
+    check_statement(sql)
+    try:
+        peak, product_peak = estimate_plan(con, sql, params)
+    except (duckdb.ParserException, duckdb.BinderException, duckdb.CatalogException):
+        raise
+    except Exception as e:
+        # Plans we cannot estimate are still protected by the timeout.
+        print(f"[LOG] Could not estimate query plan ({e}); relying on timeout.")
+        return
+    if product_peak > SQL_MAX_CROSS_PRODUCT_ROWS:
+        raise QueryRejected(
+            f"Query plan contains a cross/nested-loop join producing ~{product_peak:,} rows "
+            f"(limit {SQL_MAX_CROSS_PRODUCT_ROWS:,}). Add a join condition or filters."
+        )
+    if peak > SQL_MAX_ESTIMATED_ROWS:
+        raise QueryRejected(
+            f"Query plan estimates ~{peak:,} intermediate rows (limit {SQL_MAX_ESTIMATED_ROWS:,})."
+        )
+
+
+def guarded_execute(con, sql: str, timeout_s: float = SQL_TIMEOUT_S, max_rows: int = SQL_MAX_ROWS, params=None):
+    # Returns (result_df, truncated). Raises QueryRejected / QueryTimeout.
+    # params binds $name placeholders for parameterized statements.
+    configure_connection(con)
+    start = time.perf_counter()
+    try:
+        check_statement(sql)
+    except QueryRejected as e:
+        _count("rejected_statement")
+        _record_kill(str(e), 0.0, sql)
+        print(f"[LOG] Query rejected before planning: {e}")
+        raise
+    except duckdb.Error:
+        _count("failed")
+        raise
+    try:
+        check_plan(con, sql, params)
+    except QueryRejected as e:
+        _count("rejected_plan")
+        _record_kill(str(e), 0.0, sql)
+        print(f"[LOG] Query rejected before execution: {e}")
+        raise
+    except duckdb.Error:
+        _count("failed")
+        raise
+
+    timer = threading.Timer(timeout_s, con.interrupt)
+    timer.start()
+    try:
+        rel = con.sql(sql, params=params)
+        if rel is None:  # statement without a result set
+            result_df = pd.DataFrame()
+        else:
+            result_df = rel.limit(max_rows + 1).df()
+    except duckdb.InterruptException:
+        elapsed = time.perf_counter() - start
+        _count("timed_out")
+        _record_kill(f"timeout after {timeout_s}s", elapsed, sql)
+        print(f"[LOG] Query interrupted after {elapsed:.1f}s (limit {timeout_s}s).")
+        raise QueryTimeout(f"Query exceeded the {timeout_s}s time limit and was cancelled.")
+    except duckdb.OutOfMemoryException as e:
+        elapsed = time.perf_counter() - start
+        _count("failed")
+        _record_kill(f"out of memory ({SQL_MEMORY_LIMIT})", elapsed, sql)
+        raise QueryRejected(f"Query exceeded the {SQL_MEMORY_LIMIT} memory limit: {e}")
+    except duckdb.Error:
+        _count("failed")
+        raise
+    finally:
+        timer.cancel()
+
+    _count("executed")
+    truncated = len(result_df) > max_rows
+    if truncated:
+        _count("truncated")
+        result_df = result_df.head(max_rows)
+        print(f"[LOG] Result truncated to {max_rows} rows.")
+    return result_df, truncated
+
+
+def print_guard_stats():
+    s = QUERY_GUARD_STATS
+    if not any(s.values()):
+        return
+    print(f"[STATS] SQL guard: executed={s['executed']} rejected={s['rejected_plan']} "
+          f"not_select={s['rejected_statement']} "
+          f"timed_out={s['timed_out']} truncated={s['truncated']} failed={s['failed']}")
+    for ts, reason, elapsed, sql in list(KILLED_QUERIES)[-5:]:
+        print(f"[STATS]   killed {time.strftime('%H:%M:%S', time.localtime(ts))} "
+              f"({elapsed:.1f}s) {reason}: {' '.join(sql.split())[:120]}")
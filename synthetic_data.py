@@ -0,0 +1,324 @@
+import argparse
+import math
+import os
+import tempfile
+import time
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+import hr_data
+
+# ========= SYNTHETIC SCALE DATA ========= #
+# Referentially consistent versions of the six tables at any size, with the
+# skew real pipelines have: a few departments, recruiters, roles and sources
+# take most of the volume, candidates sometimes apply more than once, stages
+# form a funnel, and interviews/offers exist only for applications that got
+# that far, with dates in milestone order.
+
+DEPARTMENTS = ["Engineering", "Sales", "Operations", "Customer Support", "Finance", "Marketing", "HR", "Legal"]
+SOURCES = ["LinkedIn", "Referral", "Job Board", "Company Website", "Agency", "Campus", "Walk-in"]
+LOCATIONS = ["Bangalore", "Pune", "Hyderabad", "Delhi", "Mumbai", "Chennai", "Remote", "Kolkata"]
+SKILLS = ["Python", "SQL", "Excel", "Java", "AWS", "Communication", "Sales", "Node.js", "C++",
+          "Machine Learning", "Kubernetes", "Power BI", "Negotiation", "Accounting", "React"]
+STAGES = ["Applied", "Screening", "Interview", "Offer", "Hired"]
+STAGE_WEIGHTS = [0.38, 0.27, 0.2, 0.07, 0.08]
+APPLICATIONS_PER_CANDIDATE = 1.15
+
+
+def _zipf(k, s=1.1):
+    weights = 1.0 / np.arange(1, k + 1) ** s
+    return weights / weights.sum()
+
+
+def _pick(rng, values, n, s=1.1):
+    return np.asarray(values, dtype=object)[rng.choice(len(values), n, p=_zipf(len(values), s))]
+
+
+def _days(rng, n, low, high):
+    return pd.to_timedelta(rng.integers(low, high, n), unit="D")
+
+
+def generate(applications: int, seed: int = 0, start: str = "2023-01-01"):
+    rng = np.random.default_rng(seed)
+    n = int(applications)
+    n_cand = max(1, int(n / APPLICATIONS_PER_CANDIDATE))
+    n_req = max(20, n // 50)
+    n_rec = max(10, n // 1000)
+    origin = pd.Timestamp(start)
+
+    requirement_created = origin + _days(rng, n_req, 0, 700)
+    requirement_status = rng.choice(["Open", "Closed", "On Hold"], n_req, p=[0.45, 0.45, 0.1])
+    requirement = pd.DataFrame({
+        "requirement_id": np.arange(1, n_req + 1),
+        "requirement_job_title": [f"Role {i % 400}" for i in range(n_req)],
+        "requirement_department": _pick(rng, DEPARTMENTS, n_req),
+        "requirement_status": requirement_status,
+        "requirement_created_date": requirement_created,
+        "requirement_target_fill_date": requirement_created + _days(rng, n_req, 30, 120),
+        "requirement_filled_date": (requirement_created + _days(rng, n_req, 20, 180)).where(requirement_status == "Closed"),
+    })
+
+    recruiter = pd.DataFrame({
+        "recruiter_id": np.arange(1, n_rec + 1),
+        "recruiter_Name": [f"Recruiter {i}" for i in range(1, n_rec + 1)],
+        "recruiter_Email": [f"recruiter{i}@example.com" for i in range(1, n_rec + 1)],
+        "recruiter_department": _pick(rng, DEPARTMENTS, n_rec),
+        "recruiter_status": rng.choice(["Active", "Inactive"], n_rec, p=[0.9, 0.1]),
+    })
+
+    skill_count = rng.integers(1, 6, n_cand)
+    skill_idx = rng.choice(len(SKILLS), (n_cand, 5), p=_zipf(len(SKILLS), 0.9))
+    candidate = pd.DataFrame({
+        "candidate_id": np.arange(1, n_cand + 1),
+        "candidate_full_name": [f"Candidate {i}" for i in range(1, n_cand + 1)],
+        "candidate_email": [f"candidate{i}@example.com" for i in range(1, n_cand + 1)],
+        "candidate_phone": [f"+91 9{i:09d}" for i in range(1, n_cand + 1)],
+        "candidate_skills": [", ".join(dict.fromkeys(SKILLS[j] for j in row[:c])) for row, c in zip(skill_idx, skill_count)],
+        "candidate_experience_years": np.round(rng.gamma(2.0, 2.5, n_cand), 1),
+        "candidate_source_of_hire": _pick(rng, SOURCES, n_cand),
+        "candidate_application_date": origin + _days(rng, n_cand, 0, 730),
+        "candidate_gender": rng.choice(["Male", "Female", "Other"], n_cand, p=[0.55, 0.43, 0.02]),
+        "candidate_location": _pick(rng, LOCATIONS, n_cand, 0.8),
+    })
+
+    # Every candidate applies once; the remainder are repeat applications.
+    candidate_id = np.concatenate([candidate["candidate_id"].to_numpy(), rng.integers(1, n_cand + 1, n - n_cand)])
+    rng.shuffle(candidate_id)
+    applied_on = candidate["candidate_application_date"].to_numpy()[candidate_id - 1]
+    stage_idx = rng.choice(len(STAGES), n, p=STAGE_WEIGHTS)
+    application = pd.DataFrame({
+        "application_id": np.arange(1, n + 1),
+        "candidate_id": candidate_id,
+        "requirement_id": rng.choice(n_req, n, p=_zipf(n_req, 0.8)) + 1,
+        "screened_by_recruiter_id": rng.choice(n_rec, n, p=_zipf(n_rec, 0.7)) + 1,
+        "current_stage": np.asarray(STAGES)[stage_idx],
+        "stage_changed_date": applied_on + _days(rng, n, 0, 60) * (stage_idx + 1),
+        "screening_score": np.clip(rng.normal(68, 12, n), 0, 100).round(),
+        "status": np.where(rng.random(n) < 0.2, "Rejected", "Active"),
+    })
+
+    # Interviews only for applications that reached the interview stage.
+    reached = stage_idx >= STAGES.index("Interview")
+    rounds = np.where(reached, rng.integers(1, 5, n), (stage_idx == STAGES.index("Screening")) * rng.integers(0, 2, n))
+    interview_app = np.repeat(application["application_id"].to_numpy(), rounds)
+    round_no = np.concatenate([np.arange(1, r + 1) for r in rounds]) if rounds.sum() else np.array([], dtype=int)
+    n_int = len(interview_app)
+    interview_date = applied_on[interview_app - 1] + _days(rng, n_int, 5, 15) * round_no
+    interview_status = rng.choice(["Completed", "Scheduled", "Cancelled", "No Show"], n_int, p=[0.8, 0.08, 0.08, 0.04])
+    interview = pd.DataFrame({
+        "interview_id": np.arange(1, n_int + 1),
+        "application_id": interview_app,
+        "interview_date": interview_date,
+        "interview_round": round_no,
+        "interviewer_id": rng.choice(max(20, n_rec * 3), n_int, p=_zipf(max(20, n_rec * 3), 0.6)) + 1,
+        "interview_status": interview_status,
+        "interview_completed_date": pd.Series(interview_date).where(interview_status == "Completed").to_numpy(),
+    })
+
+    # Offers for applications at Offer/Hired; hires always accepted.
+    offered = np.flatnonzero(stage_idx >= STAGES.index("Offer"))
+    n_off = len(offered)
+    hired = stage_idx[offered] == STAGES.index("Hired")
+    offer_status = np.where(hired, "Accepted", rng.choice(["Pending", "Declined", "Accepted"], n_off, p=[0.5, 0.3, 0.2]))
+    offer_date = applied_on[offered] + _days(rng, n_off, 20, 80)
+    acceptance = pd.Series(offer_date + _days(rng, n_off, 1, 10)).where(offer_status == "Accepted")
+    start_date = acceptance + _days(rng, n_off, 15, 60)
+    slip = pd.Series(_days(rng, n_off, -3, 20)).where(rng.random(n_off) < 0.3, pd.Timedelta(0))
+    offer = pd.DataFrame({
+        "offer_id": np.arange(1, n_off + 1),
+        "offer_candidate_id": candidate_id[offered],
+        "offer_date": offer_date,
+        "offer_status": offer_status,
+        "offer_acceptance_date": acceptance.to_numpy(),
+        "Candidate_start_date": start_date.to_numpy(),
+        "Candidate_actual_start_date": (start_date + slip).where(hired).to_numpy(),
+    })
+
+    data = {
+        "application": application,
+        "candidate": candidate,
+        "interview": interview,
+        "offer": offer,
+        "recruiter": recruiter,
+        "requirement": requirement,
+    }
+    return {name: hr_data.apply_dtypes(table, hr_data.TABLE_COLUMNS[name]) for name, table in data.items()}
+
+
+def write_tables(data, out_dir: str, fmt: str = "xlsx"):
+    # xlsx uses the file names hr_data expects; sheets cap at 1,048,575 rows.
+    os.makedirs(out_dir, exist_ok=True)
+    for name, table in data.items():
+        if fmt == "xlsx":
+            table.to_excel(os.path.join(out_dir, hr_data.TABLE_FILES[name]), index=False)
+        else:
+            table.to_parquet(os.path.join(out_dir, f"{name}.parquet"), index=False)
+    return out_dir
+
+
+# ========= SCALING BENCHMARK ========= #
+# Per scale: Excel load (small scales only), Parquet load, every registered
+# snapshot artifact (interview_agg, offer_agg, df, ...) and a fixed SQL
+# workload. The fitted exponent between consecutive scales flags anything
+# growing faster than linearly.
+
+_T = hr_data.SQL_TABLE_NAMES
+WORKLOAD = {
+    "stage counts": f"SELECT current_stage, COUNT(*) FROM {_T['application']} GROUP BY current_stage",
+    "apps per department": f"""
+        SELECT r.requirement_department, COUNT(*) FROM {_T['application']} a
+        JOIN {_T['requirement']} r ON a.requirement_id = r.requirement_id GROUP BY 1""",
+    "recruiter funnel": f"""
+        SELECT rec.recruiter_Name, COUNT(*) AS apps, SUM(a.current_stage = 'Hired') AS hires
+        FROM {_T['application']} a JOIN {_T['recruiter']} rec ON a.screened_by_recruiter_id = rec.recruiter_id
+        GROUP BY 1 ORDER BY hires DESC LIMIT 10""",
+    "interviews per application": f"""
+        SELECT a.current_stage, AVG(n) FROM {_T['application']} a
+        JOIN (SELECT application_id, COUNT(*) AS n FROM {_T['interview']} GROUP BY 1) i
+          ON a.application_id = i.application_id GROUP BY 1""",
+    "offer acceptance by source": f"""
+        SELECT c.candidate_source_of_hire, AVG((o.offer_status = 'Accepted')::INT) AS acceptance
+        FROM {_T['offer']} o JOIN {_T['candidate']} c ON o.offer_candidate_id = c.candidate_id GROUP BY 1""",
+    "monthly applications": f"""
+        SELECT date_trunc('month', candidate_application_date) AS month, COUNT(*)
+        FROM {_T['candidate']} GROUP BY 1 ORDER BY 1""",
+    "time to fill by department": f"""
+        SELECT requirement_department,
+               AVG(date_diff('day', requirement_created_date, requirement_filled_date))
+        FROM {_T['requirement']} WHERE requirement_filled_date IS NOT NULL GROUP BY 1""",
+    "top recruiters per department": f"""
+        SELECT * FROM (
+            SELECT r.requirement_department, rec.recruiter_Name, COUNT(*) AS apps,
+                   row_number() OVER (PARTITION BY r.requirement_department ORDER BY COUNT(*) DESC) AS rk
+            FROM {_T['application']} a
+            JOIN {_T['requirement']} r ON a.requirement_id = r.requirement_id
+            JOIN {_T['recruiter']} rec ON a.screened_by_recruiter_id = rec.recruiter_id
+            GROUP BY 1, 2) WHERE rk <= 3""",
+}
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    value = fn()
+    return value, time.perf_counter() - start
+
+
+def benchmark_scale(applications: int, excel_max: int, tmp: str):
+    timings = {}
+    data, timings["generate"] = _timed(lambda: generate(applications))
+    scale_dir = os.path.join(tmp, str(applications))
+    if applications <= excel_max:
+        write_tables(data, scale_dir, "xlsx")
+        (data, _), timings["load (excel)"] = _timed(lambda: hr_data.load_tables(hr_data.TABLE_FILES, scale_dir))
+    write_tables(data, scale_dir, "parquet")
+    _, timings["load (parquet)"] = _timed(lambda: {
+        name: pd.read_parquet(os.path.join(scale_dir, f"{name}.parquet")) for name in hr_data.TABLE_FILES
+    })
+
+    for name, deps, builder in hr_data.ARTIFACTS:
+        data[name], timings[f"build {name}"] = _timed(lambda: builder(data))
+
+    con = duckdb.connect()
+    hr_data.register_tables(con, {"data": data})
+    for label, sql in WORKLOAD.items():
+        _, timings[f"sql {label}"] = _timed(lambda: con.execute(sql).fetchall())
+    con.close()
+    return timings
+
+
+def _exponents(results, stage):
+    scales = sorted(s for s in results if stage in results[s])
+    return [
+        math.log(max(results[b][stage], 1e-6) / max(results[a][stage], 1e-6)) / math.log(b / a)
+        for a, b in zip(scales, scales[1:])
+    ]
+
+
+def plot(results, path):
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("[LOG] matplotlib is not installed; skipping the plot (see the CSV).")
+        return None
+    stages = list(next(iter(results.values())))
+    groups = {
+        "load / build": [s for s in stages if not s.startswith("sql ")],
+        "SQL workload": [s for s in stages if s.startswith("sql ")],
+    }
+    fig, axes = plt.subplots(1, 2, figsize=(14, 6))
+    for ax, (title, names) in zip(axes, groups.items()):
+        for stage in names:
+            scales = sorted(s for s in results if stage in results[s])
+            ax.plot(scales, [results[s][stage] for s in scales], marker="o", label=stage)
+        ax.set_xscale("log")
+        ax.set_yscale("log")
+        ax.set_xlabel("applications")
+        ax.set_ylabel("seconds")
+        ax.set_title(title)
+        ax.grid(True, which="both", alpha=0.3)
+        ax.legend(fontsize=7)
+    fig.tight_layout()
+    fig.savefig(path, dpi=120)
+    plt.close(fig)
+    return path
+
+
+def benchmark(scales, excel_max: int = 10_000, out_dir: str = "scaling_results"):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in scales:
+            print(f"[LOG] Benchmarking {scale:,} applications...")
+            results[scale] = benchmark_scale(scale, excel_max, tmp)
+
+    os.makedirs(out_dir, exist_ok=True)
+    rows = [(scale, stage, seconds) for scale, t in results.items() for stage, seconds in t.items()]
+    csv_path = os.path.join(out_dir, "scaling.csv")
+    pd.DataFrame(rows, columns=["applications", "stage", "seconds"]).to_csv(csv_path, index=False)
+
+    stages = list(dict.fromkeys(stage for t in results.values() for stage in t))
+    print(f"\n{'stage':34}" + "".join(f"{s:>12,}" for s in scales) + "   exponent")
+    for stage in stages:
+        cells = "".join(f"{results[s][stage]:12.3f}" if stage in results[s] else f"{'-':>12}" for s in scales)
+        exps = _exponents(results, stage)
+        worst = max(exps) if exps else float("nan")
+        flag = "  <- superlinear" if worst > 1.3 and max(results[s].get(stage, 0) for s in scales) > 0.05 else ""
+        print(f"{stage[:34]:34}{cells}   {worst:8.2f}{flag}")
+    print(f"\nResults written to {csv_path}")
+    png = plot(results, os.path.join(out_dir, "scaling.png"))
+    if png:
+        print(f"Plot written to {png}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Synthetic HR tables and scaling benchmark")
+    sub = parser.add_subparsers(dest="command", required=True)
+    gen = sub.add_parser("generate", help="write synthetic tables")
+    gen.add_argument("applications", type=float)
+    gen.add_argument("out_dir")
+    gen.add_argument("--format", choices=["xlsx", "parquet"], default="xlsx")
+    gen.add_argument("--seed", type=int, default=0)
+    bench = sub.add_parser("bench", help="scaling benchmark")
+    bench.add_argument("--scales", default="1e3,1e4,1e5,1e6", help="comma-separated application counts")
+    bench.add_argument("--excel-max", type=float, default=1e4, help="largest scale also loaded from xlsx")
+    bench.add_argument("--out", default="scaling_results")
+    bench.add_argument("--full", action="store_true", help="include skills, timeline, profile and template artifacts")
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        write_tables(generate(int(args.applications), seed=args.seed), args.out_dir, args.format)
+    else:
+        if args.full:
+            import column_profile
+            import query_templates
+            import skills_index
+            import timeline
+            skills_index.enable()
+            query_templates.enable()
+            timeline.enable()
+            column_profile.enable()
+        benchmark([int(float(s)) for s in args.scales.split(",")], int(args.excel_max), args.out)
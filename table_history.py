@@ -0,0 +1,341 @@
+import json
+import os
+import socket
+import sys
+import tempfile
+import time
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+import hr_data
+
+# ========= VERSIONED TABLE HISTORY ========= #
+# Append-only history of the six tables. Every recorded snapshot that differs
+# from the previous one gets a new version; per table only the delta is
+# written, keyed by primary key: upserted rows in full (_op = 'U') and deleted
+# keys (_op = 'D'). Files are never rewritten, so any number of processes can
+# read while one records.
+#
+# Layout: <HISTORY_DIR>/<table>/_version=<n>/delta.parquet plus versions.jsonl
+# (one line per version: number, recorded_at, per-table change counts).
+# A table as of version v is, per key, the newest delta row with
+# _version <= v unless that row is a delete.
+
+HISTORY_DIR = os.getenv(
+    "HR_HISTORY_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "hr_history"),
+)
+
+# A .lock whose owner is gone (dead pid on this host) or that is older than
+# this is left over from a crashed or killed recorder and gets broken.
+LOCK_STALE_S = float(os.getenv("HR_HISTORY_LOCK_STALE_S", "600"))
+
+PRIMARY_KEYS = {
+    "application": "application_id",
+    "candidate": "candidate_id",
+    "interview": "interview_id",
+    "offer": "offer_id",
+    "recruiter": "recruiter_id",
+    "requirement": "requirement_id",
+}
+
+PROMPT_HINT = """
+History: for "as of" / "at end of <period>" questions use the table macros
+<table>_as_of(version), e.g. application_table_100_as_of(3), which return a table
+exactly as it was at that recorded version. version_at(TIMESTAMP '2024-05-31 23:59:59')
+gives the last version recorded at or before a time, so the pipeline at end of May is
+application_table_100_as_of(version_at(TIMESTAMP '2024-05-31 23:59:59')).
+history_versions(version, recorded_at) lists the recorded versions.
+"""
+
+
+class HistoryLocked(RuntimeError):
+    pass
+
+
+def _versions_path(root):
+    return os.path.join(root, "versions.jsonl")
+
+
+def list_versions(root: str = HISTORY_DIR):
+    path = _versions_path(root)
+    if not os.path.exists(path):
+        return pd.DataFrame({"version": pd.Series(dtype="int64"), "recorded_at": pd.Series(dtype="datetime64[us]")})
+    with open(path) as fh:
+        rows = [json.loads(line) for line in fh if line.strip()]
+    versions = pd.DataFrame(rows)
+    versions["recorded_at"] = pd.to_datetime(versions["recorded_at"])
+    return versions
+
+
+def version_at(at, root: str = HISTORY_DIR):
+    # Version with the latest recorded_at at or before `at`, or None. Backfilled
+    # extracts get a new version number but an old recorded_at.
+    versions = list_versions(root)
+    eligible = versions[versions["recorded_at"] <= pd.Timestamp(at)]
+    if not len(eligible):
+        return None
+    return int(eligible.sort_values(["recorded_at", "version"])["version"].iloc[-1])
+
+
+def _delta_glob(root, name):
+    return os.path.join(root, name, "*", "*.parquet").replace("'", "''")
+
+
+def as_of_sql(root, name, version_expr):
+    key = PRIMARY_KEYS[name]
+    return f"""
+        SELECT * EXCLUDE (_version, _op, _hash)
+        FROM read_parquet('{_delta_glob(root, name)}', hive_partitioning = true,
+                          hive_types = {{'_version': INTEGER}}, union_by_name = true)
+        WHERE _version <= {version_expr}
+        QUALIFY row_number() OVER (PARTITION BY "{key}" ORDER BY _version DESC) = 1 AND _op <> 'D'
+    """
+
+
+def _table_exists(root, name):
+    return os.path.isdir(os.path.join(root, name)) and any(os.scandir(os.path.join(root, name)))
+
+
+def register_history(con, root: str = HISTORY_DIR):
+    # Expose history_versions, version_at(ts) and <sql table>_as_of(v) on a connection.
+    con.register("history_versions", list_versions(root)[["version", "recorded_at"]])
+    con.execute(
+        "CREATE OR REPLACE TEMP MACRO version_at(ts) AS "
+        "(SELECT arg_max(version, recorded_at) FROM history_versions WHERE recorded_at <= ts)"
+    )
+    for name, sql_name in hr_data.SQL_TABLE_NAMES.items():
+        if _table_exists(root, name):
+            con.execute(f'CREATE OR REPLACE TEMP MACRO "{sql_name}_as_of"(v) AS TABLE {as_of_sql(root, name, "v")}')
+
+
+def as_of(name: str, version: int = None, at=None, root: str = HISTORY_DIR):
+    # One table as of a version (or the last version at or before `at`).
+    if version is None:
+        version = version_at(at, root) if at is not None else int(list_versions(root)["version"].max())
+    if version is None:
+        raise LookupError(f"No history recorded at or before {at}")
+    con = duckdb.connect()
+    try:
+        return con.sql(as_of_sql(root, name, int(version))).df()
+    finally:
+        con.close()
+
+
+# ========= RECORDING ========= #
+
+def _row_hashes(table: pd.DataFrame):
+    return pd.util.hash_pandas_object(table, index=False).to_numpy()
+
+
+def _current_hashes(con, root, name, key_dtype):
+    if not _table_exists(root, name):
+        return pd.DataFrame({"key": pd.Series(dtype=key_dtype), "_hash": pd.Series(dtype="uint64")})
+    key = PRIMARY_KEYS[name]
+    return con.sql(f"""
+        SELECT "{key}" AS key, _hash
+        FROM read_parquet('{_delta_glob(root, name)}', hive_partitioning = true,
+                          hive_types = {{'_version': INTEGER}}, union_by_name = true)
+        QUALIFY row_number() OVER (PARTITION BY "{key}" ORDER BY _version DESC) = 1 AND _op <> 'D'
+    """).df()
+
+
+def _delta(con, root, name, table):
+    # (upserts, deleted keys) of `table` against the latest recorded version.
+    key = PRIMARY_KEYS[name]
+    table = table[table[key].notna()]
+    if table[key].duplicated().any():
+        print(f"[LOG] History: {name} has duplicate {key} values; keeping the last row per key.")
+        table = table.drop_duplicates(key, keep="last")
+    table = table.assign(_hash=_row_hashes(table))
+    current = _current_hashes(con, root, name, table[key].dtype)
+    merged = table[[key, "_hash"]].merge(
+        current.rename(columns={"key": key, "_hash": "_old"}), on=key, how="left"
+    )
+    changed = merged["_old"].isna() | (merged["_hash"] != merged["_old"])
+    upserts = table[changed.to_numpy()]
+    deleted = current.loc[~current["key"].isin(table[key]), "key"]
+    return upserts, deleted
+
+
+def _write_delta(con, root, name, version, upserts, deleted):
+    key = PRIMARY_KEYS[name]
+    out_dir = os.path.join(root, name, f"_version={version}")
+    os.makedirs(out_dir, exist_ok=True)
+    deletes = pd.DataFrame({key: deleted.astype(upserts[key].dtype)})
+    frame = pd.concat([upserts.assign(_op="U"), deletes.assign(_op="D")], ignore_index=True)
+    # Written under a temporary name so readers never see a partial file.
+    tmp = os.path.join(out_dir, "delta.parquet.tmp")
+    con.register("delta", frame)
+    target = tmp.replace("'", "''")
+    con.execute(f"COPY (SELECT * FROM delta) TO '{target}' (FORMAT parquet)")
+    con.unregister("delta")
+    os.replace(tmp, os.path.join(out_dir, "delta.parquet"))
+
+
+def _lock_owner(path):
+    # (pid, host, created) from a lock file; None for fields it lacks.
+    try:
+        with open(path) as fh:
+            owner = json.load(fh)
+    except (OSError, ValueError):
+        owner = {}
+    if "created" not in owner:
+        try:
+            owner["created"] = os.path.getmtime(path)
+        except FileNotFoundError:
+            owner["created"] = time.time()
+    return owner.get("pid"), owner.get("host"), owner["created"]
+
+
+def _lock_is_stale(path):
+    pid, host, created = _lock_owner(path)
+    if time.time() - created > LOCK_STALE_S:
+        return True
+    return pid is not None and host == socket.gethostname() and not hr_data.pid_alive(pid)
+
+
+def _lock(root):
+    path = os.path.join(root, ".lock")
+    for _ in range(2):
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            if not _lock_is_stale(path):
+                pid, host, created = _lock_owner(path)
+                raise HistoryLocked(f"{path} is held by pid {pid} on {host} since "
+                                    f"{time.strftime('%H:%M:%S', time.localtime(created))}")
+            print(f"[LOG] Breaking stale history lock {path}.")
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            continue
+        with os.fdopen(fd, "w") as fh:
+            json.dump({"pid": os.getpid(), "host": socket.gethostname(), "created": time.time()}, fh)
+        return path
+    raise HistoryLocked(f"{path} was taken again while breaking a stale lock")
+
+
+def record(data, root: str = HISTORY_DIR, recorded_at=None):
+    # Record the tables in `data` as a new version if anything changed.
+    # Returns the version describing the data (new or unchanged).
+    os.makedirs(root, exist_ok=True)
+    lock = _lock(root)
+    try:
+        versions = list_versions(root)
+        version = int(versions["version"].max()) + 1 if len(versions) else 1
+        con = duckdb.connect()
+        deltas = {name: _delta(con, root, name, data[name]) for name in PRIMARY_KEYS}
+        counts = {name: {"upserted": len(u), "deleted": len(d)} for name, (u, d) in deltas.items()}
+        if len(versions) and not any(c["upserted"] or c["deleted"] for c in counts.values()):
+            con.close()
+            return version - 1
+        for name, (upserts, deleted) in deltas.items():
+            if len(upserts) or len(deleted) or not _table_exists(root, name):
+                _write_delta(con, root, name, version, upserts, deleted)
+        con.close()
+        recorded_at = pd.Timestamp(recorded_at) if recorded_at is not None else pd.Timestamp.now()
+        with open(_versions_path(root), "a") as fh:
+            fh.write(json.dumps({"version": version, "recorded_at": recorded_at.isoformat(), "tables": counts}) + "\n")
+    finally:
+        os.remove(lock)
+    changed = ", ".join(f"{n} +{c['upserted']}/-{c['deleted']}" for n, c in counts.items() if c["upserted"] or c["deleted"])
+    print(f"[LOG] Recorded history version {version} ({changed or 'initial'}).")
+    return version
+
+
+def build_history_version(data):
+    try:
+        return record(data)
+    except HistoryLocked as e:
+        print(f"[LOG] History not recorded: {e}")
+        return None
+
+
+def enable():
+    # Must run before hr_data.load_snapshot(); records on load and every refresh.
+    hr_data.register_artifact("history_version", list(PRIMARY_KEYS), build_history_version)
+
+
+# ========= STORAGE / AS-OF BENCHMARK ========= #
+# Synthetic application history: each version moves `churn` of the rows to a
+# new stage and appends `growth` new rows. Compares delta storage with keeping
+# a full copy per version, and times as-of reads of early/middle/latest versions.
+
+def _synthetic_versions(rows, versions, churn, growth, seed=0):
+    rng = np.random.default_rng(seed)
+    stages = np.array(["Applied", "Screening", "Interview", "Offer", "Hired", "Rejected"])
+    table = pd.DataFrame({
+        "application_id": np.arange(1, rows + 1),
+        "candidate_id": rng.integers(1, rows, rows),
+        "requirement_id": rng.integers(1, 500, rows),
+        "current_stage": rng.choice(stages, rows),
+        "stage_changed_date": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365, rows), unit="D"),
+        "screening_score": rng.integers(40, 100, rows).astype(float),
+    })
+    for v in range(versions):
+        yield v, table
+        moved = rng.random(len(table)) < churn
+        table = table.copy()
+        table.loc[moved, "current_stage"] = rng.choice(stages, int(moved.sum()))
+        new = int(len(table) * growth)
+        start = int(table["application_id"].max()) + 1
+        extra = table.sample(new, random_state=v).assign(application_id=np.arange(start, start + new))
+        table = pd.concat([table, extra], ignore_index=True)
+
+
+def _dir_bytes(path):
+    return sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(path) for f in files)
+
+
+def benchmark(rows=200_000, versions=30, churn=0.02, growth=0.01, repeat=3):
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, "history")
+        full_bytes = 0
+        record_s = []
+        con = duckdb.connect()
+        for v, table in _synthetic_versions(rows, versions, churn, growth):
+            data = {name: pd.DataFrame({PRIMARY_KEYS[name]: pd.Series(dtype="int64")}) for name in PRIMARY_KEYS}
+            data["application"] = table
+            start = time.perf_counter()
+            record(data, root, recorded_at=pd.Timestamp("2024-01-01") + pd.Timedelta(days=v))
+            record_s.append(time.perf_counter() - start)
+            full = os.path.join(tmp, "full.parquet").replace("'", "''")
+            con.register("t", table)
+            con.execute(f"COPY t TO '{full}' (FORMAT parquet)")
+            full_bytes += os.path.getsize(full)
+        con.close()
+        delta_bytes = _dir_bytes(os.path.join(root, "application"))
+        print(f"\n{versions} versions of {rows:,}+ rows, {churn:.0%} churn and {growth:.0%} growth per version")
+        print(f"delta store {delta_bytes / 1e6:8.1f} MB   full copy per version {full_bytes / 1e6:8.1f} MB"
+              f"   ({full_bytes / delta_bytes:.1f}x)")
+        print(f"record per version: avg {np.mean(record_s) * 1000:.0f} ms, max {max(record_s) * 1000:.0f} ms")
+        con = duckdb.connect()
+        register_history(con, root)
+        for label, v in (("first", 1), ("middle", versions // 2), ("latest", versions)):
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                n = con.sql(f"SELECT COUNT(*) FROM application_table_100_as_of({v})").fetchone()[0]
+                timings.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            con.sql(f"""SELECT current_stage, COUNT(*) FROM application_table_100_as_of({v})
+                        GROUP BY current_stage""").fetchall()
+            grouped = time.perf_counter() - start
+            print(f"as-of {label:6} v{v:<4} rows={n:>9,}  count {min(timings) * 1000:7.1f} ms"
+                  f"  group by stage {grouped * 1000:7.1f} ms")
+        con.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "record":
+        # python table_history.py record [DATA_DIR] [RECORDED_AT] - backfill an old extract.
+        data_dir = sys.argv[2] if len(sys.argv) > 2 else hr_data.DATA_DIR
+        at = sys.argv[3] if len(sys.argv) > 3 else None
+        tables, _ = hr_data.load_tables(hr_data.TABLE_FILES, data_dir)
+        record(tables, recorded_at=at)
+    else:
+        benchmark()
@@ -0,0 +1,53 @@
+import os
+import subprocess
+import sys
+import time
+
+import arrow_snapshot
+
+
+def make_builds(root, ages_s):
+    now = time.time_ns()
+    names = []
+    for age in ages_s:
+        name = f"build-{now - int(age * 1e9)}"
+        os.makedirs(root / name)
+        names.append(name)
+    return names
+
+
+def dead_pid():
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+
+def test_cleanup_keeps_recent_and_mapped_builds(tmp_path):
+    old, mapped, stale_reader, recent, current = make_builds(tmp_path, [900, 800, 700, 30, 10])
+    (tmp_path / mapped / f"reader-{os.getpid()}").touch()
+    (tmp_path / stale_reader / f"reader-{dead_pid()}").touch()
+
+    arrow_snapshot._cleanup_old_builds(str(tmp_path), keep=2)
+
+    left = sorted(os.listdir(tmp_path))
+    # stale_reader is kept: its successor (recent) is inside the grace period.
+    assert left == [mapped, stale_reader, recent, current]
+
+    arrow_snapshot._cleanup_old_builds(str(tmp_path), keep=1)
+    assert stale_reader in os.listdir(tmp_path)
+
+
+def test_dead_reader_does_not_pin_a_build(tmp_path):
+    first, second, third = make_builds(tmp_path, [900, 800, 700])
+    (tmp_path / first / f"reader-{dead_pid()}").touch()
+    arrow_snapshot._cleanup_old_builds(str(tmp_path), keep=2)
+    assert sorted(os.listdir(tmp_path)) == [second, third]
+
+
+def test_mark_reader_moves_the_marker(tmp_path):
+    first, second = make_builds(tmp_path, [20, 10])
+    marker = f"reader-{os.getpid()}"
+    arrow_snapshot._mark_reader(str(tmp_path), first)
+    arrow_snapshot._mark_reader(str(tmp_path), second)
+    assert not (tmp_path / first / marker).exists()
+    assert (tmp_path / second / marker).exists()
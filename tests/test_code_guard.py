@@ -0,0 +1,99 @@
+import pandas as pd
+import pytest
+
+import code_guard
+
+SOURCE = 'result_df = df[df.apply(lambda r: r["a"] > 1, axis=1)]'
+
+
+def namespace():
+    return {"df": pd.DataFrame({"a": [1, 2, 3]}), "pd": pd}
+
+
+def test_rewrite_runs_without_shadow_when_not_sampled(monkeypatch):
+    monkeypatch.setattr(code_guard, "_cache", code_guard.OrderedDict())
+    monkeypatch.setattr(code_guard, "CODE_GUARD_SHADOW_RATE", 0.0)
+    ns = code_guard.run(SOURCE, namespace)
+    entry = code_guard.prepare(SOURCE)
+    assert entry.use_rewrite and not entry.shadowed
+    assert ns["result_df"]["a"].tolist() == [2, 3]
+
+
+def test_sampled_shadow_checks_result_in_background(monkeypatch):
+    monkeypatch.setattr(code_guard, "_cache", code_guard.OrderedDict())
+    monkeypatch.setattr(code_guard, "CODE_GUARD_SHADOW_RATE", 1.0)
+    code_guard.run(SOURCE, namespace)
+    code_guard.wait_for_shadows()
+    entry = code_guard.prepare(SOURCE)
+    assert entry.shadowed and entry.use_rewrite
+    assert entry.saved_s is not None
+
+
+def frame():
+    return pd.DataFrame({
+        "name": pd.Series(["Ann", None, "bob", "Cy", float("nan")], dtype=object),
+        "dept": ["IT", "HR", None, "IT", "Sales"],
+        "score": [1.5, float("nan"), 3.0, 4.25, 2.0],
+        "n": [1, 2, 3, 4, 5],
+        "when": pd.to_datetime(["2024-01-05", None, "2024-03-01", "2024-12-31", "2023-06-30"]),
+        "skills": ["python, sql", None, "excel", "Python", "r"],
+    })
+
+
+# Each snippet exercises one translation on columns holding NaN / None / NaT
+# and must run row-wise without error, so both versions produce a result.
+REWRITE_CASES = {
+    "arithmetic": 'result_df = pd.DataFrame({"v": [v * 2 + 1 for v in df["score"]]})',
+    "comparison": 'result_df = pd.DataFrame({"v": [v > 2 for v in df["score"]]})',
+    "string equality": 'result_df = pd.DataFrame({"v": [d == "IT" for d in df["dept"]]})',
+    "isin": 'result_df = pd.DataFrame({"v": [d in ["IT", "HR"] for d in df["dept"]]})',
+    "not in": 'result_df = pd.DataFrame({"v": [d not in ("IT",) for d in df["dept"]]})',
+    "pd.isna": 'result_df = pd.DataFrame({"v": [pd.isna(v) for v in df["name"]]})',
+    "not": 'result_df = pd.DataFrame({"v": [not (v > 2) for v in df["score"]]})',
+    "and": 'result_df = pd.DataFrame({"v": [v > 1 and v < 4 for v in df["score"]]})',
+    "or guard": 'result_df = pd.DataFrame({"v": [pd.isna(v) or v.startswith("A") for v in df["name"]]})',
+    "and guard": 'result_df = pd.DataFrame({"v": [pd.notna(v) and v.startswith("A") for v in df["name"]]})',
+    "substring": 'result_df = pd.DataFrame({"v": [pd.notna(s) and "python" in s for s in df["skills"]]})',
+    "str method": 'result_df = pd.DataFrame({"v": [v.lower() for v in df["name"] if pd.notna(v)]})',
+    "str replace": 'result_df = pd.DataFrame({"v": [v.replace(".", "") for v in df["dept"] if pd.notna(v)]})',
+    "len": 'result_df = pd.DataFrame({"v": [len(v) for v in df["name"] if pd.notna(v)]})',
+    "float": 'result_df = pd.DataFrame({"v": [float(v) for v in df["score"]]})',
+    "abs": 'result_df = pd.DataFrame({"v": [abs(v - 3) for v in df["score"]]})',
+    "round": 'result_df = pd.DataFrame({"v": [round(v, 1) for v in df["score"]]})',
+    "dt field": 'result_df = pd.DataFrame({"v": [t.year for t in df["when"]]})',
+    "dt method": 'result_df = pd.DataFrame({"v": [t.strftime("%Y-%m") for t in df["when"] if pd.notna(t)]})',
+    "if expression": 'result_df = pd.DataFrame({"v": [v * 10 if v > 2 else 0 for v in df["score"]]})',
+    "if expression labels": 'result_df = pd.DataFrame({"v": ["high" if v > 2 else "low" for v in df["score"]]})',
+    "zip": 'result_df = pd.DataFrame({"v": [a * b for a, b in zip(df["score"], df["n"])]})',
+    "iterrows": 'result_df = pd.DataFrame({"v": [r["score"] + r["n"] for _, r in df.iterrows()]})',
+    "itertuples": 'result_df = pd.DataFrame({"v": [r.score > 2 for r in df.itertuples()]})',
+    "filter": 'result_df = pd.DataFrame({"v": [n for n, s in zip(df["n"], df["score"]) if s > 2]})',
+    "append loop": ('out = []\nfor v in df["score"]:\n    if v > 2:\n        out.append(v)\n'
+                    'result_df = pd.DataFrame({"v": out})'),
+    "map lambda": 'result_df = df["score"].map(lambda v: v * 10 if v > 2 else 0).to_frame()',
+    "apply lambda": 'result_df = df["dept"].apply(lambda d: d == "IT").to_frame()',
+    "apply axis=1": 'result_df = df.apply(lambda r: r["score"] > 2 and r["n"] < 5, axis=1).to_frame("v")',
+}
+
+
+@pytest.mark.parametrize("name", REWRITE_CASES)
+def test_rewrite_matches_original_with_missing_values(name, monkeypatch):
+    monkeypatch.setattr(code_guard, "_cache", code_guard.OrderedDict())
+    source = REWRITE_CASES[name]
+    entry = code_guard.prepare(source)
+    assert entry.use_rewrite, f"{name} was not rewritten"
+
+    original, rewritten = {"df": frame(), "pd": pd}, {"df": frame(), "pd": pd}
+    exec(entry.original, original)
+    exec(entry.code, rewritten)
+    pd.testing.assert_frame_equal(rewritten["result_df"], original["result_df"],
+                                  check_dtype=False, check_index_type=False)
+
+
+@pytest.mark.parametrize("source", [
+    'result_df = pd.DataFrame({"v": [str(v) for v in df["score"]]})',
+    'result_df = pd.DataFrame({"v": [v == None for v in df["name"]]})',
+])
+def test_rewrites_that_change_missing_values_are_not_applied(source, monkeypatch):
+    monkeypatch.setattr(code_guard, "_cache", code_guard.OrderedDict())
+    assert not code_guard.prepare(source).use_rewrite
@@ -0,0 +1,81 @@
+import json
+
+import pandas as pd
+import pytest
+
+from few_shot import FewShotStore, record_confirmed
+
+SEED = [
+    {"question": "How many offers were accepted per department?",
+     "sql": "SELECT department, COUNT(*) FROM offer WHERE status = 'Accepted' GROUP BY 1"},
+    {"question": "Average interview rating by interviewer",
+     "sql": "SELECT interviewer, AVG(rating) FROM interview GROUP BY 1"},
+    {"question": "List open requirements for the data team",
+     "sql": "SELECT * FROM requirement WHERE status = 'Open'"},
+]
+
+ROWS = pd.DataFrame({"n": [1]})
+
+
+@pytest.fixture
+def store(tmp_path):
+    seed = tmp_path / "seed.jsonl"
+    seed.write_text("".join(json.dumps(ex) + "\n" for ex in SEED), encoding="utf-8")
+    return FewShotStore(path=str(seed), record_path=str(tmp_path / "recorded.jsonl"))
+
+
+def _recorded(store):
+    try:
+        with open(store.record_path, encoding="utf-8") as fh:
+            return [json.loads(line) for line in fh if line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+def test_search_ranks_the_matching_example_first(store):
+    hits = store.search("which interviewer gives the highest rating?", k=3)
+    assert hits[0]["question"] == SEED[1]["question"]
+    hits = store.search("accepted offers in each department", k=3)
+    assert hits[0]["question"] == SEED[0]["question"]
+
+
+def test_search_ignores_unrelated_and_stopword_only_questions(store):
+    assert store.search("weather forecast tomorrow") == []
+    assert store.search("show me all of the") == []
+
+
+def test_confirmed_pair_is_recorded_once_and_searchable(store, tmp_path):
+    spec = {"question": "Candidates hired per recruiter",
+            "sql": "SELECT recruiter, COUNT(*) FROM candidate GROUP BY 1"}
+    assert record_confirmed(store, spec, ROWS, "y")
+    # The same question again (modulo case/punctuation) is not stored twice.
+    assert not record_confirmed(store, dict(spec, question="candidates hired per recruiter?"), ROWS, "yes")
+    assert _recorded(store) == [spec]
+    assert store.search("hired per recruiter")[0] == spec
+    # Seed file untouched; a fresh store sees the pair exactly once.
+    reloaded = FewShotStore(path=store.path, record_path=store.record_path)
+    assert len(reloaded.examples) == len(SEED) + 1
+    assert json.loads((tmp_path / "seed.jsonl").read_text().splitlines()[-1]) == SEED[-1]
+
+
+def test_seed_questions_are_not_recorded_again(store):
+    assert not record_confirmed(store, dict(SEED[0]), ROWS, "y")
+    assert _recorded(store) == []
+
+
+@pytest.mark.parametrize("spec, result_df, reply", [
+    # User did not confirm.
+    ({"question": "Offers by month", "sql": "SELECT 1"}, ROWS, ""),
+    ({"question": "Offers by month", "sql": "SELECT 1"}, ROWS, "n"),
+    ({"question": "Offers by month", "sql": "SELECT 1"}, ROWS, "maybe"),
+    # Query returned nothing or was stopped by the guard (no question recorded).
+    ({"question": "Offers by month", "sql": "SELECT 1"}, pd.DataFrame(), "y"),
+    ({"intent": "x", "sql": "SELECT * FROM a, b"}, pd.DataFrame(), "y"),
+    ({"question": "Offers by month", "sql": "SELECT 1"}, None, "y"),
+    # Parameterized template rather than generated SQL.
+    ({"question": "Offers by month", "sql": "SELECT ?", "params": [1]}, ROWS, "y"),
+])
+def test_unconfirmed_or_failed_sql_is_not_recorded(store, spec, result_df, reply):
+    assert not record_confirmed(store, spec, result_df, reply)
+    assert _recorded(store) == []
+    assert len(store.examples) == len(SEED)
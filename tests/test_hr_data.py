@@ -0,0 +1,33 @@
+import os
+
+import hr_data
+
+
+def write(path, content):
+    with open(path, "w") as f:
+        f.write(content)
+
+
+def test_stable_changes_waits_only_for_tables_still_changing(tmp_path):
+    paths = {name: tmp_path / filename for name, filename in hr_data.TABLE_FILES.items()}
+    for path in paths.values():
+        write(path, "v1")
+    snapshot = {
+        "data_dir": str(tmp_path),
+        "sources": {name: hr_data.file_signature(str(path)) for name, path in paths.items()},
+    }
+    pending = {}
+
+    write(paths["offer"], "v2")
+    write(paths["candidate"], "v2")
+    assert hr_data.stable_changes(snapshot, pending) == []
+
+    # offer settled, candidate is still being written.
+    write(paths["candidate"], "v3 longer")
+    os.utime(paths["candidate"], ns=(1, 1))
+    assert hr_data.stable_changes(snapshot, pending) == ["offer"]
+    assert set(pending) == {"candidate"}
+    snapshot["sources"]["offer"] = hr_data.file_signature(str(paths["offer"]))  # reloaded
+
+    assert hr_data.stable_changes(snapshot, pending) == ["candidate"]
+    assert pending == {}
@@ -0,0 +1,21 @@
+import pytest
+
+import llm_cache
+
+
+def no_client():
+    raise AssertionError("client built on a cache hit")
+
+
+def test_replay_hit_never_builds_client(tmp_path, monkeypatch):
+    cache = llm_cache.LLMCache(str(tmp_path / "cache.sqlite"))
+    monkeypatch.setattr(llm_cache, "_default_cache", cache)
+    messages = [{"role": "user", "content": "hi"}]
+    cache.put(cache.key("m", messages, temperature=0), "m", "hello", None)
+
+    client = llm_cache.LazyClient(no_client)
+    content, usage = llm_cache.chat(client, "m", messages, mode="replay", temperature=0)
+    assert (content, usage) == ("hello", None)
+
+    with pytest.raises(llm_cache.CacheMiss):
+        llm_cache.chat(client, "m", [{"role": "user", "content": "other"}], mode="replay", temperature=0)
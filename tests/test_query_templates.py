@@ -0,0 +1,75 @@
+import pytest
+
+import hr_data
+import query_templates
+import skills_index
+import synthetic_data
+
+
+@pytest.fixture(scope="module")
+def slots():
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setitem(hr_data.EXTRA_SQL_TABLES, "candidate_skill", skills_index.SKILL_TABLE_NAME)
+        data = synthetic_data.generate(500)
+        data["candidate_skill"] = skills_index.build_candidate_skill(data)
+        data["skill_index"] = skills_index.build_skill_index(data)
+        yield query_templates.build_template_slots(data)
+
+
+def match(question, slots):
+    result = query_templates.match_question(question, slots)
+    return None if result is None else (result["template"]["name"], result["params"])
+
+
+def test_single_filter_matches(slots):
+    name, params = match("How many applications are in Interview stage?", slots)
+    assert name == "applications_at_stage"
+    assert params["stage"] == "Interview"
+    assert params["department"] is None
+
+
+def test_several_filters_match(slots):
+    name, params = match("How many applications in Interview stage in the Engineering department?", slots)
+    assert name == "applications_at_stage"
+    assert (params["stage"], params["department"]) == ("Interview", "Engineering")
+
+
+def test_grouping_word_before_a_value_is_a_filter(slots):
+    name, params = match("How many applications in Interview stage were screened by Recruiter 1?", slots)
+    assert params["recruiter"] == "Recruiter 1"
+
+
+@pytest.mark.parametrize("question", [
+    "How many applications in Interview stage by department?",
+    "How many applications in Interview stage per recruiter?",
+    "How many applications are in each stage?",
+    "How many offers were accepted by department?",
+    "Count interviews completed per department",
+    "How many candidates came from LinkedIn by location?",
+])
+def test_grouping_questions_fall_through(question, slots):
+    assert match(question, slots) is None
+
+
+@pytest.mark.parametrize("question", [
+    "How many applications in Interview stage and what is their average screening score?",
+    "How many applications in Interview stage and how long did they take?",
+])
+def test_extra_metrics_fall_through(question, slots):
+    assert match(question, slots) is None
+
+
+@pytest.mark.parametrize("question", [
+    "How many applications in Interview stage with screening score above 80?",
+    "How many applications in Interview stage from candidates in Pune?",
+    "How many applications in Interview stage in the Robotics department?",
+    "How many offers were accepted for Python developers?",
+])
+def test_extra_filters_fall_through(question, slots):
+    assert match(question, slots) is None
+
+
+def test_supervisor_style_rewrites_do_not_match(slots):
+    # Why main.py matches templates on the user's question, before the supervisor.
+    assert match("How many applications are in Interview stage?", slots) is not None
+    assert match("Count rows of application_table_100 where current_stage = 'Interview'", slots) is None
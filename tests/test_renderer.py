@@ -0,0 +1,65 @@
+import pandas as pd
+
+from renderer import is_additive, render_simple
+
+
+def first_line(text):
+    return text.split("\n\n")[0]
+
+
+def test_count_breakdown_shows_total():
+    df = pd.DataFrame({"current_stage": ["Interview", "Offer"], "applications": [30, 12]})
+    sql = "SELECT current_stage, COUNT(*) AS applications FROM applications GROUP BY 1"
+    assert "(total 42)" in first_line(render_simple(df, sql=sql))
+
+
+def test_average_breakdown_has_no_total():
+    df = pd.DataFrame({"requirement_department": ["Sales", "IT"], "avg_days": [12.5, 30.0]})
+    sql = "SELECT requirement_department, AVG(days) AS avg_days FROM t GROUP BY 1"
+    assert "total" not in first_line(render_simple(df, sql=sql))
+
+
+def test_sql_aggregate_wins_over_column_name():
+    sql = "SELECT d, COUNT(*) AS n, AVG(score) AS total_score FROM t GROUP BY 1"
+    assert is_additive("n", sql)
+    assert not is_additive("total_score", sql)
+
+
+def test_column_name_used_without_sql():
+    assert is_additive("offer_count")
+    assert not is_additive("acceptance_rate")
+    assert not is_additive("screening_score")
+    assert not is_additive("label")
+
+
+def test_rate_shown_as_percentage_without_total():
+    df = pd.DataFrame({"requirement_department": ["Sales", "IT"], "acceptance_rate": [0.4, 0.25]})
+    text = render_simple(df)
+    assert "**40%**" in first_line(text)
+    assert "total" not in first_line(text)
+    assert "25%" in text
+
+
+def test_scalar_rate_shown_as_percentage():
+    df = pd.DataFrame({"offer_acceptance_rate": [0.4]})
+    assert "**40%**" in render_simple(df)
+
+
+def test_single_row_is_singular():
+    df = pd.DataFrame({"current_stage": ["Offer"], "applications": [3]})
+    line = first_line(render_simple(df))
+    assert line.startswith("1 current stage value;")
+    assert "total" not in line
+
+
+def test_plural_rows():
+    df = pd.DataFrame({"a": ["x", "y"], "b": ["p", "q"], "c": [1, 2]})
+    assert first_line(render_simple(df)) == "2 rows returned."
+    assert first_line(render_simple(df.head(1))) == "1 row returned."
+
+
+def test_null_results_go_to_llm():
+    assert render_simple(pd.DataFrame({"avg_days": [float("nan")]})) is None
+    assert render_simple(pd.DataFrame({"avg_days": [None]}, dtype=object)) is None
+    assert render_simple(pd.DataFrame({"d": ["a", "b"], "avg_days": [1.0, float("nan")]})) is None
+    assert render_simple(pd.DataFrame({"applications": []})) is None
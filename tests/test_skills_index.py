@@ -0,0 +1,33 @@
+import pandas as pd
+import pytest
+
+from skills_index import build_candidate_skill, normalize_skill, split_skills
+
+
+@pytest.mark.parametrize("text, skills", [
+    ("Python, AWS , sql", ["python", "aws", "sql"]),
+    ("CI/CD; UI/UX, R&D", ["ci/cd", "ui/ux", "r&d"]),
+    ("C++, C#, Node.js.", ["c++", "c#", "node.js"]),
+    ("python3, Py, PYTHON", ["python"]),
+    ("MS Excel;  microsoft   excel", ["excel"]),
+    ("Research and Development", ["research and development"]),
+    (" , ;", []),
+    (None, []),
+    (float("nan"), []),
+])
+def test_split_skills(text, skills):
+    assert split_skills(text) == skills
+
+
+def test_normalize_skill_strips_punctuation_and_applies_aliases():
+    assert normalize_skill("  K8s!  ") == "kubernetes"
+    assert normalize_skill("Amazon Web Services") == "aws"
+
+
+def test_bridge_table_has_one_row_per_candidate_and_skill():
+    data = {"candidate": pd.DataFrame({
+        "candidate_id": [1, 2, 3],
+        "candidate_skills": ["CI/CD, python", "Python3, py", None],
+    })}
+    bridge = build_candidate_skill(data)
+    assert bridge.values.tolist() == [[1, "ci/cd"], [1, "python"], [2, "python"]]
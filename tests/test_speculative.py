@@ -0,0 +1,48 @@
+import pytest
+
+from speculative import local_route, run_speculative
+
+# main.SPECULATE_BELOW_CONFIDENCE default: below it the turn is speculated.
+THRESHOLD = 0.5
+
+
+@pytest.mark.parametrize("question, route", [
+    ("How many applications per requirement_department in 2024?", "specialist"),
+    ("How many offers were accepted?", "specialist"),
+    ("What are best practices to improve employer branding?", "generic"),
+])
+def test_clear_questions_skip_speculation(question, route):
+    guess, confidence = local_route(question)
+    assert guess == route
+    assert confidence >= THRESHOLD
+
+
+@pytest.mark.parametrize("question", [
+    "What is the offer acceptance rate?",
+    "How should we design interviews for recruiters?",
+    "Why are candidates rejected?",
+    "hello",
+])
+def test_mixed_or_empty_signals_are_speculated(question):
+    _, confidence = local_route(question)
+    assert confidence < THRESHOLD
+
+
+def test_confidence_is_bounded():
+    for question in ["", "how many count total average per list applications 2024 jan",
+                     "how to best practice tips why explain advice strategy"]:
+        _, confidence = local_route(question)
+        assert 0.0 <= confidence < 1.0
+
+
+def test_chosen_branch_is_kept_and_other_discarded():
+    route, _, result = run_speculative(
+        lambda: ("specialist", None),
+        {"specialist": lambda: "sql", "generic": lambda: "advice"},
+    )
+    assert (route, result) == ("specialist", "sql")
+
+
+def test_route_without_branch_returns_none():
+    route, _, result = run_speculative(lambda: ("generic", None), {"specialist": lambda: "sql"})
+    assert (route, result) == ("generic", None)
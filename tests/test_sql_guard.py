@@ -0,0 +1,84 @@
+import duckdb
+import pytest
+
+import sql_guard
+from sql_guard import QueryRejected, guarded_execute
+
+
+@pytest.fixture
+def con():
+    con = duckdb.connect()
+    con.execute("CREATE TABLE t AS SELECT range AS a FROM range(10)")
+    yield con
+    con.close()
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT COUNT(*) AS n FROM t",
+    "WITH x AS (SELECT a FROM t) SELECT MAX(a) AS m FROM x",
+    "-- top values\nSELECT a FROM t ORDER BY a DESC LIMIT 3;",
+    "(SELECT a FROM t) UNION (SELECT 1)",
+])
+def test_select_statements_run(con, sql):
+    result_df, _ = guarded_execute(con, sql)
+    assert len(result_df) > 0
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT 1; DROP TABLE t",
+    "DROP TABLE t",
+    "INSERT INTO t VALUES (99)",
+    "COPY t TO 'out.csv'",
+    "PRAGMA database_list",
+    "ATTACH 'other.db'",
+    "",
+])
+def test_other_statements_rejected_before_planning(con, sql):
+    before = sql_guard.QUERY_GUARD_STATS["rejected_statement"]
+    with pytest.raises(QueryRejected):
+        guarded_execute(con, sql)
+    assert sql_guard.QUERY_GUARD_STATS["rejected_statement"] == before + 1
+    assert con.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 10
+
+
+def test_check_plan_also_checks_statement(con):
+    with pytest.raises(QueryRejected):
+        sql_guard.check_plan(con, "DELETE FROM t")
+
+
+@pytest.fixture
+def big():
+    con = duckdb.connect()
+    con.execute("CREATE TABLE big AS SELECT range AS a FROM range(20000000)")
+    yield con
+    con.close()
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT a * 100.0 / n AS pct FROM big, (SELECT COUNT(*) AS n FROM big) tot",
+    "WITH tot AS (SELECT SUM(a) AS s FROM big) SELECT a / s AS share FROM big CROSS JOIN tot",
+])
+def test_join_against_single_row_total_is_not_a_cross_product(big, sql):
+    _, product = sql_guard.estimate_plan(big, sql)
+    assert product == 0
+    sql_guard.check_plan(big, sql)
+
+
+def test_cross_join_of_two_large_sides_rejected(con):
+    con.execute("CREATE TABLE u AS SELECT range AS b FROM range(5000)")
+    before = sql_guard.QUERY_GUARD_STATS["rejected_plan"]
+    with pytest.raises(QueryRejected, match="cross/nested-loop"):
+        guarded_execute(con, "SELECT * FROM u x, u y")
+    assert sql_guard.QUERY_GUARD_STATS["rejected_plan"] == before + 1
+
+
+def test_long_query_is_interrupted(con, monkeypatch):
+    monkeypatch.setattr(sql_guard, "SQL_MAX_ESTIMATED_ROWS", 10 ** 15)
+    monkeypatch.setattr(sql_guard, "SQL_MAX_CROSS_PRODUCT_ROWS", 10 ** 15)
+    before = sql_guard.QUERY_GUARD_STATS["timed_out"]
+    with pytest.raises(sql_guard.QueryTimeout):
+        guarded_execute(con, "SELECT SUM(x.range * y.range) AS s FROM range(1000000) x, range(1000000) y",
+                        timeout_s=0.3)
+    assert sql_guard.QUERY_GUARD_STATS["timed_out"] == before + 1
+    # The connection is usable again after the interrupt.
+    assert con.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 10
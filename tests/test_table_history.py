@@ -0,0 +1,60 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+
+import synthetic_data
+import table_history
+
+
+def write_lock(root, **owner):
+    with open(root / ".lock", "w") as fh:
+        json.dump(owner, fh)
+
+
+def dead_pid():
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+
+def test_live_lock_is_respected(tmp_path):
+    write_lock(tmp_path, pid=os.getpid(), host=socket.gethostname(), created=time.time())
+    with pytest.raises(table_history.HistoryLocked, match=f"pid {os.getpid()}"):
+        table_history._lock(str(tmp_path))
+
+
+def test_lock_of_dead_process_is_broken(tmp_path):
+    write_lock(tmp_path, pid=dead_pid(), host=socket.gethostname(), created=time.time())
+    path = table_history._lock(str(tmp_path))
+    with open(path) as fh:
+        assert json.load(fh)["pid"] == os.getpid()
+
+
+def test_old_lock_is_broken_even_from_another_host(tmp_path):
+    write_lock(tmp_path, pid=1, host="elsewhere", created=time.time() - table_history.LOCK_STALE_S - 1)
+    table_history._lock(str(tmp_path))
+
+
+def test_fresh_lock_from_another_host_is_respected(tmp_path):
+    write_lock(tmp_path, pid=dead_pid(), host="elsewhere", created=time.time())
+    with pytest.raises(table_history.HistoryLocked):
+        table_history._lock(str(tmp_path))
+
+
+def test_old_empty_lock_file_is_broken(tmp_path):
+    (tmp_path / ".lock").touch()
+    old = time.time() - table_history.LOCK_STALE_S - 1
+    os.utime(tmp_path / ".lock", (old, old))
+    table_history._lock(str(tmp_path))
+
+
+def test_record_after_crashed_recorder(tmp_path):
+    write_lock(tmp_path, pid=dead_pid(), host=socket.gethostname(), created=time.time())
+    data = synthetic_data.generate(50)
+    assert table_history.record(data, str(tmp_path)) == 1
+    assert not (tmp_path / ".lock").exists()
@@ -0,0 +1,85 @@
+import pandas as pd
+
+import hr_data
+
+# ========= PER-APPLICATION TIMELINE ========= #
+# Milestone dates and durations (in days) computed once per application at
+# load time, so time-to-X questions become plain aggregations instead of
+# date arithmetic over raw columns in every generated query.
+
+TIMELINE_TABLE_NAME = "application_timeline"
+
+# duration column -> (from milestone, to milestone)
+DURATIONS = {
+    "days_application_to_first_interview": ("application_date", "first_interview_date"),
+    "days_last_interview_to_offer": ("last_interview_date", "offer_date"),
+    "days_application_to_offer": ("application_date", "offer_date"),
+    "days_offer_to_acceptance": ("offer_date", "offer_acceptance_date"),
+    "days_application_to_start": ("application_date", "candidate_actual_start_date"),
+    "start_date_slippage_days": ("candidate_start_date", "candidate_actual_start_date"),
+}
+
+PROMPT_HINT = f"""
+Timeline: {TIMELINE_TABLE_NAME}(application_id, application_date, first_interview_date,
+last_interview_date, offer_date, offer_acceptance_date, candidate_start_date,
+candidate_actual_start_date, {", ".join(DURATIONS)})
+has one row per application with parsed dates and precomputed durations in days
+(NULL when a milestone has not happened). For time-to-X questions aggregate these
+columns (e.g. AVG(days_application_to_offer)) instead of doing date arithmetic.
+Offer milestones use the candidate's earliest offer; start_date_slippage_days is
+Candidate_actual_start_date minus Candidate_start_date.
+"""
+
+
+def build_application_timeline(data):
+    print("[LOG] Computing application timelines...")
+    application = data["application"][["application_id", "candidate_id"]]
+    candidate = data["candidate"][["candidate_id", "candidate_application_date"]]
+
+    interview = data["interview"]
+    interview_dates = (
+        interview
+        .groupby("application_id")["interview_date"]
+        .agg(first_interview_date="min", last_interview_date="max")
+        .reset_index()
+    )
+
+    # Earliest offer per candidate carries the acceptance and start dates.
+    offer = data["offer"]
+    first_offer = (
+        offer
+        .sort_values("offer_date", na_position="last")
+        .drop_duplicates("offer_candidate_id")
+        [["offer_candidate_id", "offer_date", "offer_acceptance_date",
+          "Candidate_start_date", "Candidate_actual_start_date"]]
+        .rename(columns={
+            "offer_candidate_id": "candidate_id",
+            "Candidate_start_date": "candidate_start_date",
+            "Candidate_actual_start_date": "candidate_actual_start_date",
+        })
+    )
+
+    timeline = (
+        application
+        .merge(candidate.drop_duplicates("candidate_id"), on="candidate_id", how="left")
+        .rename(columns={"candidate_application_date": "application_date"})
+        .merge(interview_dates, on="application_id", how="left")
+        .merge(first_offer, on="candidate_id", how="left")
+        .drop(columns=["candidate_id"])
+    )
+    for col in timeline.columns:
+        if col.endswith("_date"):
+            timeline[col] = pd.to_datetime(timeline[col], errors="coerce")
+    for name, (start, end) in DURATIONS.items():
+        timeline[name] = (timeline[end] - timeline[start]).dt.days.astype("Int64")
+    return timeline
+
+
+def enable():
+    # Must run before hr_data.load_snapshot().
+    hr_data.extend_df(
+        "application_timeline",
+        ["application", "candidate", "interview", "offer"],
+        build_application_timeline,
+    )
+    hr_data.EXTRA_SQL_TABLES["application_timeline"] = TIMELINE_TABLE_NAME